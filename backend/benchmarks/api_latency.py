@@ -0,0 +1,205 @@
+"""
+API latency benchmark for the main routes.
+
+Drives the app in-process (httpx ASGI transport) against a throwaway SQLite database
+seeded with users and a week of history, one endpoint at a time at the given
+concurrency, and reports throughput and p50/p95/p99 latency per endpoint. Results can
+be saved as JSON and two saved runs compared; compare exits non-zero when an endpoint
+regressed by more than --threshold.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.api_latency --requests 500 --concurrency 20 --output before.json
+    python -m backend.benchmarks.api_latency --output after.json --baseline before.json
+    python -m backend.benchmarks.api_latency --compare before.json after.json
+"""
+import os
+import tempfile
+
+# Must be set before the app (and its engines) are imported
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="mindful-pulse-bench-"), "bench.sqlite3")
+
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+import httpx
+
+from .stats import compare, summarize
+
+PASSWORD = "bench-password"
+QUESTION_IDS = ["s1", "s2", "f1", "f2", "m1", "m2", "e1", "e2"]
+
+# name -> (method, path, request kwargs builder)
+ENDPOINTS = {
+    "auth_token": ("POST", "/auth/token", lambda user: {"data": {"username": user["username"], "password": PASSWORD}}),
+    "daily_questions": ("GET", "/daily/questions", lambda user: {}),
+    "daily_response": ("POST", "/daily/response", lambda user: {
+        "json": {"question_id": random.choice(QUESTION_IDS), "answer_value": random.randint(1, 5)}
+    }),
+    "signals_track": ("POST", "/signals/track", lambda user: {
+        "json": {"type": random.choice(["app_open", "response_delay", "late_night_usage"]), "value": round(random.uniform(1, 20), 1)}
+    }),
+    "dashboard_status": ("GET", "/dashboard/status", lambda user: {}),
+}
+
+
+def _seed_history(user_ids: List[int], days: int = 7):
+    """A week of answers and signals per user from the synthetic data generator."""
+    from sqlalchemy import insert
+    from ..database import SessionLocal
+    from ..jobs.seed_data import generate_user_history
+    from ..logic.aggregates import rebuild
+    from .. import db_models
+
+    rng = random.Random(42)
+    today = datetime.utcnow().date()
+    responses, signals = [], []
+    for user_id in user_ids:
+        user_responses, user_signals = generate_user_history(rng, user_id, days, today)
+        responses.extend(user_responses)
+        signals.extend(user_signals)
+
+    db = SessionLocal()
+    try:
+        db.execute(insert(db_models.DailyResponse), responses)
+        db.execute(insert(db_models.BehaviorSignal), signals)
+        db.commit()
+        rebuild(db)
+    finally:
+        db.close()
+
+
+async def seed_users(client: httpx.AsyncClient, users: int) -> List[dict]:
+    from ..database import SessionLocal
+    from .. import db_models
+
+    seeded = []
+    for index in range(users):
+        username = f"bench_{index}_{random.randrange(10 ** 8)}"
+        response = await client.post("/auth/register", json={"username": username, "password": PASSWORD})
+        response.raise_for_status()
+        seeded.append({
+            "username": username,
+            "headers": {"Authorization": f"Bearer {response.json()['access_token']}"},
+        })
+
+    db = SessionLocal()
+    try:
+        ids = [
+            user_id for (user_id,) in db.query(db_models.User.id).filter(
+                db_models.User.username.in_([user["username"] for user in seeded])
+            )
+        ]
+    finally:
+        db.close()
+    _seed_history(ids)
+    return seeded
+
+
+async def _bench_endpoint(client: httpx.AsyncClient, users: List[dict], name: str, requests: int, concurrency: int) -> dict:
+    method, path, build = ENDPOINTS[name]
+    rotation = itertools.cycle(users)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def call(user):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.request(method, path, headers=user["headers"], **build(user))
+            latencies.append(time.perf_counter() - started)
+            errors += response.status_code >= 400
+
+    started = time.perf_counter()
+    await asyncio.gather(*(call(next(rotation)) for _ in range(requests)))
+    return summarize(latencies, time.perf_counter() - started, errors)
+
+
+async def run(app, endpoints: List[str], requests: int, concurrency: int, users: int) -> dict:
+    from ..config import settings
+
+    # Measures the endpoints themselves; a few users send far more than the per-user limits
+    settings.RATE_LIMIT_ENABLED = False
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        seeded = await seed_users(client, users)
+        results = {}
+        for name in endpoints:
+            results[name] = await _bench_endpoint(client, seeded, name, requests, concurrency)
+            _print_row(name, results[name])
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "requests": requests,
+            "concurrency": concurrency,
+            "users": users,
+        },
+        "endpoints": results,
+    }
+
+
+def _print_row(name: str, result: dict):
+    print(f"  {name:<18} {result['requests_per_second']:9.1f} req/s   "
+          f"p50 {result['p50_ms']:8.2f}   p95 {result['p95_ms']:8.2f}   p99 {result['p99_ms']:8.2f} ms"
+          f"{'   ' + str(result['errors']) + ' errors' if result['errors'] else ''}")
+
+
+def _print_comparison(rows: List[dict], threshold: float) -> int:
+    regressions = 0
+    for row in rows:
+        mark = "❌" if row["regression"] else "✅"
+        print(f"{mark} {row['endpoint']:<18} {row['metric']:<20} {row['baseline']:>10} -> {row['candidate']:<10} "
+              f"({row['change']:+.1%})")
+        regressions += row["regression"]
+    print(f"\n{regressions} regression(s) beyond {threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def _load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark API latency per endpoint.")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--users", type=int, default=20, help="Seeded users the requests rotate through")
+    parser.add_argument("--endpoints", nargs="+", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare this run against a saved JSON result")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"), help="Compare two saved results and exit")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression (default 0.10)")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return _print_comparison(compare(_load(args.compare[0]), _load(args.compare[1]), args.threshold), args.threshold)
+
+    from ..main import app
+    from ..migrate import upgrade
+
+    upgrade()
+    print(f"🚀 requests={args.requests}/endpoint, concurrency={args.concurrency}, users={args.users}\n")
+    result = asyncio.run(run(app, args.endpoints, args.requests, args.concurrency, args.users))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+    if args.baseline:
+        print()
+        return _print_comparison(compare(_load(args.baseline), result, args.threshold), args.threshold)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
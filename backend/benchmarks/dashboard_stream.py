@@ -0,0 +1,203 @@
+"""
+Cost of idle dashboard streams and latency of pushed updates.
+
+Opens many GET /dashboard/stream connections against the app in-process (throwaway
+SQLite database), driven at the ASGI level because httpx's ASGI transport buffers whole
+responses. Then it reports:
+
+- memory held per open stream (tracemalloc, after each stream got its first event)
+- DB queries and CPU time spent while every stream sits idle for --idle-seconds
+- write-to-event latency: /daily/response posts for random users, timed until every
+  stream of that user has received the new analysis. Users start without history and
+  alternate extreme answers, so every post changes their analysis.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.dashboard_stream --streams 2000 --users 400 --idle-seconds 10
+"""
+import os
+import tempfile
+
+# Must be set before the app (and its engines) are imported
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="mindful-pulse-bench-"), "bench.sqlite3")
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List
+
+import httpx
+
+from .stats import summarize
+
+
+class _Stream:
+    """One open stream; `events` counts risk events, `received` wakes waiters on each."""
+
+    def __init__(self, app, headers: dict):
+        self.app = app
+        self.scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/dashboard/stream", "raw_path": b"/dashboard/stream",
+            "root_path": "", "query_string": b"", "client": ("bench", 1), "server": ("bench", 80),
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        }
+        self.status = None
+        self.events = 0
+        self.received = asyncio.Event()
+        self._requested = False
+        self._disconnected = asyncio.Event()
+
+    async def _receive(self):
+        if not self._requested:
+            self._requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self._disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body", b"").startswith(b"event: risk"):
+            self.events += 1
+            self.received.set()
+
+    def open(self):
+        self.task = asyncio.create_task(self.app(self.scope, self._receive, self._send))
+
+    async def close(self):
+        self._disconnected.set()
+        await self.task
+
+
+async def _register(client: httpx.AsyncClient, users: int) -> List[dict]:
+    from .api_latency import PASSWORD
+
+    registered = []
+    for index in range(users):
+        username = f"stream_{index}_{random.randrange(10 ** 8)}"
+        response = await client.post("/auth/register", json={"username": username, "password": PASSWORD})
+        response.raise_for_status()
+        registered.append({
+            "username": username,
+            "headers": {"Authorization": f"Bearer {response.json()['access_token']}"},
+            "answers": 0,
+        })
+    return registered
+
+
+def _count_queries() -> List[int]:
+    from sqlalchemy import event
+    from ..database import async_engine, engine
+
+    counter = [0]
+
+    def count(*args):
+        counter[0] += 1
+
+    for bind in (engine, async_engine.sync_engine):
+        event.listen(bind, "before_cursor_execute", count)
+    return counter
+
+
+async def run(app, streams: int, users: int, idle_seconds: float, updates: int) -> dict:
+    from ..config import settings
+    from ..pubsub import risk_updates
+
+    settings.SIGNAL_WRITE_BEHIND = False
+    # Writes are timed back to back, not paced to the per-user rate limits
+    settings.RATE_LIMIT_ENABLED = False
+    risk_updates.max_per_user = max(risk_updates.max_per_user, math.ceil(streams / users))
+    risk_updates.max_connections = max(risk_updates.max_connections, streams)
+    queries = _count_queries()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        seeded = await _register(client, users)
+        # Warm the dashboard cache so opening streams measures the streams themselves
+        for user in seeded:
+            await client.get("/dashboard/status", headers=user["headers"])
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        opened: Dict[str, List[_Stream]] = {user["username"]: [] for user in seeded}
+        for index in range(streams):
+            user = seeded[index % users]
+            stream = _Stream(app, user["headers"])
+            stream.open()
+            opened[user["username"]].append(stream)
+        everything = [stream for group in opened.values() for stream in group]
+        await asyncio.wait_for(asyncio.gather(*(stream.received.wait() for stream in everything)), 60)
+        memory = tracemalloc.get_traced_memory()[0] - baseline
+        tracemalloc.stop()
+        print(f"  {streams} streams open, {memory / streams / 1024:.1f} KiB each")
+
+        queries_before, cpu_before = queries[0], time.process_time()
+        await asyncio.sleep(idle_seconds)
+        idle_queries, idle_cpu = queries[0] - queries_before, time.process_time() - cpu_before
+        print(f"  idle {idle_seconds:g}s: {idle_queries} queries, {idle_cpu * 1000:.1f} ms CPU")
+
+        latencies = []
+        for _ in range(updates):
+            user = random.choice(seeded)
+            group = opened[user["username"]]
+            for stream in group:
+                stream.received.clear()
+            started = time.perf_counter()
+            response = await client.post("/daily/response", headers=user["headers"], json={
+                "question_id": "m1", "answer_value": 5 if user["answers"] % 2 == 0 else 1,
+            })
+            user["answers"] += 1
+            response.raise_for_status()
+            await asyncio.wait_for(asyncio.gather(*(stream.received.wait() for stream in group)), 10)
+            latencies.append(time.perf_counter() - started)
+        pushed = summarize(latencies, sum(latencies))
+        print(f"  write to event: p50 {pushed['p50_ms']:.2f}   p95 {pushed['p95_ms']:.2f}   max {pushed['max_ms']:.2f} ms")
+
+        await asyncio.gather(*(stream.close() for stream in everything))
+
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "streams": streams,
+            "users": users,
+            "heartbeat_seconds": settings.DASHBOARD_STREAM_HEARTBEAT_SECONDS,
+        },
+        "bytes_per_stream": round(memory / streams),
+        "idle": {"seconds": idle_seconds, "queries": idle_queries, "cpu_ms": round(idle_cpu * 1000, 1)},
+        "write_to_event": pushed,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark idle dashboard streams and pushed updates.")
+    parser.add_argument("--streams", type=int, default=2000, help="Open streams")
+    parser.add_argument("--users", type=int, default=400, help="Users the streams are spread over")
+    parser.add_argument("--idle-seconds", type=float, default=10, help="How long every stream sits idle")
+    parser.add_argument("--updates", type=int, default=200, help="Writes timed until their event arrives")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    from ..main import app
+    from ..migrate import upgrade
+
+    upgrade()
+    print(f"🚀 {args.streams} streams over {args.users} users\n")
+    result = asyncio.run(run(app, args.streams, args.users, args.idle_seconds, args.updates))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+"""
+Mixed read/write benchmark for the SQLite connection settings.
+
+Runs reader and writer tasks side by side against the app in-process (httpx ASGI
+transport, throwaway SQLite database) for a fixed time: readers page through
+/dashboard/history, /dashboard/calendar and /signals/history, writers post signals and
+answers. The same load runs once per journal mode:
+
+- rollback: journal_mode=DELETE, synchronous=FULL (SQLite's defaults); a writer
+  locks readers out while it commits
+- wal: journal_mode=WAL, synchronous=NORMAL (the app default); readers keep reading
+  the last committed snapshot while a writer works
+
+Both modes keep SQLITE_BUSY_TIMEOUT_MS, so lock waits show up as latency, not errors.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.db_concurrency --seconds 10 --readers 8 --writers 4
+    python -m backend.benchmarks.db_concurrency --modes wal --output wal.json
+"""
+import os
+import tempfile
+
+# Must be set before the app (and its engines) are imported
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="mindful-pulse-bench-"), "bench.sqlite3")
+
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import random
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+import httpx
+
+from .stats import summarize
+
+# mode -> (journal_mode, synchronous)
+MODES = {
+    "rollback": ("DELETE", "FULL"),
+    "wal": ("WAL", "NORMAL"),
+}
+
+READS = ["/dashboard/history?resolution=week", "/dashboard/calendar", "/signals/history"]
+QUESTION_IDS = ["s1", "s2", "f1", "f2", "m1", "m2", "e1", "e2"]
+
+
+def _write(client: httpx.AsyncClient, user: dict):
+    if random.random() < 0.75:
+        return client.post("/signals/track", headers=user["headers"], json={
+            "type": random.choice(["app_open", "response_delay", "late_night_usage"]),
+            "value": round(random.uniform(1, 20), 1),
+        })
+    return client.post("/daily/response", headers=user["headers"], json={
+        "question_id": random.choice(QUESTION_IDS), "answer_value": random.randint(1, 5),
+    })
+
+
+def _use_mode(mode: str):
+    """Switch the pragmas applied to new connections and convert the database file."""
+    from sqlalchemy import text
+    from ..config import settings
+    from ..database import engine
+
+    journal_mode, synchronous = MODES[mode]
+    settings.SQLITE_WAL = journal_mode == "WAL"
+    settings.SQLITE_SYNCHRONOUS = synchronous
+    # journal_mode is stored in the file; leaving WAL needs a connection of its own
+    engine.dispose()
+    with engine.connect() as conn:
+        conn.exec_driver_sql(f"PRAGMA journal_mode={journal_mode}")
+        assert conn.scalar(text("PRAGMA journal_mode")).upper() == journal_mode
+    engine.dispose()
+
+
+async def _mixed_load(client: httpx.AsyncClient, users: List[dict], seconds: float, readers: int, writers: int) -> dict:
+    deadline = time.perf_counter() + seconds
+    latencies = {"reads": [], "writes": []}
+    errors = {"reads": 0, "writes": 0}
+
+    async def reader(offset: int):
+        paths = itertools.cycle(READS[offset % len(READS):] + READS[:offset % len(READS)])
+        rotation = itertools.cycle(users[offset:] + users[:offset])
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.get(next(paths), headers=next(rotation)["headers"])
+            latencies["reads"].append(time.perf_counter() - started)
+            errors["reads"] += response.status_code >= 400
+
+    async def writer(offset: int):
+        rotation = itertools.cycle(users[offset:] + users[:offset])
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await _write(client, next(rotation))
+            latencies["writes"].append(time.perf_counter() - started)
+            errors["writes"] += response.status_code >= 400
+
+    started = time.perf_counter()
+    await asyncio.gather(*(reader(i) for i in range(readers)), *(writer(i) for i in range(writers)))
+    elapsed = time.perf_counter() - started
+    return {kind: summarize(latencies[kind], elapsed, errors[kind]) for kind in latencies if latencies[kind]}
+
+
+async def run(app, modes: List[str], seconds: float, readers: int, writers: int, users: int) -> dict:
+    from ..config import settings
+    from .api_latency import seed_users
+
+    # Every write should reach the database inside the request
+    settings.SIGNAL_WRITE_BEHIND = False
+    # A few users send far more than the per-user rate limits allow
+    settings.RATE_LIMIT_ENABLED = False
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        seeded = await seed_users(client, users)
+        results = {}
+        for mode in modes:
+            _use_mode(mode)
+            results[mode] = await _mixed_load(client, seeded, seconds, readers, writers)
+            _print_mode(mode, results[mode])
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "seconds": seconds,
+            "readers": readers,
+            "writers": writers,
+            "users": users,
+            "busy_timeout_ms": settings.SQLITE_BUSY_TIMEOUT_MS,
+        },
+        "modes": results,
+    }
+
+
+def _print_mode(mode: str, result: dict):
+    journal_mode, synchronous = MODES[mode]
+    print(f"{mode} (journal_mode={journal_mode}, synchronous={synchronous})")
+    for kind, summary in result.items():
+        print(f"  {kind:<7} {summary['requests_per_second']:9.1f} req/s   "
+              f"p50 {summary['p50_ms']:8.2f}   p95 {summary['p95_ms']:8.2f}   max {summary['max_ms']:8.2f} ms"
+              f"{'   ' + str(summary['errors']) + ' errors' if summary['errors'] else ''}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark concurrent reads and writes per SQLite journal mode.")
+    parser.add_argument("--seconds", type=float, default=10, help="Duration of each mode's run")
+    parser.add_argument("--readers", type=int, default=8, help="Concurrent reading clients")
+    parser.add_argument("--writers", type=int, default=4, help="Concurrent writing clients")
+    parser.add_argument("--users", type=int, default=20, help="Seeded users the requests rotate through")
+    parser.add_argument("--modes", nargs="+", choices=list(MODES), default=list(MODES))
+    parser.add_argument("--output", help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    from ..main import app
+    from ..migrate import upgrade
+
+    upgrade()
+    print(f"🚀 {args.seconds:g}s per mode, readers={args.readers}, writers={args.writers}, users={args.users}\n")
+    result = asyncio.run(run(app, args.modes, args.seconds, args.readers, args.writers, args.users))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n✅ Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Login throughput benchmark.
+
+Fires concurrent POST /auth/token requests at the app in-process (httpx ASGI transport,
+throwaway SQLite database) while probing GET / to see how responsive the event loop
+stays during the burst. With --compare, the same run is repeated with hashing done
+inline on the event loop, the way login worked before the hash pool.
+
+Usage (from the repository root):
+    python -m backend.benchmarks.login_throughput --requests 200 --concurrency 20
+    python -m backend.benchmarks.login_throughput --compare --rounds 100000
+"""
+import os
+import tempfile
+
+# Must be set before the app (and its engines) are imported
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="mindful-pulse-bench-"), "bench.sqlite3")
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import httpx
+
+from .stats import percentile
+
+
+async def _run(app, requests: int, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        credentials = {"username": "bench_user", "password": "bench-password"}
+        await client.post("/auth/register", json=credentials)
+
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def login():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/auth/token", data=credentials)
+                latencies.append(time.perf_counter() - started)
+                assert response.status_code == 200, response.text
+
+        probe_latencies = []
+        done = asyncio.Event()
+
+        async def probe():
+            # A cheap endpoint hit throughout the burst: its latency is event-loop stall time
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/")
+                probe_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.005)
+
+        probe_task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await probe_task
+
+    return {
+        "logins_per_second": requests / elapsed,
+        "login_p50_ms": statistics.median(latencies) * 1000,
+        "login_p95_ms": percentile(latencies, 95) * 1000,
+        "probe_p50_ms": statistics.median(probe_latencies) * 1000,
+        "probe_max_ms": max(probe_latencies) * 1000,
+    }
+
+
+def _print(label: str, result: dict):
+    print(f"{label}")
+    print(f"  logins/sec      {result['logins_per_second']:8.1f}")
+    print(f"  login p50/p95   {result['login_p50_ms']:8.1f} / {result['login_p95_ms']:.1f} ms")
+    print(f"  GET / p50/max   {result['probe_p50_ms']:8.1f} / {result['probe_max_ms']:.1f} ms")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark login throughput under concurrency.")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rounds", type=int, help="Override PASSWORD_HASH_ROUNDS for this run")
+    parser.add_argument("--compare", action="store_true", help="Also run with hashing inline on the event loop")
+    args = parser.parse_args(argv)
+
+    if args.rounds:
+        os.environ["PASSWORD_HASH_ROUNDS"] = str(args.rounds)
+
+    from ..main import app
+    from ..migrate import upgrade
+    from ..config import settings
+    from ..routers import auth
+
+    upgrade()
+    print(f"pbkdf2_sha256 rounds={settings.PASSWORD_HASH_ROUNDS}, hash workers={settings.PASSWORD_HASH_WORKERS}, "
+          f"requests={args.requests}, concurrency={args.concurrency}\n")
+
+    _print("Hash pool", asyncio.run(_run(app, args.requests, args.concurrency)))
+
+    if args.compare:
+        async def inline(func, *func_args):
+            return func(*func_args)
+
+        pooled = auth.run_in_hash_pool
+        auth.run_in_hash_pool = inline
+        try:
+            _print("\nInline (blocking the event loop)", asyncio.run(_run(app, args.requests, args.concurrency)))
+        finally:
+            auth.run_in_hash_pool = pooled
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
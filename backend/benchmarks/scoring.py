@@ -0,0 +1,98 @@
+"""
+Scoring engine micro-benchmarks.
+
+Times the pure scoring paths on synthetic window totals, no database involved:
+
+- answer_risk: compiled polarity lookup vs the old tuple membership test
+- answer_risks: the vectorized form over one array of answers
+- score_one: one user, as on the dashboard request path
+- score_many: the whole population in one NumPy pass, as in the nightly job,
+  against a Python loop of score_one over the same users
+
+Usage (from the repository root):
+    python -m backend.benchmarks.scoring --users 100000
+"""
+import argparse
+import random
+import sys
+import time
+import timeit
+
+import numpy as np
+
+from ..logic.rotation import QUESTIONS_POOL
+from ..logic.scoring import scoring_engine
+
+TOTAL_COLUMNS = ("answer_risk_sum", "answer_count", "signal_count", "late_night_count", "slow_response_count")
+LEGACY_NEGATIVE_QUESTIONS = ("s2", "f2", "m1", "e1")
+
+
+def _legacy_answer_risk(question_id: str, answer_value: int) -> int:
+    if question_id in LEGACY_NEGATIVE_QUESTIONS:
+        return answer_value
+    return 6 - answer_value
+
+
+def _synthetic_totals(users: int, seed: int = 42) -> dict:
+    rng = np.random.default_rng(seed)
+    answer_count = rng.integers(0, 15, users)
+    return {
+        "answer_count": answer_count,
+        "answer_risk_sum": answer_count * rng.integers(1, 6, users),
+        "signal_count": rng.integers(0, 40, users),
+        "late_night_count": rng.integers(0, 6, users),
+        "slow_response_count": rng.integers(0, 8, users),
+    }
+
+
+def _per_call_ns(stmt, number: int) -> float:
+    """Best of five runs, in nanoseconds per call."""
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e9
+
+
+def run(users: int) -> dict:
+    question_ids = [q.id for q in QUESTIONS_POOL]
+    rng = random.Random(42)
+    answers = [(rng.choice(question_ids), rng.randint(1, 5)) for _ in range(1000)]
+
+    results = {
+        "answer_risk_legacy_ns": _per_call_ns(lambda: [_legacy_answer_risk(q, v) for q, v in answers], 200) / len(answers),
+        "answer_risk_ns": _per_call_ns(lambda: [scoring_engine.answer_risk(q, v) for q, v in answers], 200) / len(answers),
+    }
+
+    indexes = scoring_engine.question_indexes([q for q, _ in answers] * 100)
+    values = np.array([v for _, v in answers] * 100)
+    results["answer_risks_ns"] = _per_call_ns(lambda: scoring_engine.answer_risks(indexes, values), 50) / len(values)
+
+    totals = _synthetic_totals(users)
+    rows = [{column: int(totals[column][i]) for column in TOTAL_COLUMNS} for i in range(users)]
+    results["score_one_ns"] = _per_call_ns(lambda: scoring_engine.score_one(rows[7]), 20000)
+
+    started = time.perf_counter()
+    for row in rows:
+        scoring_engine.score_one(row)
+    results["score_one_loop_s"] = time.perf_counter() - started
+    results["score_many_s"] = min(timeit.repeat(lambda: scoring_engine.score_many(totals), number=1, repeat=5))
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmark the risk scoring engine.")
+    parser.add_argument("--users", type=int, default=100000, help="Synthetic users for the population runs")
+    args = parser.parse_args(argv)
+
+    print(f"🚀 Scoring engine, {args.users} synthetic users\n")
+    r = run(args.users)
+    print(f"  answer_risk (tuple membership) {r['answer_risk_legacy_ns']:10.1f} ns/answer")
+    print(f"  answer_risk (compiled lookup)  {r['answer_risk_ns']:10.1f} ns/answer")
+    print(f"  answer_risks (vectorized)      {r['answer_risks_ns']:10.1f} ns/answer")
+    print(f"  score_one                      {r['score_one_ns']:10.1f} ns/user")
+    print(f"  score_one loop                 {r['score_one_loop_s'] * 1000:10.1f} ms "
+          f"({args.users / r['score_one_loop_s']:,.0f} users/s)")
+    print(f"  score_many                     {r['score_many_s'] * 1000:10.1f} ms "
+          f"({args.users / r['score_many_s']:,.0f} users/s, {r['score_one_loop_s'] / r['score_many_s']:.0f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
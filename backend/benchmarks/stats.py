@@ -0,0 +1,47 @@
+"""
+Latency summary and run comparison helpers shared by the benchmarks.
+"""
+import statistics
+from typing import List
+
+# Lower is better for latencies, higher is better for throughput
+COMPARED_METRICS = {"p50_ms": 1, "p95_ms": 1, "p99_ms": 1, "requests_per_second": -1}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int = 0) -> dict:
+    """Throughput and latency percentiles (ms) for one batch of timed requests."""
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+    }
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> List[dict]:
+    """Per endpoint and metric changes between two runs; `regression` marks changes worse than threshold."""
+    rows = []
+    for name, before in baseline["endpoints"].items():
+        after = candidate["endpoints"].get(name)
+        if after is None:
+            continue
+        for metric, direction in COMPARED_METRICS.items():
+            change = (after[metric] - before[metric]) / before[metric] if before[metric] else 0.0
+            rows.append({
+                "endpoint": name,
+                "metric": metric,
+                "baseline": before[metric],
+                "candidate": after[metric],
+                "change": round(change, 4),
+                "regression": change * direction > threshold,
+            })
+    return rows
@@ -0,0 +1,111 @@
+"""
+Small in-process LRU + TTL cache with hit/miss counters.
+
+Entries are bounded by `max_size` (least recently used are evicted first) and expire
+after `ttl_seconds`, or earlier at an explicit `expires_at`. `invalidate` leaves a
+versioned tombstone behind, so a result computed from data read before the
+invalidation can't be stored afterwards:
+
+    version = cache.version(key)
+    value = compute()
+    cache.set(key, value, version=version)   # skipped if key was invalidated meanwhile
+
+Versions come from one process-wide counter, so they only grow. A key without an entry
+reports the highest version evicted (or cleared) so far, so evicting a tombstone can't
+make an older version current again.
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+_MISSING = object()
+
+# Source of every version handed out, shared by all caches
+_versions = itertools.count(1)
+
+
+class LRUCache:
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        # key -> [version, value, expires_at]; value is _MISSING for tombstones
+        self._entries: "OrderedDict[Hashable, list]" = OrderedDict()
+        # Version of keys without an entry: at least that of anything evicted
+        self._floor = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_sets = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            slot = self._entries.get(key)
+            if slot is not None and slot[1] is not _MISSING and slot[2] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return slot[1]
+            self.misses += 1
+            return default
+
+    def version(self, key: Hashable) -> int:
+        with self._lock:
+            return self._version(key)
+
+    def _version(self, key: Hashable) -> int:
+        slot = self._entries.get(key)
+        return slot[0] if slot is not None else self._floor
+
+    def set(self, key: Hashable, value: Any, version: Optional[int] = None, expires_at: Optional[float] = None) -> bool:
+        """Store a value. Returns False (and stores nothing) if `version` is stale."""
+        expiry = time.time() + self.ttl_seconds
+        if expires_at is not None:
+            expiry = min(expiry, expires_at)
+        with self._lock:
+            current = self._version(key)
+            # Anything invalidated since `version` was read now has a higher one
+            if version is not None and version < current:
+                self.stale_sets += 1
+                return False
+            self._entries[key] = [current, value, expiry]
+            self._entries.move_to_end(key)
+            self._evict()
+            return True
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries[key] = [next(_versions), _MISSING, 0.0]
+            self._entries.move_to_end(key)
+            self.invalidations += 1
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._floor = next(_versions)
+
+    def _evict(self):
+        while len(self._entries) > self.max_size:
+            _, slot = self._entries.popitem(last=False)
+            self._floor = max(self._floor, slot[0])
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_sets": self.stale_sets,
+        }
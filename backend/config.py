@@ -10,6 +10,17 @@ class Settings:
     
     # DATABASE
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    # Optional read replica for read-only endpoints (get_read_db); empty means use the primary
+    DATABASE_READ_URL: str = os.getenv("DATABASE_READ_URL", "")
+    # Connection pool (server databases; SQLite files aren't pooled the same way)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    # SQLite: WAL lets readers run alongside a writer; busy_timeout waits for locks instead of failing
+    SQLITE_WAL: bool = os.getenv("SQLITE_WAL", "true").lower() in ("1", "true", "yes")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
     
     # CORS - Allowed frontend origins (comma-separated for production)
     ALLOWED_ORIGINS: str = os.getenv("ALLOWED_ORIGINS", "")
@@ -18,5 +29,66 @@ class Settings:
     SECRET_KEY: str = os.getenv("SECRET_KEY", "super-secret-key-change-this-in-production")
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    # pbkdf2_sha256 work factor; hashes with a different cost are rehashed on the next login
+    PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+    # Threads that run password hashing off the event loop
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    # Verified principals are cached briefly so authenticated requests skip the users lookup
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+
+    # SIGNAL INGESTION
+    SIGNAL_BATCH_MAX_SIZE: int = int(os.getenv("SIGNAL_BATCH_MAX_SIZE", "500"))
+    # Write-behind mode: queue signals in memory and flush them to the DB in the background
+    SIGNAL_WRITE_BEHIND: bool = os.getenv("SIGNAL_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+    SIGNAL_BUFFER_MAX_SIZE: int = int(os.getenv("SIGNAL_BUFFER_MAX_SIZE", "10000"))
+    SIGNAL_BUFFER_FLUSH_SIZE: int = int(os.getenv("SIGNAL_BUFFER_FLUSH_SIZE", "500"))
+    SIGNAL_BUFFER_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("SIGNAL_BUFFER_FLUSH_INTERVAL_SECONDS", "1.0"))
+    # Raw signals older than this are rolled up into daily summaries (jobs/compact_signals.py)
+    SIGNAL_RETENTION_DAYS: int = int(os.getenv("SIGNAL_RETENTION_DAYS", "90"))
+    SIGNAL_RETENTION_CHUNK_SIZE: int = int(os.getenv("SIGNAL_RETENTION_CHUNK_SIZE", "5000"))
+
+    # RATE LIMITS: per-user token buckets on write routes; <ROUTE>_PER_SECOND=0 turns one off
+    RATE_LIMIT_ENABLED: bool = os.getenv("RATE_LIMIT_ENABLED", "true").lower() in ("1", "true", "yes")
+    RATE_LIMIT_SIGNAL_TRACK_PER_SECOND: float = float(os.getenv("RATE_LIMIT_SIGNAL_TRACK_PER_SECOND", "2"))
+    RATE_LIMIT_SIGNAL_TRACK_BURST: int = int(os.getenv("RATE_LIMIT_SIGNAL_TRACK_BURST", "30"))
+    RATE_LIMIT_SIGNAL_BATCH_PER_SECOND: float = float(os.getenv("RATE_LIMIT_SIGNAL_BATCH_PER_SECOND", "0.5"))
+    RATE_LIMIT_SIGNAL_BATCH_BURST: int = int(os.getenv("RATE_LIMIT_SIGNAL_BATCH_BURST", "10"))
+    RATE_LIMIT_DAILY_RESPONSE_PER_SECOND: float = float(os.getenv("RATE_LIMIT_DAILY_RESPONSE_PER_SECOND", "1"))
+    RATE_LIMIT_DAILY_RESPONSE_BURST: int = int(os.getenv("RATE_LIMIT_DAILY_RESPONSE_BURST", "20"))
+    # Idle buckets are forgotten after this long; at most MAX_BUCKETS are kept per route,
+    # and users past that share one bucket until idle ones can be dropped
+    RATE_LIMIT_IDLE_SECONDS: float = float(os.getenv("RATE_LIMIT_IDLE_SECONDS", "300"))
+    RATE_LIMIT_MAX_BUCKETS: int = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", "100000"))
+
+    # DASHBOARD CACHE (per-user calculate_risk results)
+    DASHBOARD_CACHE_SIZE: int = int(os.getenv("DASHBOARD_CACHE_SIZE", "10000"))
+    DASHBOARD_CACHE_TTL_SECONDS: float = float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "300"))
+
+    # DASHBOARD STREAM (GET /dashboard/stream, server-sent events)
+    # "memory" pushes within one worker; "postgres" shares updates between workers via LISTEN/NOTIFY
+    DASHBOARD_STREAM_BROKER: str = os.getenv("DASHBOARD_STREAM_BROKER", "memory").lower()
+    DASHBOARD_STREAM_HEARTBEAT_SECONDS: float = float(os.getenv("DASHBOARD_STREAM_HEARTBEAT_SECONDS", "15"))
+    # Open streams allowed per worker process, and per user within it
+    DASHBOARD_STREAM_MAX_CONNECTIONS: int = int(os.getenv("DASHBOARD_STREAM_MAX_CONNECTIONS", "10000"))
+    DASHBOARD_STREAM_MAX_PER_USER: int = int(os.getenv("DASHBOARD_STREAM_MAX_PER_USER", "5"))
+
+    # EXPORT (GET /export): rows fetched per server-side cursor batch
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+    # IMPORT (POST /import, jobs/import_history.py): rows validated and written per transaction
+    IMPORT_CHUNK_SIZE: int = int(os.getenv("IMPORT_CHUNK_SIZE", "10000"))
+    # Largest POST /import body in bytes (413 above it)
+    IMPORT_MAX_BYTES: int = int(os.getenv("IMPORT_MAX_BYTES", str(50 * 1024 * 1024)))
+
+    # ARCHIVE (jobs/archive_history.py): per-day column files for offline analytics
+    ARCHIVE_DIR: str = os.getenv("ARCHIVE_DIR", "archive")
+    ARCHIVE_CHUNK_SIZE: int = int(os.getenv("ARCHIVE_CHUNK_SIZE", "50000"))
+
+    # METRICS (GET /metrics); Server-Timing adds per-request DB/section timings to responses.
+    # Off by default; the endpoint also needs METRICS_TOKEN and answers only to that bearer token
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+    METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+    METRICS_SERVER_TIMING: bool = os.getenv("METRICS_SERVER_TIMING", "false").lower() in ("1", "true", "yes")
 
 settings = Settings()
@@ -0,0 +1,87 @@
+"""
+Shared pytest fixtures for the backend tests.
+Every test session runs against a fresh SQLite database in a temporary directory,
+created through the migrations, so the local dev database is never touched.
+"""
+import os
+import tempfile
+import uuid
+from collections import Counter
+
+# Must be set before anything imports backend.config / backend.database
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="mindful-pulse-tests-"), "test.sqlite3")
+# The request metrics middleware is installed at import time; it is off by default
+os.environ["METRICS_ENABLED"] = "true"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from backend.main import app
+from backend.database import async_engine, engine, read_async_engine
+from backend.migrate import upgrade
+
+upgrade()
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Register a fresh user and return bearer headers for it."""
+    username = f"user_{uuid.uuid4().hex[:12]}"
+    response = client.post("/auth/register", json={"username": username, "password": "testpass123"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+class QueryBudget:
+    """
+    Records every SQL statement run on the app's engines inside the block and fails if
+    there were more than `max_queries`, or if the same statement ran twice with the
+    same parameters (a redundant lookup):
+
+        with query_budget(2):
+            client.get("/dashboard/status", headers=auth_headers)
+    """
+
+    def __init__(self, max_queries: int, allow_duplicates: bool = False):
+        self.max_queries = max_queries
+        self.allow_duplicates = allow_duplicates
+        self.statements = []
+
+    @staticmethod
+    def _engines():
+        # The read engine is the primary's unless a replica is configured
+        return list(dict.fromkeys((engine, async_engine.sync_engine, read_async_engine.sync_engine)))
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, repr(parameters)))
+
+    def __enter__(self):
+        for target in self._engines():
+            event.listen(target, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        for target in self._engines():
+            event.remove(target, "before_cursor_execute", self._record)
+        if exc_type is not None:
+            return False
+
+        listing = "\n".join(f"  {sql} {params}" for sql, params in self.statements)
+        assert len(self.statements) <= self.max_queries, (
+            f"{len(self.statements)} queries, budget is {self.max_queries}:\n{listing}"
+        )
+        if not self.allow_duplicates:
+            duplicates = [sql for (sql, _), count in Counter(self.statements).items() if count > 1]
+            assert not duplicates, "Duplicate statements:\n" + "\n".join(duplicates)
+        return False
+
+
+@pytest.fixture
+def query_budget():
+    return QueryBudget
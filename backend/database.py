@@ -1,4 +1,7 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 
 # Try relative import first, fall back to absolute
@@ -9,42 +12,143 @@ except ImportError:
     from config import settings
     from db_models import Base
 
-# Create database engine
 # If no DATABASE_URL is provided, fall back to a local SQLite file for testing and dev.
-if settings.DATABASE_URL:
-    engine = create_engine(
-        settings.DATABASE_URL,
-        pool_pre_ping=True,  # Verify connections before using them
-        echo=False  # Set to True for SQL query logging during development
-    )
-else:
-    # Use a file-based SQLite DB so tests and dev run without external dependencies
-    engine = create_engine(
-        "sqlite:///./test_db.sqlite3",
-        connect_args={"check_same_thread": False},
+DATABASE_URL = settings.DATABASE_URL or "sqlite:///./test_db.sqlite3"
+
+def async_url(url: str) -> str:
+    """Swap the sync driver for its asyncio counterpart (asyncpg / aiosqlite)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+SQLITE_SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+def engine_options(url: str) -> dict:
+    """Pool settings for server databases; SQLite only needs cross-thread access."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    }
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    """Per-connection SQLite tuning (journal_mode=WAL also sticks to the file)."""
+    if settings.SQLITE_SYNCHRONOUS not in SQLITE_SYNCHRONOUS_MODES:
+        raise ValueError(f"SQLITE_SYNCHRONOUS must be one of {', '.join(SQLITE_SYNCHRONOUS_MODES)}")
+    cursor = dbapi_connection.cursor()
+    if settings.SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.close()
+
+def _tune(bind):
+    """Attach SQLite pragmas to a sync engine (or an AsyncEngine's sync_engine)."""
+    if bind.dialect.name == "sqlite":
+        event.listen(bind, "connect", _sqlite_pragmas)
+    return bind
+
+# Create database engine
+# The sync engine serves migrations and the CLI jobs; request handlers use async_engine below.
+engine = _tune(create_engine(
+    DATABASE_URL,
+    pool_pre_ping=True,  # Verify connections before using them
+    # SQLite connections are shared across FastAPI's worker threads
+    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
+    echo=False,  # Set to True for SQL query logging during development
+    **engine_options(DATABASE_URL)
+))
+
+# Async engine on the same database, so DB round trips don't block the event loop
+async_engine = create_async_engine(
+    async_url(DATABASE_URL),
+    pool_pre_ping=True,
+    echo=False,
+    **engine_options(DATABASE_URL)
+)
+_tune(async_engine.sync_engine)
+
+# Read-only endpoints use the replica when one is configured, otherwise the primary
+if settings.DATABASE_READ_URL:
+    read_async_engine = create_async_engine(
+        async_url(settings.DATABASE_READ_URL),
+        pool_pre_ping=True,
         echo=False,
+        **engine_options(settings.DATABASE_READ_URL)
     )
+    _tune(read_async_engine.sync_engine)
+else:
+    read_async_engine = async_engine
 
-# Create session factory
+# Create session factories
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: attributes can't be lazy-loaded after commit in async code
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 # Dependency to get database session
-def get_db():
+async def get_db():
     """
-    Dependency function to get database session.
+    Dependency function to get an async database session.
     Use this in FastAPI route dependencies.
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-# Function to initialize database (create tables)
+AsyncReadSessionLocal = (
+    async_sessionmaker(read_async_engine, autoflush=False, expire_on_commit=False)
+    if read_async_engine is not async_engine else AsyncSessionLocal
+)
+
+async def get_read_db():
+    """
+    Like get_db, but on the read replica when DATABASE_READ_URL is set.
+    Only for endpoints that never write and can tolerate replication lag.
+    """
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+def upsert_insert(db):
+    """
+    The INSERT construct supporting ON CONFLICT DO UPDATE for this session's database
+    (SQLite or PostgreSQL), or None for dialects without it. Accepts sync or async sessions.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        return sqlite.insert
+    if dialect == "postgresql":
+        return postgresql.insert
+    return None
+
+async def insert_returning_ids(db: AsyncSession, model, rows: list) -> list:
+    """
+    Bulk-insert `rows` and return the new primary keys in input order.
+    SQLite can't promise RETURNING order, so SQLAlchemy's sort_by_parameter_order would
+    fall back to one INSERT per row there. SQLite writers are serialized and rowids are
+    handed out in VALUES order, so sorting the returned ids gives the same order in a
+    single statement per batch.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sorted((await db.scalars(insert(model).returning(model.id), rows)).all())
+    stmt = insert(model).returning(model.id, sort_by_parameter_order=True)
+    return (await db.scalars(stmt, rows)).all()
+
+# Function to initialize database (create or upgrade tables)
 def init_db():
     """
-    Create all tables in the database.
-    Call this once when setting up the application.
+    Create all tables in the database, or upgrade an existing one,
+    by applying pending migrations (see migrate.py).
+    Call this once when setting up the application and after each deploy.
     """
-    Base.metadata.create_all(bind=engine)
+    try:
+        from .migrate import upgrade
+    except ImportError:
+        from migrate import upgrade
+    upgrade(engine)
     print("✅ Database tables created successfully!")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Text, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -18,9 +18,15 @@ class User(Base):
     daily_responses = relationship("DailyResponse", back_populates="user", cascade="all, delete-orphan")
     behavior_signals = relationship("BehaviorSignal", back_populates="user", cascade="all, delete-orphan")
     risk_analyses = relationship("RiskAnalysis", back_populates="user", cascade="all, delete-orphan")
+    daily_stats = relationship("UserDailyStats", back_populates="user", cascade="all, delete-orphan")
+    signal_summaries = relationship("BehaviorSignalDaily", back_populates="user", cascade="all, delete-orphan")
 
 class DailyResponse(Base):
     __tablename__ = "daily_responses"
+    __table_args__ = (
+        # Hot path: WHERE user_id = ? AND timestamp >= ?
+        Index("ix_daily_responses_user_id_timestamp", "user_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -34,6 +40,10 @@ class DailyResponse(Base):
 
 class BehaviorSignal(Base):
     __tablename__ = "behavior_signals"
+    __table_args__ = (
+        # Hot path: WHERE user_id = ? AND timestamp >= ?
+        Index("ix_behavior_signals_user_id_timestamp", "user_id", "timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -46,6 +56,10 @@ class BehaviorSignal(Base):
 
 class RiskAnalysis(Base):
     __tablename__ = "risk_analyses"
+    __table_args__ = (
+        # One snapshot per user per day. Its index also serves WHERE user_id = ? AND date >= ?
+        UniqueConstraint("user_id", "date", name="uq_risk_analyses_user_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -57,3 +71,50 @@ class RiskAnalysis(Base):
     
     # Relationship
     user = relationship("User", back_populates="risk_analyses")
+
+class UserDailyStats(Base):
+    """
+    Per-user, per-day running totals maintained on every response/signal write,
+    so risk analysis reads at most one small row per day instead of raw history.
+    Also the materialized calendar heatmap: one row per active day with its final risk score.
+    """
+    __tablename__ = "user_daily_stats"
+    __table_args__ = (
+        UniqueConstraint("user_id", "date", name="uq_user_daily_stats_user_date"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    date = Column(String(10), nullable=False)  # YYYY-MM-DD (UTC day of the event timestamp)
+    answer_risk_sum = Column(Integer, nullable=False, default=0)  # Sum of polarity-normalized answers (1-5 each)
+    answer_count = Column(Integer, nullable=False, default=0)
+    signal_count = Column(Integer, nullable=False, default=0)  # All behavior signals, any type
+    late_night_count = Column(Integer, nullable=False, default=0)
+    slow_response_count = Column(Integer, nullable=False, default=0)  # response_delay signals over the threshold
+    risk_score = Column(Float, nullable=True)  # That day's risk_analyses score, copied for the calendar view
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationship
+    user = relationship("User", back_populates="daily_stats")
+
+class BehaviorSignalDaily(Base):
+    """
+    Per-user, per-day, per-type rollup of behavior_signals older than the retention
+    horizon (see jobs/compact_signals.py). The raw rows are deleted once rolled up.
+    """
+    __tablename__ = "behavior_signal_daily"
+    __table_args__ = (
+        UniqueConstraint("user_id", "date", "type", name="uq_behavior_signal_daily_user_date_type"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    date = Column(String(10), nullable=False)  # YYYY-MM-DD (UTC day of the event timestamp)
+    type = Column(String(50), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    value_sum = Column(Float, nullable=False, default=0.0)
+    value_max = Column(Float, nullable=True)
+    slow_count = Column(Integer, nullable=False, default=0)  # response_delay over the threshold, for rebuild
+    
+    # Relationship
+    user = relationship("User", back_populates="signal_summaries")
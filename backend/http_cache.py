@@ -0,0 +1,54 @@
+"""
+Conditional GET helpers.
+
+A Representation renders a JSON payload once (byte-for-byte what FastAPI's JSONResponse
+would send) and derives a strong ETag from those bytes, unless it is given one derived
+from the data the payload was computed from. A cached representation can be re-sent, or
+answered with 304 Not Modified, without serializing again:
+
+    if request_etag_matches(request, representation.etag):
+        return not_modified(representation.etag, "private, no-cache")
+    return representation.response("private, no-cache")
+"""
+import hashlib
+import json
+from typing import Any, Optional
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import Response
+
+
+class Representation:
+    __slots__ = ("payload", "body", "etag")
+
+    def __init__(self, payload: Any, etag: Optional[str] = None):
+        self.payload = payload
+        # Same settings as starlette's JSONResponse.render
+        self.body = json.dumps(
+            jsonable_encoder(payload), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+        ).encode("utf-8")
+        self.etag = etag or strong_etag(self.body)
+
+    def response(self, cache_control: str) -> Response:
+        return Response(
+            self.body, media_type="application/json", headers={"ETag": self.etag, "Cache-Control": cache_control}
+        )
+
+
+def strong_etag(data: bytes) -> str:
+    return '"' + hashlib.blake2b(data, digest_size=16).hexdigest() + '"'
+
+
+def request_etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check, using the weak comparison RFC 9110 prescribes for it."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
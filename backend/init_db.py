@@ -2,7 +2,8 @@
 Database Initialization Script
 
 Run this script to create all database tables on Railway PostgreSQL.
-This should be run once after setting up your DATABASE_URL in the .env file.
+This should be run once after setting up your DATABASE_URL in the .env file,
+and again after each deploy to apply any pending migrations.
 
 Usage:
     python init_db.py
@@ -11,7 +12,7 @@ Usage:
 import os
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
-from db_models import Base
+from migrate import upgrade
 
 # Load environment variables
 load_dotenv()
@@ -38,8 +39,8 @@ if __name__ == "__main__":
             echo=True  # Show SQL queries
         )
         
-        # Create all tables
-        Base.metadata.create_all(bind=engine)
+        # Create all tables / apply pending migrations
+        upgrade(engine)
         
         print("✅ Database tables created successfully!")
         print("🎉 You can now start the FastAPI server.")
@@ -48,6 +49,7 @@ if __name__ == "__main__":
         print("  - daily_responses")
         print("  - behavior_signals")
         print("  - risk_analyses")
+        print("  - user_daily_stats")
         
     except Exception as e:
         print(f"❌ Error initializing database: {e}")
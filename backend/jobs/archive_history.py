@@ -0,0 +1,43 @@
+"""
+Archive raw answers and signals into per-day column files for offline analytics.
+
+Appends the rows added since the last run to ARCHIVE_DIR (see logic/archive.py), so
+analysts can load a date range with HistoryArchive and never scan the live tables.
+Safe to run repeatedly, e.g. nightly from cron before compact_signals.
+
+Usage (from the repository root):
+    python -m backend.jobs.archive_history
+    python -m backend.jobs.archive_history --dir /data/archive --tables behavior_signals
+"""
+import argparse
+import sys
+import time
+
+from ..config import settings
+from ..database import SessionLocal
+from ..logic.archive import ARCHIVE_TABLES, archive_table
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Archive raw history into per-day column files.")
+    parser.add_argument("--dir", default=settings.ARCHIVE_DIR, help="Archive directory")
+    parser.add_argument("--tables", nargs="+", choices=[t.value for t in ARCHIVE_TABLES],
+                        default=[t.value for t in ARCHIVE_TABLES], help="Tables to archive, defaults to all")
+    parser.add_argument("--chunk-size", type=int, default=settings.ARCHIVE_CHUNK_SIZE, help="Rows read per query")
+    args = parser.parse_args(argv)
+
+    print(f"🔄 Archiving into {args.dir}...")
+    db = SessionLocal()
+    try:
+        for table in args.tables:
+            started = time.perf_counter()
+            result = archive_table(db, args.dir, table, args.chunk_size)
+            print(f"✅ {table}: archived {result['archived']} rows in {result['parts']} parts "
+                  f"(through id {result['high_water_mark']}) in {time.perf_counter() - started:.2f}s")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""
+Roll up and delete raw behavior signals older than the retention horizon.
+
+Keeps behavior_signals (and its indexes) down to the recent window the app reads;
+older days survive as per-user, per-day, per-type rows in behavior_signal_daily.
+Safe to run repeatedly, e.g. nightly from cron.
+
+Usage (from the repository root):
+    python -m backend.jobs.compact_signals
+    python -m backend.jobs.compact_signals --days 30 --chunk-size 10000
+"""
+import argparse
+import sys
+import time
+
+from ..config import settings
+from ..database import SessionLocal
+from ..logic.retention import compact_signals, retention_cutoff
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compact raw behavior signals into daily rollups.")
+    parser.add_argument("--days", type=int, default=settings.SIGNAL_RETENTION_DAYS, help="Days of raw signals to keep")
+    parser.add_argument("--chunk-size", type=int, default=settings.SIGNAL_RETENTION_CHUNK_SIZE, help="Raw rows per transaction")
+    args = parser.parse_args(argv)
+
+    try:
+        cutoff = retention_cutoff(args.days)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"🔄 Compacting signals before {cutoff:%Y-%m-%d}...")
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        result = compact_signals(db, args.days, args.chunk_size)
+    finally:
+        db.close()
+    print(f"✅ Compacted {result['compacted']} signals in {result['chunks']} chunks "
+          f"in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
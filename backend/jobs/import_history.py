@@ -0,0 +1,99 @@
+"""
+Bulk-load historical daily responses and behavior signals from a file.
+
+Reads NDJSON or CSV in the export format (see logic/bulk_import.py) a chunk at a
+time, optionally gzipped, updating aggregates with each chunk, then backfills daily
+snapshots for the imported users. Records name their user in a `username` field; --user is used for
+records without one. Users must already exist.
+
+Usage (from the repository root):
+    python -m backend.jobs.import_history alice-history.ndjson --user alice
+    python -m backend.jobs.import_history team-export.csv.gz --chunk-size 20000
+"""
+import argparse
+import gzip
+import itertools
+import sys
+from typing import Dict, Optional
+
+from sqlalchemy import select
+
+from ..config import settings
+from ..database import SessionLocal, engine
+from ..logic.bulk_import import BulkImporter, ImportReport
+from ..models import ExportFormat
+from .. import db_models
+
+
+def _detect_format(path: str) -> Optional[ExportFormat]:
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(".csv"):
+        return ExportFormat.CSV
+    if name.endswith((".ndjson", ".jsonl")):
+        return ExportFormat.NDJSON
+    return None
+
+
+class UserResolver:
+    """Maps usernames to ids, looking each one up once."""
+
+    def __init__(self, default: Optional[str]):
+        self.default = default
+        self._ids: Dict[str, Optional[int]] = {}
+
+    def __call__(self, username: Optional[str]) -> int:
+        username = username or self.default
+        if not username:
+            raise ValueError("username: required (or pass --user)")
+        if username not in self._ids:
+            db = SessionLocal()
+            try:
+                self._ids[username] = db.scalar(select(db_models.User.id).where(db_models.User.username == username))
+            finally:
+                db.close()
+        if self._ids[username] is None:
+            raise ValueError(f"username: unknown user {username!r}")
+        return self._ids[username]
+
+
+def _progress(report: ImportReport):
+    imported = sum(report.imported.values())
+    print(f"  chunk {report.chunks}: {imported} imported, {report.rejected} rejected, {report.skipped} skipped")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Import historical responses and signals.")
+    parser.add_argument("path", help="NDJSON or CSV file, optionally .gz")
+    parser.add_argument("--format", choices=[f.value for f in ExportFormat], help="Defaults to the file extension")
+    parser.add_argument("--user", help="Username for records without a username field")
+    parser.add_argument("--chunk-size", type=int, default=settings.IMPORT_CHUNK_SIZE, help="Lines per transaction")
+    args = parser.parse_args(argv)
+
+    format = ExportFormat(args.format) if args.format else _detect_format(args.path)
+    if format is None:
+        print("❌ Can't tell the format from the file name, pass --format")
+        return 1
+
+    print(f"🚀 Importing {args.path} ({format.value})...")
+    importer = BulkImporter(engine, format, UserResolver(args.user), on_chunk=_progress)
+    opener = gzip.open if args.path.endswith(".gz") else open
+    # Undecodable lines are rejected by the parser instead of aborting the import
+    with opener(args.path, "rt", encoding="utf-8", errors="surrogateescape", newline="") as f:
+        while True:
+            lines = list(itertools.islice(f, args.chunk_size))
+            if not lines:
+                break
+            importer.feed_lines(lines)
+
+    print("🔄 Backfilling snapshots...")
+    report = importer.finish().as_dict()
+    for rejection in report["rejections"]:
+        print(f"  line {rejection['line']}: {rejection['error']}")
+    print(f"{'✅' if not report['rejected'] else '❌'} Imported {report['imported']} for {report['users']} users, "
+          f"{report['rejected']} rejected, {report['skipped']} skipped, {report['snapshots']} snapshots "
+          f"in {report['seconds']:.2f}s")
+    return 0 if not report["rejected"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Nightly population-wide risk recomputation.
+
+Writes today's risk_analyses snapshot for every user with data in the 7-day window,
+including users who never open the dashboard. Instead of calling calculate_risk per
+user, the window totals for everyone come from one GROUP BY over user_daily_stats,
+ScoringEngine.score_many scores them as NumPy arrays, and snapshots are bulk-upserted.
+Results are identical to calculate_risk; unchanged snapshots are left untouched.
+
+Usage (from the repository root):
+    python -m backend.jobs.nightly_risk
+
+Or from code:
+    from backend.jobs.nightly_risk import score_all_users
+    score_all_users(SessionLocal())
+
+backfill_snapshots scores past days the same way, for historical imports.
+"""
+import json
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..database import SessionLocal, upsert_insert
+from ..logic.aggregates import COUNTER_COLUMNS, risk_score_upsert
+from ..logic.scoring import scoring_engine
+from .. import db_models
+
+UPSERT_CHUNK_SIZE = 1000
+
+
+def load_window_totals(db: Session, cutoff_day: str) -> Dict[str, np.ndarray]:
+    """Per-user sums of user_daily_stats from cutoff_day onward, as parallel arrays."""
+    stats = db_models.UserDailyStats
+    rows = db.execute(
+        select(
+            stats.user_id,
+            func.sum(stats.answer_risk_sum),
+            func.sum(stats.answer_count),
+            func.sum(stats.signal_count),
+            func.sum(stats.late_night_count),
+            func.sum(stats.slow_response_count),
+        )
+        .where(stats.date >= cutoff_day)
+        .group_by(stats.user_id)
+    ).all()
+    columns = np.array(rows, dtype=np.int64).reshape(-1, 6)
+    return {
+        "user_id": columns[:, 0],
+        "answer_risk_sum": columns[:, 1],
+        "answer_count": columns[:, 2],
+        "signal_count": columns[:, 3],
+        "late_night_count": columns[:, 4],
+        "slow_response_count": columns[:, 5],
+    }
+
+
+def _upsert_snapshots(db: Session, rows: list):
+    table = db_models.RiskAnalysis
+    stats = db_models.UserDailyStats
+    dialect_insert = upsert_insert(db)
+    if dialect_insert is None:
+        for row in rows:
+            current = db.query(table).filter(table.user_id == row["user_id"], table.date == row["date"]).first()
+            if current is None:
+                db.add(table(**row))
+            else:
+                for column, value in row.items():
+                    setattr(current, column, value)
+            day = db.query(stats).filter(stats.user_id == row["user_id"], stats.date == row["date"]).first()
+            if day is None:
+                db.add(stats(user_id=row["user_id"], date=row["date"], risk_score=row["risk_score"], **{
+                    column: 0 for column in COUNTER_COLUMNS
+                }))
+            else:
+                day.risk_score = row["risk_score"]
+        return
+
+    for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+        stmt = dialect_insert(table).values(rows[start:start + UPSERT_CHUNK_SIZE])
+        changed = (
+            (table.risk_score != stmt.excluded.risk_score)
+            | (table.risk_level != stmt.excluded.risk_level)
+            | (table.insights != stmt.excluded.insights)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.user_id, table.date],
+            set_={column: stmt.excluded[column] for column in ("risk_level", "risk_score", "insights", "timestamp")},
+            where=changed,
+        )
+        db.execute(stmt)
+        # Calendar rows carry the same score
+        db.execute(risk_score_upsert(dialect_insert, rows[start:start + UPSERT_CHUNK_SIZE]))
+
+
+def _snapshot_rows(user_ids: np.ndarray, days: Sequence[str], scores: Dict[str, np.ndarray]) -> list:
+    """risk_analyses rows for the scored (user, day) pairs that had data."""
+    written_at = datetime.utcnow()
+    rows = []
+    for index in np.flatnonzero(scores["has_data"]):
+        level, insights = scoring_engine.describe(scores["level"][index], scores["late_night_insight"][index])
+        rows.append({
+            "user_id": int(user_ids[index]),
+            "date": days[index],
+            "risk_level": level,
+            # Python's round, like score_one, so ties resolve identically
+            "risk_score": round(float(scores["total_score"][index]), 1),
+            "insights": json.dumps(insights),
+            "timestamp": written_at,
+        })
+    return rows
+
+
+def score_all_users(db: Session, now: Optional[datetime] = None) -> int:
+    """
+    Recompute and upsert today's snapshot for every user with data. Returns users scored.
+    `now` is naive UTC; like calculate_risk and backfill_snapshots, days are UTC days.
+    """
+    today = (now or datetime.utcnow()).date()
+    snapshot_day = today.isoformat()
+    cutoff_day = (today - timedelta(days=6)).isoformat()
+
+    totals = load_window_totals(db, cutoff_day)
+    scores = scoring_engine.score_many(totals)
+    rows = _snapshot_rows(totals["user_id"], [snapshot_day] * len(totals["user_id"]), scores)
+
+    if rows:
+        _upsert_snapshots(db, rows)
+    db.commit()
+    return len(rows)
+
+
+def backfill_snapshots(db: Session, user_days: Dict[int, Tuple[date, date]]) -> int:
+    """
+    Score every day in each user's (first, last) range from the 7-day window of
+    user_daily_stats ending that day, and upsert those days' snapshots. Used after
+    historical imports; days with an empty window are skipped. Returns snapshots written.
+    """
+    stats = db_models.UserDailyStats
+    user_ids, days, windows = [], [], []
+    for user_id, (first, last) in user_days.items():
+        start = first - timedelta(days=6)
+        span = (last - start).days + 1
+        daily = np.zeros((span, len(COUNTER_COLUMNS)), dtype=np.int64)
+        for row in db.execute(
+            select(stats.date, *(getattr(stats, column) for column in COUNTER_COLUMNS))
+            .where(stats.user_id == user_id, stats.date >= start.isoformat(), stats.date <= last.isoformat())
+        ):
+            daily[(date.fromisoformat(row[0]) - start).days] = row[1:]
+
+        # Window sums for each day from first to last via a running total
+        running = np.vstack([np.zeros((1, len(COUNTER_COLUMNS)), dtype=np.int64), np.cumsum(daily, axis=0)])
+        windows.append(running[7:] - running[:-7])
+        user_ids.append(np.full(span - 6, user_id, dtype=np.int64))
+        days.extend((first + timedelta(days=offset)).isoformat() for offset in range(span - 6))
+
+    if not days:
+        return 0
+    window_totals = np.concatenate(windows)
+    scores = scoring_engine.score_many({column: window_totals[:, i] for i, column in enumerate(COUNTER_COLUMNS)})
+    rows = _snapshot_rows(np.concatenate(user_ids), days, scores)
+
+    if rows:
+        _upsert_snapshots(db, rows)
+    db.commit()
+    return len(rows)
+
+
+def main(argv=None) -> int:
+    print("🌙 Scoring all users...")
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        scored = score_all_users(db)
+    finally:
+        db.close()
+    print(f"✅ Scored {scored} users in {time.perf_counter() - started:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+Rebuild the user_daily_stats aggregate table from raw history.
+
+Run after deploying the aggregate table for the first time, or whenever the
+aggregates are suspected to have drifted from daily_responses/behavior_signals.
+
+Usage (from the repository root):
+    python -m backend.jobs.rebuild_aggregates
+    python -m backend.jobs.rebuild_aggregates --username alice
+"""
+import argparse
+import sys
+import time
+
+from ..database import SessionLocal
+from ..logic.aggregates import rebuild
+from .. import db_models
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Recompute per-user daily aggregates from raw history.")
+    parser.add_argument("--username", help="Only rebuild this user's aggregates")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        user_id = None
+        if args.username:
+            user = db.query(db_models.User).filter(db_models.User.username == args.username).first()
+            if not user:
+                print(f"❌ User not found: {args.username}")
+                return 1
+            user_id = user.id
+
+        print("🔄 Rebuilding daily aggregates...")
+        started = time.perf_counter()
+        written = rebuild(db, user_id=user_id)
+        print(f"✅ Wrote {written} aggregate rows in {time.perf_counter() - started:.2f}s")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
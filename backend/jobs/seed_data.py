@@ -0,0 +1,220 @@
+"""
+Synthetic data generator for scale testing.
+
+Creates N users with M days of history ending today: daily answers to the rotating
+QUESTIONS_POOL questions and bursts of behavior signals of every BehaviorType. Each user
+gets a persona (baseline stress, drift, check-in discipline) that drives the answer
+distribution, how often they skip a day, how slow their answers are and how often they
+are up late, so risk scores spread over Low/Medium/High like real data.
+
+Rows are generated from a fixed seed (same arguments -> same dataset) and written with
+executemany bulk inserts in batches, then user_daily_stats is rebuilt from them.
+
+Usage (from the repository root):
+    python -m backend.jobs.seed_data --users 1000 --days 90
+    python -m backend.jobs.seed_data --users 20000 --days 365 --seed 7 --score
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Engine
+
+from ..database import SessionLocal, engine as default_engine
+from ..logic.aggregates import NEGATIVE_QUESTIONS, rebuild
+from ..logic.rotation import QUESTIONS_POOL, QUESTIONS_PER_DAY
+from ..models import BehaviorType
+from .. import db_models
+
+DEFAULT_PASSWORD = "seed-password"
+BATCH_SIZE = 20000
+
+Rows = Tuple[List[dict], List[dict]]
+
+
+def make_persona(rng: random.Random) -> Dict[str, float]:
+    return {
+        "stress": rng.betavariate(2, 4),          # Baseline, 0 (calm) to 1 (burnt out)
+        "drift": rng.gauss(0, 0.25),              # Change over the whole period
+        "weekly": rng.uniform(0, 0.15),           # Weekday/weekend swing
+        "discipline": rng.uniform(0.55, 0.95),    # Chance of checking in on a calm day
+        "sessions": rng.uniform(2, 6),            # App sessions on a calm day
+    }
+
+
+def _stress_on(persona: Dict[str, float], rng: random.Random, index: int, days: int, day: date) -> float:
+    progress = index / max(days - 1, 1)
+    weekly = persona["weekly"] * (1 if day.weekday() < 5 else -1)
+    value = persona["stress"] + persona["drift"] * progress + weekly + rng.gauss(0, 0.08)
+    return min(max(value, 0.0), 1.0)
+
+
+def _daily_questions(day: date) -> List[str]:
+    # Same rotation as logic.rotation.get_daily_questions
+    ordinal = day.toordinal()
+    return [QUESTIONS_POOL[(ordinal + 4 * i) % len(QUESTIONS_POOL)].id for i in range(QUESTIONS_PER_DAY)]
+
+
+def _at(day: date, hours: float) -> datetime:
+    return datetime.combine(day, dt_time()) + timedelta(seconds=int(hours * 3600))
+
+
+def generate_user_history(rng: random.Random, user_id: int, days: int, end: date) -> Rows:
+    """(daily_responses rows, behavior_signals rows) for one user over the `days` days ending `end`."""
+    persona = make_persona(rng)
+    responses, signals = [], []
+
+    for index in range(days):
+        day = end - timedelta(days=days - 1 - index)
+        stress = _stress_on(persona, rng, index, days, day)
+
+        # Daytime sessions: each a burst of app_open events seconds apart
+        for _ in range(max(0, round(rng.gauss(persona["sessions"] + 4 * stress, 1.5)))):
+            ts = _at(day, min(max(rng.gauss(14, 4), 6), 23.5))
+            for _ in range(1 + int(rng.expovariate(0.6))):
+                signals.append({"user_id": user_id, "type": BehaviorType.APP_OPEN.value, "value": 1.0, "timestamp": ts})
+                ts += timedelta(seconds=rng.randint(5, 180))
+
+        # Late-night usage gets much more likely as stress rises
+        if rng.random() < 0.02 + 0.4 * stress ** 2:
+            ts = _at(day, rng.uniform(0, 5))
+            for _ in range(1 + int(rng.expovariate(1.0))):
+                signals.append({"user_id": user_id, "type": BehaviorType.LATE_NIGHT_USAGE.value, "value": 1.0, "timestamp": ts})
+                ts += timedelta(minutes=rng.randint(5, 40))
+
+        if rng.random() > persona["discipline"] * (1 - 0.3 * stress):
+            signals.append({
+                "user_id": user_id, "type": BehaviorType.MISSED_CHECKIN.value, "value": 1.0,
+                "timestamp": _at(day, 23.9),
+            })
+            continue
+
+        # Check-in: latent risk 1-5 plus noise, mapped back through each question's polarity
+        ts = _at(day, min(max(rng.gauss(20, 2.5), 6), 23.5))
+        for question_id in _daily_questions(day):
+            risk = min(max(round(rng.gauss(1 + 4 * stress, 0.7)), 1), 5)
+            responses.append({
+                "user_id": user_id, "date": day.strftime("%Y-%m-%d"), "question_id": question_id,
+                "answer_value": risk if question_id in NEGATIVE_QUESTIONS else 6 - risk, "timestamp": ts,
+            })
+            delay = rng.lognormvariate(math.log(2 + 8 * stress), 0.5)
+            signals.append({
+                "user_id": user_id, "type": BehaviorType.RESPONSE_DELAY.value, "value": round(delay, 2), "timestamp": ts,
+            })
+            ts += timedelta(seconds=int(delay) + 1)
+
+    return responses, signals
+
+
+def _create_users(engine: Engine, prefix: str, count: int, hashed_password: str) -> List[int]:
+    users = db_models.User.__table__
+    now = datetime.utcnow()
+    with engine.begin() as connection:
+        for start in range(0, count, BATCH_SIZE):
+            connection.execute(insert(users), [
+                {"username": f"{prefix}{i:07d}", "hashed_password": hashed_password, "created_at": now}
+                for i in range(start, min(start + BATCH_SIZE, count))
+            ])
+        return list(connection.scalars(
+            select(users.c.id).where(users.c.username.like(f"{prefix}%")).order_by(users.c.id)
+        ))
+
+
+def seed(
+    users: int,
+    days: int,
+    seed: int = 42,
+    prefix: str = "seed_user_",
+    password: str = DEFAULT_PASSWORD,
+    end: Optional[date] = None,
+    engine: Optional[Engine] = None,
+) -> Dict[str, int]:
+    """Generate and bulk-insert the dataset, then rebuild aggregates. Returns row counts."""
+    from ..routers.auth import pwd_context
+
+    engine = engine or default_engine
+    end = end or datetime.utcnow().date()
+    rng = random.Random(seed)
+    with engine.connect() as connection:
+        taken = connection.scalar(
+            select(db_models.User.id).where(db_models.User.username.like(f"{prefix}%")).limit(1)
+        )
+    if taken is not None:
+        raise ValueError(f"Users with prefix {prefix!r} already exist")
+
+    # One hash shared by every seeded user: hashing per user would dominate the run
+    user_ids = _create_users(engine, prefix, users, pwd_context.hash(password))
+
+    counts = {"users": len(user_ids), "daily_responses": 0, "behavior_signals": 0}
+    responses_table = db_models.DailyResponse.__table__
+    signals_table = db_models.BehaviorSignal.__table__
+    pending_responses, pending_signals = [], []
+
+    def flush(connection):
+        if pending_responses:
+            connection.execute(insert(responses_table), pending_responses)
+        if pending_signals:
+            connection.execute(insert(signals_table), pending_signals)
+        connection.commit()
+        counts["daily_responses"] += len(pending_responses)
+        counts["behavior_signals"] += len(pending_signals)
+        pending_responses.clear()
+        pending_signals.clear()
+
+    with engine.connect() as connection:
+        for user_id in user_ids:
+            responses, signals = generate_user_history(rng, user_id, days, end)
+            pending_responses.extend(responses)
+            pending_signals.extend(signals)
+            if len(pending_responses) + len(pending_signals) >= BATCH_SIZE:
+                flush(connection)
+        flush(connection)
+
+    db = SessionLocal(bind=engine)
+    try:
+        counts["user_daily_stats"] = rebuild(db)
+    finally:
+        db.close()
+    return counts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate synthetic users and history for scale testing.")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42, help="Random seed; the same arguments produce the same data")
+    parser.add_argument("--prefix", default="seed_user_", help="Username prefix for the generated users")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Password shared by all generated users")
+    parser.add_argument("--score", action="store_true", help="Also write today's risk snapshots (nightly job)")
+    args = parser.parse_args(argv)
+
+    print(f"🚀 Seeding {args.users} users x {args.days} days (seed {args.seed})...")
+    started = time.perf_counter()
+    try:
+        counts = seed(args.users, args.days, seed=args.seed, prefix=args.prefix, password=args.password)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    elapsed = time.perf_counter() - started
+    rows = counts["daily_responses"] + counts["behavior_signals"]
+    print(f"✅ {counts['users']} users, {counts['daily_responses']} responses, {counts['behavior_signals']} signals, "
+          f"{counts['user_daily_stats']} aggregate rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+
+    if args.score:
+        from .nightly_risk import score_all_users
+
+        db = SessionLocal()
+        try:
+            print(f"✅ Scored {score_all_users(db)} users")
+        finally:
+            db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
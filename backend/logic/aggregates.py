@@ -0,0 +1,288 @@
+"""
+Incremental per-user daily aggregates (the user_daily_stats table).
+
+Every write path (daily responses, single/batch/buffered signals) turns its new rows
+into per-(user, day) deltas and upserts them in the same transaction as the raw rows.
+`rebuild` recomputes the table from raw history when it has drifted or was just added.
+
+The request-path helpers take an AsyncSession; `rebuild` is a batch job and stays sync.
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..database import upsert_insert
+from ..models import BehaviorType
+from .. import db_models
+from .scoring import scoring_engine
+
+# Question IDs where a HIGH answer means HIGH risk, from QUESTIONS_POOL polarity.
+# Every other question is positively phrased, so its risk contribution is (6 - answer).
+NEGATIVE_QUESTIONS = scoring_engine.negative_questions
+
+# response_delay signals slower than this count as hesitation
+SLOW_RESPONSE_SECONDS = 10.0
+
+COUNTER_COLUMNS = (
+    "answer_risk_sum",
+    "answer_count",
+    "signal_count",
+    "late_night_count",
+    "slow_response_count",
+)
+
+StatsKey = Tuple[int, str]
+
+
+def stats_day(ts: datetime) -> str:
+    return ts.strftime("%Y-%m-%d")
+
+
+def answer_risk(question_id: str, answer_value: int) -> int:
+    """Normalize a 1-5 answer so that 5 always means highest risk."""
+    return scoring_engine.answer_risk(question_id, answer_value)
+
+
+def answer_risk_expression(responses=db_models.DailyResponse):
+    """answer_risk as a SQL expression over daily_responses columns."""
+    return case(
+        (responses.question_id.in_(NEGATIVE_QUESTIONS), responses.answer_value),
+        else_=6 - responses.answer_value,
+    )
+
+
+def _empty() -> Dict[str, int]:
+    return {column: 0 for column in COUNTER_COLUMNS}
+
+
+def response_deltas(rows: Iterable[dict]) -> Dict[StatsKey, Dict[str, int]]:
+    """Rows need user_id, question_id, answer_value and timestamp."""
+    deltas = defaultdict(_empty)
+    for row in rows:
+        delta = deltas[(row["user_id"], stats_day(row["timestamp"]))]
+        delta["answer_risk_sum"] += answer_risk(row["question_id"], row["answer_value"])
+        delta["answer_count"] += 1
+    return deltas
+
+
+def signal_deltas(rows: Iterable[dict]) -> Dict[StatsKey, Dict[str, int]]:
+    """Rows need user_id, type, value and timestamp."""
+    deltas = defaultdict(_empty)
+    for row in rows:
+        delta = deltas[(row["user_id"], stats_day(row["timestamp"]))]
+        delta["signal_count"] += 1
+        if row["type"] == BehaviorType.LATE_NIGHT_USAGE.value:
+            delta["late_night_count"] += 1
+        elif row["type"] == BehaviorType.RESPONSE_DELAY.value and row["value"] > SLOW_RESPONSE_SECONDS:
+            delta["slow_response_count"] += 1
+    return deltas
+
+
+def _delta_values(deltas: Dict[StatsKey, Dict[str, int]]) -> List[dict]:
+    now = datetime.utcnow()
+    return [{"user_id": user_id, "date": day, "updated_at": now, **delta} for (user_id, day), delta in deltas.items()]
+
+
+def deltas_upsert(dialect_insert, values: List[dict]):
+    """INSERT ... ON CONFLICT DO UPDATE adding the counters in `values` onto the stored totals."""
+    table = db_models.UserDailyStats
+    stmt = dialect_insert(table).values(values)
+    return stmt.on_conflict_do_update(
+        index_elements=[table.user_id, table.date],
+        set_={
+            **{column: getattr(table, column) + getattr(stmt.excluded, column) for column in COUNTER_COLUMNS},
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+
+
+def _add_onto(row: db_models.UserDailyStats, value: dict):
+    for column in COUNTER_COLUMNS:
+        setattr(row, column, getattr(row, column) + value[column])
+    row.updated_at = value["updated_at"]
+
+
+async def apply_deltas(db: AsyncSession, deltas: Dict[StatsKey, Dict[str, int]]):
+    """
+    Add deltas onto the stored totals with INSERT ... ON CONFLICT DO UPDATE.
+    Does not commit; callers commit together with the raw rows.
+    """
+    if not deltas:
+        return
+    values = _delta_values(deltas)
+    dialect_insert = upsert_insert(db)
+    if dialect_insert is not None:
+        await db.execute(deltas_upsert(dialect_insert, values))
+        return
+
+    # Portable fallback for other dialects
+    table = db_models.UserDailyStats
+    for value in values:
+        row = await db.scalar(select(table).where(table.user_id == value["user_id"], table.date == value["date"]))
+        if row is None:
+            db.add(table(**value))
+        else:
+            _add_onto(row, value)
+    await db.flush()
+
+
+def apply_deltas_sync(db: Session, deltas: Dict[StatsKey, Dict[str, int]]):
+    """apply_deltas for batch jobs on a sync session (bulk import). Does not commit."""
+    if not deltas:
+        return
+    values = _delta_values(deltas)
+    dialect_insert = upsert_insert(db)
+    if dialect_insert is not None:
+        db.execute(deltas_upsert(dialect_insert, values))
+        return
+
+    table = db_models.UserDailyStats
+    for value in values:
+        row = db.scalar(select(table).where(table.user_id == value["user_id"], table.date == value["date"]))
+        if row is None:
+            db.add(table(**value))
+        else:
+            _add_onto(row, value)
+    db.flush()
+
+
+def risk_score_upsert(dialect_insert, values: List[dict]):
+    """
+    INSERT ... ON CONFLICT statement copying snapshot scores onto user_daily_stats.
+    `values` need user_id, date and risk_score; days without activity get an empty row.
+    """
+    table = db_models.UserDailyStats
+    now = datetime.utcnow()
+    stmt = dialect_insert(table).values([
+        {**_empty(), "user_id": v["user_id"], "date": v["date"], "risk_score": v["risk_score"], "updated_at": now}
+        for v in values
+    ])
+    return stmt.on_conflict_do_update(
+        index_elements=[table.user_id, table.date],
+        set_={"risk_score": stmt.excluded.risk_score},
+    )
+
+
+async def record_risk_score(db: AsyncSession, user_id: int, day: str, risk_score: float):
+    """Keep the calendar row for `day` (a UTC day) in step with its risk_analyses snapshot. Does not commit."""
+    dialect_insert = upsert_insert(db)
+    if dialect_insert is not None:
+        await db.execute(risk_score_upsert(dialect_insert, [{"user_id": user_id, "date": day, "risk_score": risk_score}]))
+        return
+
+    table = db_models.UserDailyStats
+    row = await db.scalar(select(table).where(table.user_id == user_id, table.date == day))
+    if row is None:
+        db.add(table(user_id=user_id, date=day, risk_score=risk_score, **_empty()))
+    else:
+        row.risk_score = risk_score
+    await db.flush()
+
+
+async def load_calendar(db: AsyncSession, user_id: int, year: int) -> List[tuple]:
+    """(date, answer_count, late_night_count, risk_score) for each of the user's stored days in `year`."""
+    table = db_models.UserDailyStats
+    rows = await db.execute(
+        select(table.date, table.answer_count, table.late_night_count, table.risk_score)
+        .where(table.user_id == user_id, table.date >= f"{year:04d}-01-01", table.date <= f"{year:04d}-12-31")
+        .order_by(table.date)
+    )
+    return rows.all()
+
+
+async def record_responses(db: AsyncSession, rows: Iterable[dict]):
+    await apply_deltas(db, response_deltas(rows))
+
+
+async def record_signals(db: AsyncSession, rows: Iterable[dict]):
+    await apply_deltas(db, signal_deltas(rows))
+
+
+async def load_window(db: AsyncSession, user_id: int, since: date) -> List[db_models.UserDailyStats]:
+    """The stats rows for one user from `since` (inclusive) onward."""
+    result = await db.scalars(select(db_models.UserDailyStats).where(
+        db_models.UserDailyStats.user_id == user_id,
+        db_models.UserDailyStats.date >= since.strftime("%Y-%m-%d")
+    ))
+    return result.all()
+
+
+def rebuild(db: Session, user_id: Optional[int] = None) -> int:
+    """
+    Recompute user_daily_stats from raw daily_responses and behavior_signals (plus
+    behavior_signal_daily rollups and risk scores from risk_analyses), for one user or
+    everyone. Runs in a single transaction.
+    Returns rows written.
+    """
+    responses = db_models.DailyResponse
+    signals = db_models.BehaviorSignal
+    totals = defaultdict(_empty)
+
+    risk = answer_risk_expression(responses)
+    response_day = func.date(responses.timestamp)
+    response_query = select(
+        responses.user_id, response_day, func.sum(risk), func.count()
+    ).group_by(responses.user_id, response_day)
+
+    signal_day = func.date(signals.timestamp)
+    late_night = case((signals.type == BehaviorType.LATE_NIGHT_USAGE.value, 1), else_=0)
+    slow = case(
+        ((signals.type == BehaviorType.RESPONSE_DELAY.value) & (signals.value > SLOW_RESPONSE_SECONDS), 1),
+        else_=0,
+    )
+    signal_query = select(
+        signals.user_id, signal_day, func.count(), func.sum(late_night), func.sum(slow)
+    ).group_by(signals.user_id, signal_day)
+
+    # Signals past the retention horizon only survive as daily rollups
+    rollups = db_models.BehaviorSignalDaily
+    rollup_query = select(
+        rollups.user_id, rollups.date, func.sum(rollups.count),
+        func.sum(case((rollups.type == BehaviorType.LATE_NIGHT_USAGE.value, rollups.count), else_=0)),
+        func.sum(rollups.slow_count),
+    ).group_by(rollups.user_id, rollups.date)
+
+    if user_id is not None:
+        response_query = response_query.where(responses.user_id == user_id)
+        signal_query = signal_query.where(signals.user_id == user_id)
+        rollup_query = rollup_query.where(rollups.user_id == user_id)
+
+    # func.date() is a string on SQLite and a date on Postgres; str() gives YYYY-MM-DD for both
+    for uid, day, risk_sum, count in db.execute(response_query):
+        total = totals[(uid, str(day))]
+        total["answer_risk_sum"] = int(risk_sum or 0)
+        total["answer_count"] = count
+    for query in (signal_query, rollup_query):
+        for uid, day, count, late_count, slow_count in db.execute(query):
+            total = totals[(uid, str(day))]
+            total["signal_count"] += int(count or 0)
+            total["late_night_count"] += int(late_count or 0)
+            total["slow_response_count"] += int(slow_count or 0)
+
+    # Snapshot scores live on the same rows, so carry them over
+    snapshots = db_models.RiskAnalysis
+    snapshot_query = select(snapshots.user_id, snapshots.date, snapshots.risk_score)
+    if user_id is not None:
+        snapshot_query = snapshot_query.where(snapshots.user_id == user_id)
+    risk_scores = {(uid, day): score for uid, day, score in db.execute(snapshot_query)}
+    for key in risk_scores:
+        totals[key]  # Days with only a snapshot still get a row
+
+    clear = delete(db_models.UserDailyStats)
+    if user_id is not None:
+        clear = clear.where(db_models.UserDailyStats.user_id == user_id)
+    db.execute(clear)
+
+    now = datetime.utcnow()
+    rows = [
+        {"user_id": uid, "date": day, "updated_at": now, "risk_score": risk_scores.get((uid, day)), **total}
+        for (uid, day), total in totals.items()
+    ]
+    if rows:
+        db.execute(insert(db_models.UserDailyStats), rows)
+    db.commit()
+    return len(rows)
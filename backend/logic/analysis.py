@@ -1,136 +1,179 @@
-from typing import List
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from ..models import RiskLevel, BehaviorType
+import asyncio
+import json
+from typing import Callable, Dict, List, Optional, Tuple
+from datetime import datetime, time, timedelta, timezone
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..cache import LRUCache
+from ..config import settings
+from ..database import upsert_insert
+from ..http_cache import Representation, strong_etag
+from ..metrics import timed
+from ..models import RiskLevel, UserPrincipal
+from ..pubsub import risk_updates
 from .. import db_models
+from .aggregates import COUNTER_COLUMNS, load_window, record_risk_score
+from .scoring import INSIGHT_NO_DATA, scoring_engine
 
-def calculate_risk(username: str, db: Session) -> dict:
+# calculate_risk results keyed by user id, rendered once with their ETag (a
+# Representation). Writes for a user invalidate their entry (see invalidate_risk);
+# entries also expire when the 7-day window rolls over.
+dashboard_cache = LRUCache(
+    max_size=settings.DASHBOARD_CACHE_SIZE,
+    ttl_seconds=settings.DASHBOARD_CACHE_TTL_SECONDS
+)
+
+def next_midnight() -> float:
+    """Epoch seconds of the next UTC day change, when the snapshot date and the 7-day window roll over."""
+    return datetime.combine(datetime.utcnow().date() + timedelta(days=1), time(), tzinfo=timezone.utc).timestamp()
+
+# Part of every risk ETag, so changed scoring rules don't revalidate old results
+_RULES_KEY = repr(sorted(vars(scoring_engine.rules).items()))
+
+# user id -> [lock, holders]: concurrent misses for one user (say, several dashboard
+# streams woken by the same write) wait for the first calculation instead of repeating it
+_calculating: Dict[int, list] = {}
+
+async def window_totals(db: AsyncSession, user_id: int) -> Tuple[str, Dict[str, float]]:
     """
-    Core Rule: Burnout = Indirect Inputs + Behavior + Trends
+    Today's UTC day and the user's user_daily_stats totals over the 7 days ending on it
+    (today included): everything calculate_risk scores.
     """
-    today = datetime.now()
-    cutoff_date = today - timedelta(days=7) # Look at last 7 days
-    
-    # Get user from database
-    user = db.query(db_models.User).filter(db_models.User.username == username).first()
-    
-    if not user:
-        return {
-            "username": username,
-            "date": today.strftime("%Y-%m-%d"),
-            "risk_level": RiskLevel.LOW.value,
-            "risk_score": 0.0,
-            "insights": ["User not found"]
-        }
-    
-    # Get recent responses
-    responses = db.query(db_models.DailyResponse).filter(
-        db_models.DailyResponse.user_id == user.id,
-        db_models.DailyResponse.timestamp >= cutoff_date
-    ).all()
-    
-    # Get recent signals
-    signals = db.query(db_models.BehaviorSignal).filter(
-        db_models.BehaviorSignal.user_id == user.id,
-        db_models.BehaviorSignal.timestamp >= cutoff_date
-    ).all()
+    today = datetime.utcnow().date()
+    # At most 7 rows, one per day
+    daily_stats = await load_window(db, user_id, today - timedelta(days=6))
+    return today.isoformat(), {column: sum(getattr(d, column) for d in daily_stats) for column in COUNTER_COLUMNS}
+
+def risk_etag(user_id: int, window: Tuple[str, Dict[str, float]]) -> str:
+    """
+    ETag of the analysis scored from `window` (see window_totals). It depends only on
+    persisted data, so any worker can answer a conditional GET by reading the window
+    again, without scoring or writing a snapshot.
+    """
+    day, totals = window
+    key = ":".join(str(part) for part in (user_id, day, _RULES_KEY, *(totals[column] for column in COUNTER_COLUMNS)))
+    return strong_etag(key.encode())
+
+async def revalidate_risk(
+    user: UserPrincipal, db: AsyncSession, etag_matches: Optional[Callable[[str], bool]] = None
+) -> Tuple[str, Optional[Representation]]:
+    """
+    calculate_risk behind the dashboard cache, as (ETag, rendered JSON). For conditional
+    GETs, the representation is None when `etag_matches` accepts the current ETag; on a
+    cache miss that is decided from the window totals alone, before any scoring.
+    """
+    cached = dashboard_cache.get(user.id)
+    if cached is not None:
+        return cached.etag, None if etag_matches is not None and etag_matches(cached.etag) else cached
+
+    slot = _calculating.setdefault(user.id, [asyncio.Lock(), 0])
+    slot[1] += 1
+    try:
+        async with slot[0]:
+            cached = dashboard_cache.get(user.id)
+            if cached is not None:
+                return cached.etag, None if etag_matches is not None and etag_matches(cached.etag) else cached
+            # Taken before the window is read, so a write landing after that keeps this
+            # result out of the cache
+            version = dashboard_cache.version(user.id)
+            window = await window_totals(db, user.id)
+            etag = risk_etag(user.id, window)
+            if etag_matches is not None and etag_matches(etag):
+                return etag, None
+            with timed("calculate_risk"):
+                representation = Representation(await calculate_risk(user.id, user.username, db, window), etag=etag)
+            dashboard_cache.set(user.id, representation, version=version, expires_at=next_midnight())
+            return etag, representation
+    finally:
+        slot[1] -= 1
+        if not slot[1]:
+            del _calculating[user.id]
+
+async def get_risk_representation(user: UserPrincipal, db: AsyncSession) -> Representation:
+    """calculate_risk behind the dashboard cache, as rendered JSON plus its ETag."""
+    return (await revalidate_risk(user, db))[1]
+
+def invalidate_risk(user_id: int):
+    """Call after committing new responses/signals for a user. Wakes their open dashboard streams."""
+    dashboard_cache.invalidate(user_id)
+    risk_updates.publish(user_id)
+
+def invalidate_remote_risk(user_id: int):
+    """The broker delivered a change, possibly written by another worker: drop it here without publishing again."""
+    dashboard_cache.invalidate(user_id)
+
+risk_updates.on_change = invalidate_remote_risk
+risk_updates.on_resync = dashboard_cache.clear
+
+async def save_snapshot(db: AsyncSession, user_id: int, date: str, risk_level: str, risk_score: float, insights: List[str]) -> bool:
+    """
+    Upsert the user's risk_analyses row for `date`, one row per user per day, and copy
+    the score onto that day's user_daily_stats row for the calendar.
+    Reads the current snapshot first and skips the write entirely when nothing changed,
+    so repeated dashboard loads stay read-only. Returns True if a write happened.
+    """
+    table = db_models.RiskAnalysis
+    insights_json = json.dumps(insights)
+    current = await db.scalar(select(table).where(table.user_id == user_id, table.date == date))
+    if (
+        current is not None
+        and current.risk_score == risk_score
+        and current.risk_level == risk_level
+        and current.insights == insights_json
+    ):
+        return False
+
+    values = {
+        "user_id": user_id,
+        "date": date,
+        "risk_level": risk_level,
+        "risk_score": risk_score,
+        "insights": insights_json,
+        "timestamp": datetime.utcnow(),
+    }
+    dialect_insert = upsert_insert(db)
+    if dialect_insert is not None:
+        # ON CONFLICT keeps this safe against a concurrent request inserting the same day
+        stmt = dialect_insert(table).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.user_id, table.date],
+            set_={column: stmt.excluded[column] for column in ("risk_level", "risk_score", "insights", "timestamp")},
+        )
+        await db.execute(stmt)
+    elif current is None:
+        db.add(table(**values))
+    else:
+        for column, value in values.items():
+            setattr(current, column, value)
+    await record_risk_score(db, user_id, date, risk_score)
+    await db.commit()
+    return True
+
+async def calculate_risk(
+    user_id: int, username: str, db: AsyncSession, window: Optional[Tuple[str, Dict[str, float]]] = None
+) -> dict:
+    """
+    Score the user's last 7 days (see logic/scoring.py) and save today's snapshot.
+    Days are UTC days, the same keys user_daily_stats is maintained under.
+    `window` is a window_totals result already read by the caller.
+    """
+    day, totals = window or await window_totals(db, user_id)
     
-    if not responses and not signals:
+    result = scoring_engine.score_one(totals)
+    if result is None:
         return {
             "username": username,
-            "date": today.strftime("%Y-%m-%d"),
+            "date": day,
             "risk_level": RiskLevel.LOW.value,
             "risk_score": 0.0,
-            "insights": ["Not enough data yet. Keep using the app!"]
+            "insights": [INSIGHT_NO_DATA]
         }
-
-    # 1. Input Score (Higher answer = Better state usually, assuming 1=Bad, 5=Good. 
-    # BUT wait, some questions are negative: "Did screens feel exhausting?" 5=Very exhausting.
-    # We need to normalize. For MVP, let's assume specific mapping or just sum for now.)
-    # Let's simplify: Questions should be phrased so 5 is HEALTHY and 1 is BURNOUT RISK?
-    # Or we handle specific question IDs? 
-    # "Did you feel mentally tired?" -> Yes (Risk)
-    # Let's assume input is 1-5.
-    # We need a map of positive/negative questions.
-    
-    negative_questions = ["s2", "f2", "m1", "e1"] # IDs where HIGH score = HIGH RISK
-    positive_questions = ["s1", "f1", "m2", "e2"] # IDs where LOW score = HIGH RISK
-    
-    input_risk_sum = 0
-    input_count = 0
-    
-    for r in responses:
-        val = r.answer_value
-        if r.question_id in negative_questions:
-            # 5 = High Risk. Risk contribution = val
-            input_risk_sum += val
-        else:
-            # 5 = Healthy. Risk contribution = (6 - val) -> 1 becomes 5 (High Risk)
-            input_risk_sum += (6 - val)
-        input_count += 1
-        
-    avg_input_risk = (input_risk_sum / input_count) if input_count > 0 else 0
-    # avg_input_risk is between 1 (Low) and 5 (High)
-    
-    # 2. Behavioral Signals
-    # Late night usage -> Increase risk
-    # Response delay -> Increase risk
-    behavior_score = 0
-    for s in signals:
-        if s.type == BehaviorType.LATE_NIGHT_USAGE.value:
-            behavior_score += 1.0 # Significant penalty
-        elif s.type == BehaviorType.RESPONSE_DELAY.value:
-            if s.value > 10.0: # Took > 10s to answer
-                behavior_score += 0.5
-    
-    # Limit behavior influence for MVP
-    behavior_penalty = min(behavior_score, 5.0) 
-    
-    # 3. Total Score
-    # Map 1-5 base + behavior to 0-100
-    # Base: avg_input_risk (1-5). (avg - 1) / 4 * 100?
-    
-    base_score_normalized = ((avg_input_risk - 1) / 4) * 100 if avg_input_risk > 0 else 0
-    # Add behavior penalty (each point adds 10%)
-    total_score = base_score_normalized + (behavior_penalty * 10)
-    
-    total_score = min(max(total_score, 0), 100)
-    
-    # Determine Level
-    level = RiskLevel.LOW
-    insights = []
-    
-    if total_score > 75:
-        level = RiskLevel.HIGH
-        insights.append("High mental fatigue detected.")
-    elif total_score > 40:
-        level = RiskLevel.MEDIUM
-        insights.append("Early signs of stress detected.")
-    else:
-        insights.append("Your mental energy seems stable.")
-        
-    # Trend Check (Simple)
-    # If yesterday's score was lower, warn? (Need historical analysis, skipping for simplified MVP)
-    
-    if behavior_penalty > 2:
-        insights.append("Late night activity is impacting your score.")
     
-    # Save analysis to database
-    new_analysis = db_models.RiskAnalysis(
-        user_id=user.id,
-        date=today.strftime("%Y-%m-%d"),
-        risk_level=level.value,
-        risk_score=round(total_score, 1),
-        insights=str(insights)  # Store as JSON string
-    )
-    db.add(new_analysis)
-    db.commit()
-    db.refresh(new_analysis)
+    # Save today's snapshot (only writes when the result changed)
+    await save_snapshot(db, user_id, day, result["risk_level"], result["risk_score"], result["insights"])
         
     return {
         "username": username,
-        "date": today.strftime("%Y-%m-%d"),
-        "risk_level": level.value,
-        "risk_score": round(total_score, 1),
-        "insights": insights
+        "date": day,
+        **result
     }
@@ -0,0 +1,222 @@
+"""
+Columnar archive of raw history for offline analytics.
+
+Cohort studies scan every user's daily_responses and behavior_signals. Run against the
+live database those scans compete with the app. `archive_table` copies the rows into a
+directory of per-day column files instead. `HistoryArchive` loads a date range back as
+NumPy arrays that are memory-mapped, so analysis never touches the database and only
+pages in the columns it reads.
+
+Layout: one .npy file per column, so a reader opens only the columns it needs.
+
+    <ARCHIVE_DIR>/state.json                                  high-water marks
+    <ARCHIVE_DIR>/behavior_signals/2026-10-01/000000123401/value.npy
+                                   UTC day    part: first id of the chunk
+
+Each run appends the rows whose id is above the table's high-water mark, a chunk at a
+time. A chunk is split by the UTC day of its timestamps, and each day is written as a
+new part (into a temp directory, then renamed). After that the mark moves forward.
+Parts left behind by a run that died before moving the mark are removed on the next
+run, so no row is archived twice.
+
+Rows that are later deleted from the database (jobs/compact_signals.py) stay in the
+archive, so run this job before compaction. The mark is an id, so rows have to become
+visible in id order. SQLite guarantees that. On PostgreSQL, schedule the job away from
+long-running write transactions.
+"""
+import json
+import os
+import shutil
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models import ExportTable
+from .. import db_models
+
+# table -> (model, column -> dtype); "U" strings are sized to the longest value in the part
+ARCHIVE_TABLES = {
+    ExportTable.DAILY_RESPONSES: (db_models.DailyResponse, {
+        "id": "int64", "user_id": "int64", "date": "U10", "question_id": "U",
+        "answer_value": "int8", "timestamp": "datetime64[us]",
+    }),
+    ExportTable.BEHAVIOR_SIGNALS: (db_models.BehaviorSignal, {
+        "id": "int64", "user_id": "int64", "type": "U", "value": "float64", "timestamp": "datetime64[us]",
+    }),
+}
+
+STATE_FILE = "state.json"
+
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+
+Columns = Dict[str, np.ndarray]
+
+
+def _archive_table(table: Union[ExportTable, str]) -> ExportTable:
+    table = ExportTable(table)
+    if table not in ARCHIVE_TABLES:
+        raise ValueError(f"table must be one of {', '.join(t.value for t in ARCHIVE_TABLES)}")
+    return table
+
+
+def read_state(root: str) -> Dict[str, int]:
+    """table name -> highest archived id."""
+    try:
+        with open(os.path.join(root, STATE_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _write_state(root: str, state: Dict[str, int]):
+    path = os.path.join(root, STATE_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def _part_name(first_id: int) -> str:
+    return f"{first_id:012d}"
+
+
+def _remove_orphans(table_dir: str, mark: int):
+    """Drop temp directories and parts past the mark: a crashed run's partial output."""
+    if not os.path.isdir(table_dir):
+        return
+    for day in os.listdir(table_dir):
+        day_dir = os.path.join(table_dir, day)
+        for part in os.listdir(day_dir):
+            if not part.isdigit() or int(part) > mark:
+                shutil.rmtree(os.path.join(day_dir, part))
+
+
+def _column(values: tuple, dtype: str) -> np.ndarray:
+    if dtype == "datetime64[us]":
+        # Integer microseconds are ~10x faster than numpy parsing datetime objects
+        return np.array([(ts - EPOCH) // MICROSECOND for ts in values], dtype="int64").view(dtype)
+    return np.array(values, dtype=dtype)
+
+
+def _write_part(table_dir: str, day: str, part: str, columns: Columns):
+    final = os.path.join(table_dir, day, part)
+    tmp = final + ".tmp"
+    os.makedirs(tmp)
+    for name, values in columns.items():
+        np.save(os.path.join(tmp, name + ".npy"), values)
+    os.rename(tmp, final)
+
+
+def archive_table(db: Session, root: str, table: Union[ExportTable, str], chunk_size: int) -> Dict[str, int]:
+    """
+    Append the table's rows past its high-water mark to the archive, oldest id first.
+    Returns the rows archived, the parts written and the new mark.
+    """
+    table = _archive_table(table)
+    model, dtypes = ARCHIVE_TABLES[table]
+    table_dir = os.path.join(root, table.value)
+    os.makedirs(table_dir, exist_ok=True)
+    state = read_state(root)
+    mark = state.get(table.value, 0)
+    _remove_orphans(table_dir, mark)
+
+    names = list(dtypes)
+    archived = parts = 0
+    while True:
+        # Core rows: ORM result processing would dominate the run
+        rows = db.connection().execute(
+            select(*(getattr(model, name) for name in names))
+            .where(model.id > mark, model.timestamp.is_not(None))
+            .order_by(model.id)
+            .limit(chunk_size)
+        ).all()
+        # Ends the read transaction between chunks; nothing was written
+        db.rollback()
+        if not rows:
+            break
+
+        values = list(zip(*rows))
+        columns = {name: _column(values[index], dtypes[name]) for index, name in enumerate(names)}
+        # Stable sort by UTC day keeps id order within each day
+        days = columns["timestamp"].astype("datetime64[D]")
+        order = np.argsort(days, kind="stable")
+        days = days[order]
+        starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        part = _part_name(int(columns["id"][0]))
+        for start, end in zip(starts, np.r_[starts[1:], len(days)]):
+            day = str(days[start])
+            os.makedirs(os.path.join(table_dir, day), exist_ok=True)
+            index = order[start:end]
+            _write_part(table_dir, day, part, {name: column[index] for name, column in columns.items()})
+        parts += len(starts)
+
+        mark = int(columns["id"][-1])
+        state[table.value] = mark
+        _write_state(root, state)
+        archived += len(rows)
+
+    return {"archived": archived, "parts": parts, "high_water_mark": mark}
+
+
+class HistoryArchive:
+    """
+    Read side of the archive. Days are UTC days and ranges include both ends:
+
+        archive = HistoryArchive(settings.ARCHIVE_DIR)
+        signals = archive.load("behavior_signals", date(2026, 1, 1), date(2026, 3, 31), ["user_id", "value"])
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def days(self, table: Union[ExportTable, str]) -> List[date]:
+        table_dir = os.path.join(self.root, _archive_table(table).value)
+        if not os.path.isdir(table_dir):
+            return []
+        return sorted(date.fromisoformat(day) for day in os.listdir(table_dir))
+
+    def _columns(self, table: ExportTable, columns: Optional[Sequence[str]]) -> List[str]:
+        dtypes = ARCHIVE_TABLES[table][1]
+        if columns is None:
+            return list(dtypes)
+        unknown = [name for name in columns if name not in dtypes]
+        if unknown:
+            raise ValueError(f"unknown {table.value} columns: {', '.join(unknown)}")
+        return list(columns)
+
+    def parts(
+        self, table: Union[ExportTable, str], start: date, end: date, columns: Optional[Sequence[str]] = None
+    ) -> Iterator[Columns]:
+        """Each part in the range, oldest first, as memory-mapped arrays (read-only)."""
+        table = _archive_table(table)
+        names = self._columns(table, columns)
+        table_dir = os.path.join(self.root, table.value)
+        for day in self.days(table):
+            if not start <= day <= end:
+                continue
+            day_dir = os.path.join(table_dir, day.isoformat())
+            for part in sorted(p for p in os.listdir(day_dir) if p.isdigit()):
+                yield {
+                    name: np.load(os.path.join(day_dir, part, name + ".npy"), mmap_mode="r")
+                    for name in names
+                }
+
+    def load(
+        self, table: Union[ExportTable, str], start: date, end: date, columns: Optional[Sequence[str]] = None
+    ) -> Columns:
+        """
+        The range as one array per column. A single part is returned still memory-mapped;
+        several are concatenated into memory (use `parts` to stream a large range instead).
+        """
+        table = _archive_table(table)
+        names = self._columns(table, columns)
+        parts = list(self.parts(table, start, end, names))
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            dtypes = ARCHIVE_TABLES[table][1]
+            return {name: np.empty(0, dtype=dtypes[name]) for name in names}
+        return {name: np.concatenate([part[name] for part in parts]) for name in names}
@@ -0,0 +1,344 @@
+"""
+Bulk import of historical daily responses and behavior signals.
+
+Input is NDJSON or CSV in the export format (logic/export.py): every record names its
+`table`, daily_responses or behavior_signals, so an export can be imported elsewhere.
+Records of other tables (rollups, snapshots) are skipped because they are derived.
+A record may also carry a `username`. The CLI uses it to import many users from one
+file. The API only accepts the caller's own name.
+
+BulkImporter consumes the input a chunk of lines at a time and keeps nothing else in
+memory. Each chunk is validated against the import schemas in models.py and written in
+one transaction: COPY ... FROM STDIN on PostgreSQL (psycopg2), an executemany INSERT
+elsewhere, together with the chunk's user_daily_stats deltas, added onto the stored
+totals like on every other write path so concurrent writes for the same user are kept.
+Rejected records are reported with their line number. `finish` then backfills the
+daily snapshots for the imported days.
+
+Imports append: importing the same file twice stores its rows twice.
+"""
+import csv
+import io
+import json
+import time
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from ..jobs.nightly_risk import backfill_snapshots
+from ..models import BehaviorSignalImport, DailyResponseImport, ExportFormat, ExportTable
+from .. import db_models
+from .aggregates import apply_deltas_sync, response_deltas, signal_deltas
+from .rotation import QUESTIONS_POOL
+
+# table -> (model, schema, stored columns)
+IMPORT_TABLES = {
+    ExportTable.DAILY_RESPONSES: (
+        db_models.DailyResponse, DailyResponseImport, ("user_id", "date", "question_id", "answer_value", "timestamp"),
+    ),
+    ExportTable.BEHAVIOR_SIGNALS: (
+        db_models.BehaviorSignal, BehaviorSignalImport, ("user_id", "type", "value", "timestamp"),
+    ),
+}
+
+# Derived tables in an export; recomputed after the import instead
+SKIPPED_TABLES = {table.value for table in ExportTable} - {table.value for table in IMPORT_TABLES}
+
+KNOWN_QUESTIONS = {q.id for q in QUESTIONS_POOL}
+
+# Rejections listed in the report; the count covers all of them
+MAX_REPORTED_REJECTIONS = 100
+
+# Lines a quoted CSV field may span before the record is rejected, which bounds how much
+# of the input an unterminated quote can hold back
+MAX_CSV_RECORD_LINES = 1000
+
+# line number, record (None when the line didn't parse), parse error
+ParsedLine = Tuple[int, Optional[dict], Optional[str]]
+
+
+def valid_utf8(text: str) -> bool:
+    """
+    Input is decoded with errors="surrogateescape", so bytes that aren't UTF-8 arrive as
+    lone surrogates instead of failing the whole import; such text doesn't encode back.
+    """
+    if text.isascii():
+        return True
+    try:
+        text.encode("utf-8")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _complete_lines(lines: List[str]) -> int:
+    """
+    How many leading lines hold complete CSV records. A record continues onto the next
+    line while one of its quoted fields is open, i.e. after an odd number of quote
+    characters (quotes inside quoted fields are doubled).
+    """
+    in_quotes = False
+    complete = 0
+    for index, line in enumerate(lines, 1):
+        if line.count('"') % 2:
+            in_quotes = not in_quotes
+        if not in_quotes:
+            complete = index
+    return complete
+
+
+class RecordParser:
+    """
+    Turns lines into records, remembering the CSV header across chunks. A CSV record
+    whose quoted field runs past the end of a chunk is held back and parsed with the next.
+    """
+
+    def __init__(self, format: ExportFormat):
+        self.format = format
+        self.header: Optional[List[str]] = None
+        self.line_number = 0
+        # Lines of a CSV record still open at the end of the last chunk
+        self.pending: List[str] = []
+
+    def parse(self, lines: List[str]) -> Iterator[ParsedLine]:
+        offset = self.line_number
+        self.line_number += len(lines)
+        if self.format == ExportFormat.CSV:
+            yield from self._parse_csv(lines, offset)
+            return
+
+        for number, line in enumerate(lines, offset + 1):
+            if not line.strip():
+                continue
+            if not valid_utf8(line):
+                yield number, None, "invalid UTF-8"
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield number, None, f"invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield number, None, "expected a JSON object"
+                continue
+            yield number, record, None
+
+    def finish(self) -> Iterator[ParsedLine]:
+        """Reject a CSV record left open by the end of the input."""
+        if self.pending:
+            yield self.line_number - len(self.pending) + 1, None, "unterminated quoted field"
+            self.pending = []
+
+    def _parse_csv(self, lines: List[str], offset: int) -> Iterator[ParsedLine]:
+        lines = self.pending + lines
+        offset -= len(self.pending)
+        complete = _complete_lines(lines)
+        self.pending = lines[complete:]
+        if len(self.pending) > MAX_CSV_RECORD_LINES:
+            yield offset + complete + 1, None, f"quoted field spans more than {MAX_CSV_RECORD_LINES} lines"
+            self.pending = []
+
+        reader = csv.reader(lines[:complete])
+        for values in reader:
+            number = offset + reader.line_num
+            if not values:
+                continue
+            if self.header is None:
+                self.header = values
+                continue
+            if len(values) != len(self.header):
+                yield number, None, f"expected {len(self.header)} columns, got {len(values)}"
+                continue
+            if not all(map(valid_utf8, values)):
+                yield number, None, "invalid UTF-8"
+                continue
+            # Empty cells are columns of another table
+            yield number, {k: v for k, v in zip(self.header, values) if v != ""}, None
+
+
+class ImportReport:
+    def __init__(self):
+        self.imported: Dict[str, int] = defaultdict(int)
+        self.skipped = 0
+        self.rejected = 0
+        self.rejections: List[dict] = []
+        self.chunks = 0
+        self.started = time.perf_counter()
+        # user id -> (first, last) UTC day with imported rows
+        self.user_days: Dict[int, Tuple[date, date]] = {}
+        self.aggregate_rows = 0
+        self.snapshots = 0
+
+    def reject(self, line: int, error: str):
+        self.rejected += 1
+        if len(self.rejections) < MAX_REPORTED_REJECTIONS:
+            self.rejections.append({"line": line, "error": error})
+
+    def touch(self, user_id: int, day: date):
+        first, last = self.user_days.get(user_id, (day, day))
+        self.user_days[user_id] = (min(first, day), max(last, day))
+
+    def as_dict(self) -> dict:
+        return {
+            "imported": dict(self.imported),
+            "skipped": self.skipped,
+            "rejected": self.rejected,
+            "rejections": self.rejections,
+            "chunks": self.chunks,
+            "users": len(self.user_days),
+            "aggregate_rows": self.aggregate_rows,
+            "snapshots": self.snapshots,
+            "seconds": round(time.perf_counter() - self.started, 3),
+        }
+
+
+def _utc_naive(ts: datetime) -> datetime:
+    """Timestamps are stored as naive UTC, matching the column defaults."""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def _copy_value(value):
+    if value is None:
+        return ""  # NULL in COPY's CSV format
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _copy_rows(connection: Connection, table: str, columns: Tuple[str, ...], rows: List[dict]):
+    """COPY rows in through psycopg2, as CSV so quoting is handled for us."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_copy_value(row[column]) for column in columns])
+    buffer.seek(0)
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def write_rows(connection: Connection, model, columns: Tuple[str, ...], rows: List[dict]):
+    if connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2":
+        _copy_rows(connection, model.__tablename__, columns, rows)
+    else:
+        connection.execute(insert(model), rows)
+
+
+class BulkImporter:
+    """
+    Feed it lines with `feed_lines` (a chunk at a time), then call `finish`.
+    `resolve_user(username)` maps a record's username (None if it has none) to a user
+    id, or raises ValueError with the reason to reject the record.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        format: ExportFormat,
+        resolve_user: Callable[[Optional[str]], int],
+        on_chunk: Optional[Callable[[ImportReport], None]] = None,
+    ):
+        self.engine = engine
+        self.parser = RecordParser(format)
+        self.resolve_user = resolve_user
+        self.on_chunk = on_chunk
+        self.report = ImportReport()
+
+    def _validate(self, line: int, record: dict) -> Optional[Tuple[ExportTable, dict]]:
+        table = record.pop("table", None)
+        # JSON can put lists or objects here, which can't even be looked up
+        if isinstance(table, str) and table in SKIPPED_TABLES:
+            self.report.skipped += 1
+            return None
+        try:
+            table = ExportTable(table) if isinstance(table, str) else None
+        except ValueError:
+            table = None
+        if table is None:
+            self.report.reject(line, f"table must be one of {', '.join(t.value for t in IMPORT_TABLES)}")
+            return None
+        schema = IMPORT_TABLES[table][1]
+
+        username = record.pop("username", None)
+        if username is not None and not isinstance(username, str):
+            self.report.reject(line, "username: must be a string")
+            return None
+        try:
+            user_id = self.resolve_user(username)
+            item = schema.model_validate(record)
+        except ValueError as e:
+            # ValidationError is a ValueError; report its first problem like /signals/track/batch
+            if isinstance(e, ValidationError):
+                error = e.errors()[0]
+                field = ".".join(str(part) for part in error["loc"])
+                message = f"{field}: {error['msg']}" if field else error["msg"]
+            else:
+                message = str(e)
+            self.report.reject(line, message)
+            return None
+
+        timestamp = _utc_naive(item.timestamp)
+        if table == ExportTable.DAILY_RESPONSES:
+            if item.question_id not in KNOWN_QUESTIONS:
+                self.report.reject(line, f"question_id: unknown question {item.question_id!r}")
+                return None
+            row = {
+                "user_id": user_id,
+                "date": item.date or timestamp.strftime("%Y-%m-%d"),
+                "question_id": item.question_id,
+                "answer_value": item.answer_value,
+                "timestamp": timestamp,
+            }
+        else:
+            row = {"user_id": user_id, "type": item.type.value, "value": item.value, "timestamp": timestamp}
+        self.report.touch(user_id, timestamp.date())
+        return table, row
+
+    def feed_lines(self, lines: List[str]):
+        """Parse, validate and write one chunk of lines in a single transaction."""
+        rows: Dict[ExportTable, List[dict]] = defaultdict(list)
+        for line, record, error in self.parser.parse(lines):
+            if record is None:
+                self.report.reject(line, error)
+                continue
+            validated = self._validate(line, record)
+            if validated is not None:
+                rows[validated[0]].append(validated[1])
+
+        if rows:
+            deltas = response_deltas(rows.get(ExportTable.DAILY_RESPONSES, ()))
+            for key, delta in signal_deltas(rows.get(ExportTable.BEHAVIOR_SIGNALS, ())).items():
+                for column, value in delta.items():
+                    deltas[key][column] += value
+            with self.engine.begin() as connection:
+                for table, table_rows in rows.items():
+                    model, _, columns = IMPORT_TABLES[table]
+                    write_rows(connection, model, columns, table_rows)
+                # Added onto the totals like every other write path, so concurrent
+                # requests for the same users keep their increments
+                apply_deltas_sync(Session(bind=connection), deltas)
+            self.report.aggregate_rows += len(deltas)
+            for table, table_rows in rows.items():
+                self.report.imported[table.value] += len(table_rows)
+        self.report.chunks += 1
+        if self.on_chunk is not None:
+            self.on_chunk(self.report)
+
+    def finish(self) -> ImportReport:
+        """Backfill snapshots for the imported days (aggregates are kept up per chunk)."""
+        for line, _, error in self.parser.finish():
+            self.report.reject(line, error)
+        if self.report.user_days:
+            db = Session(bind=self.engine)
+            try:
+                self.report.snapshots = backfill_snapshots(db, self.report.user_days)
+            finally:
+                db.close()
+        return self.report
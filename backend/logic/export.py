@@ -0,0 +1,118 @@
+"""
+Full-history export of one user's data.
+
+`export_batches` reads each table through a server-side cursor (AsyncSession.stream
+with yield_per), so at most one batch of rows is in memory at a time however long the
+history is. `ndjson_chunks` / `csv_chunks` turn those batches into encoded chunks and
+`gzip_chunks` optionally compresses them on the fly; the export router streams the
+result with StreamingResponse.
+"""
+import csv
+import io
+import ast
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import ExportTable
+from .. import db_models
+
+# table -> (model, exported columns, order); orders follow each table's (user_id, ...) index
+EXPORT_TABLES = {
+    ExportTable.DAILY_RESPONSES: (
+        db_models.DailyResponse, ("date", "question_id", "answer_value", "timestamp"), ("timestamp", "id"),
+    ),
+    ExportTable.BEHAVIOR_SIGNALS: (
+        db_models.BehaviorSignal, ("type", "value", "timestamp"), ("timestamp", "id"),
+    ),
+    ExportTable.BEHAVIOR_SIGNAL_DAILY: (
+        db_models.BehaviorSignalDaily, ("date", "type", "count", "value_sum", "value_max"), ("date", "type"),
+    ),
+    ExportTable.RISK_ANALYSES: (
+        db_models.RiskAnalysis, ("date", "risk_level", "risk_score", "insights", "timestamp"), ("date",),
+    ),
+}
+
+# CSV header: the table name, then every exported column once, in first-seen order
+CSV_COLUMNS = ["table"] + list(dict.fromkeys(
+    column for _, columns, _ in EXPORT_TABLES.values() for column in columns
+))
+
+Batch = Tuple[ExportTable, Sequence[str], List[tuple]]
+
+
+async def export_batches(db: AsyncSession, user_id: int, tables: Iterable[ExportTable], batch_size: int) -> AsyncIterator[Batch]:
+    """(table, columns, rows) for each batch of the user's rows, table by table."""
+    for table in tables:
+        model, columns, order = EXPORT_TABLES[table]
+        stmt = (
+            select(*(getattr(model, column) for column in columns))
+            .where(model.user_id == user_id)
+            .order_by(*(getattr(model, column) for column in order))
+            .execution_options(yield_per=batch_size)
+        )
+        result = await db.stream(stmt)
+        async for partition in result.partitions():
+            yield table, columns, partition
+
+
+def _plain(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _insights(value: str):
+    """Stored as JSON; snapshots from before that hold str() of a Python list."""
+    try:
+        return json.loads(value)
+    except ValueError:
+        pass
+    try:
+        return ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return value
+
+
+async def ndjson_chunks(batches: AsyncIterator[Batch]) -> AsyncIterator[bytes]:
+    """One JSON object per line, tagged with its table; insights as a list."""
+    async for table, columns, rows in batches:
+        lines = []
+        for row in rows:
+            record: Dict[str, object] = {"table": table.value}
+            for column, value in zip(columns, row):
+                record[column] = _insights(value) if column == "insights" and value else _plain(value)
+            lines.append(json.dumps(record, separators=(",", ":")))
+        yield ("\n".join(lines) + "\n").encode()
+
+
+async def csv_chunks(batches: AsyncIterator[Batch]) -> AsyncIterator[bytes]:
+    """One header row over all tables; columns a table doesn't have are left empty."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    # The header goes out before the first query returns
+    yield buffer.getvalue().encode()
+
+    positions = {column: index for index, column in enumerate(CSV_COLUMNS)}
+    async for table, columns, rows in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        slots = [positions[column] for column in columns]
+        for row in rows:
+            line = [""] * len(CSV_COLUMNS)
+            line[0] = table.value
+            for slot, value in zip(slots, row):
+                line[slot] = "" if value is None else _plain(value)
+            writer.writerow(line)
+        yield buffer.getvalue().encode()
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """gzip on the fly; a sync flush per chunk keeps every batch moving to the client."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
@@ -0,0 +1,157 @@
+"""
+Risk history for the trend and heatmap views.
+
+The "risk" series reads the stored risk_analyses snapshots (one per user per day);
+the category series (sleep, focus, mood, energy) score that category's daily answers
+the way calculate_risk scores all of them. Both are plain range scans on a
+(user_id, day) index, and days are downsampled into week/month buckets on the
+server, so a year view returns ~52 points rather than every row.
+
+Signal history merges raw behavior_signals with the behavior_signal_daily rollups
+that replace them past the retention horizon, so callers never see the seam.
+"""
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import HistoryAggregate, HistoryResolution, HistorySeries
+from .. import db_models
+from .aggregates import answer_risk_expression
+from .rotation import QUESTIONS_POOL
+
+# Longest range a single request may cover
+MAX_HISTORY_DAYS = 3 * 366
+
+Point = Tuple[date, float]
+
+
+def history_range(start: Optional[date], end: Optional[date]) -> Tuple[date, date]:
+    """Fill in the default range (30 days to today) and validate it. Raises ValueError."""
+    end = end or date.today()
+    start = start or end - timedelta(days=29)
+    if start > end:
+        raise ValueError("`from` must not be after `to`")
+    if (end - start).days >= MAX_HISTORY_DAYS:
+        raise ValueError(f"Range is limited to {MAX_HISTORY_DAYS} days")
+    return start, end
+
+
+def bucket_start(day: date, resolution: HistoryResolution) -> date:
+    """First day of the bucket `day` falls in (weeks start on Monday)."""
+    if resolution == HistoryResolution.WEEK:
+        return day - timedelta(days=day.weekday())
+    if resolution == HistoryResolution.MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def downsample(points: List[Point], resolution: HistoryResolution, aggregate: HistoryAggregate) -> List[dict]:
+    """Collapse day-level points (sorted by day) into one point per bucket."""
+    buckets: Dict[date, List[float]] = defaultdict(list)
+    for day, value in points:
+        buckets[bucket_start(day, resolution)].append(value)
+
+    result = []
+    for start in sorted(buckets):
+        values = buckets[start]
+        if aggregate == HistoryAggregate.LAST:
+            value = values[-1]
+        elif aggregate == HistoryAggregate.MAX:
+            value = max(values)
+        else:
+            value = sum(values) / len(values)
+        result.append({"date": start.isoformat(), "value": round(value, 1), "samples": len(values)})
+    return result
+
+
+async def load_risk_points(db: AsyncSession, user_id: int, start: date, end: date) -> List[Point]:
+    table = db_models.RiskAnalysis
+    rows = await db.execute(
+        select(table.date, table.risk_score)
+        .where(table.user_id == user_id, table.date >= start.isoformat(), table.date <= end.isoformat())
+        .order_by(table.date)
+    )
+    return [(date.fromisoformat(day), score) for day, score in rows]
+
+
+async def load_category_points(
+    db: AsyncSession, user_id: int, category: str, start: date, end: date
+) -> List[Point]:
+    """Per-day 0-100 risk for one question category, from the raw daily answers."""
+    table = db_models.DailyResponse
+    question_ids = [q.id for q in QUESTIONS_POOL if q.category.lower() == category]
+    day = func.date(table.timestamp)
+    rows = await db.execute(
+        select(day, func.sum(answer_risk_expression(table)), func.count())
+        .where(
+            table.user_id == user_id,
+            table.timestamp >= datetime.combine(start, time()),
+            table.timestamp < datetime.combine(end + timedelta(days=1), time()),
+            table.question_id.in_(question_ids),
+        )
+        .group_by(day)
+        .order_by(day)
+    )
+    # func.date() is a string on SQLite and a date on Postgres
+    return [
+        (date.fromisoformat(str(row_day)), ((risk_sum / count) - 1) / 4 * 100)
+        for row_day, risk_sum, count in rows
+    ]
+
+
+async def get_history(
+    db: AsyncSession,
+    user_id: int,
+    start: date,
+    end: date,
+    resolution: HistoryResolution,
+    aggregate: HistoryAggregate,
+    series: HistorySeries,
+) -> List[dict]:
+    if series == HistorySeries.RISK:
+        points = await load_risk_points(db, user_id, start, end)
+    else:
+        points = await load_category_points(db, user_id, series.value, start, end)
+    return downsample(points, resolution, aggregate)
+
+
+async def load_signal_days(
+    db: AsyncSession, user_id: int, start: date, end: date, signal_type: Optional[str] = None
+) -> List[dict]:
+    """Per-day, per-type count/sum/max of the user's signals, from raw rows and rollups alike."""
+    signals = db_models.BehaviorSignal
+    rollups = db_models.BehaviorSignalDaily
+    day = func.date(signals.timestamp)
+    raw_query = (
+        select(day, signals.type, func.count(), func.sum(signals.value), func.max(signals.value))
+        .where(
+            signals.user_id == user_id,
+            signals.timestamp >= datetime.combine(start, time()),
+            signals.timestamp < datetime.combine(end + timedelta(days=1), time()),
+        )
+        .group_by(day, signals.type)
+    )
+    rollup_query = select(rollups.date, rollups.type, rollups.count, rollups.value_sum, rollups.value_max).where(
+        rollups.user_id == user_id, rollups.date >= start.isoformat(), rollups.date <= end.isoformat()
+    )
+    if signal_type is not None:
+        raw_query = raw_query.where(signals.type == signal_type)
+        rollup_query = rollup_query.where(rollups.type == signal_type)
+
+    merged: Dict[Tuple[str, str], dict] = {}
+    for query in (rollup_query, raw_query):
+        for row_day, row_type, count, value_sum, value_max in await db.execute(query):
+            # func.date() is a string on SQLite and a date on Postgres
+            key = (str(row_day), row_type)
+            current = merged.get(key)
+            if current is None:
+                merged[key] = {"date": key[0], "type": row_type, "count": count, "sum": value_sum, "max": value_max}
+            else:
+                current["count"] += count
+                current["sum"] += value_sum
+                # Rollup value_max is nullable
+                current["max"] = max((v for v in (current["max"], value_max) if v is not None), default=None)
+    return [merged[key] for key in sorted(merged)]
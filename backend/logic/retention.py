@@ -0,0 +1,115 @@
+"""
+Retention for raw behavior_signals.
+
+Signals older than the retention horizon are rolled up into behavior_signal_daily
+(one row per user, UTC day and type with count, sum, max and the slow-response count
+rebuild needs) and then deleted. Work happens in chunks of CHUNK_SIZE raw rows, each in
+its own short transaction, so the job never holds long locks on the hot table. A chunk's
+rollup and delete commit together, so a crash mid-run loses or double-counts nothing.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.orm import Session
+
+from ..database import upsert_insert
+from ..models import BehaviorType
+from .. import db_models
+from .aggregates import SLOW_RESPONSE_SECONDS, stats_day
+
+# calculate_risk's window; raw signals inside it are never compacted
+MIN_RETENTION_DAYS = 7
+
+SummaryKey = Tuple[int, str, str]
+
+
+def retention_cutoff(horizon_days: int, now: Optional[datetime] = None) -> datetime:
+    """Start of the oldest UTC day kept raw. Day-aligned, so a day is rolled up whole."""
+    if horizon_days < MIN_RETENTION_DAYS:
+        raise ValueError(f"Retention horizon must be at least {MIN_RETENTION_DAYS} days")
+    today = (now or datetime.utcnow()).date()
+    return datetime.combine(today - timedelta(days=horizon_days), time())
+
+
+def summarize_signals(rows) -> Dict[SummaryKey, dict]:
+    """Rows need user_id, type, value and timestamp."""
+    summaries = defaultdict(lambda: {"count": 0, "value_sum": 0.0, "value_max": None, "slow_count": 0})
+    for row in rows:
+        summary = summaries[(row.user_id, stats_day(row.timestamp), row.type)]
+        summary["count"] += 1
+        summary["value_sum"] += row.value
+        if summary["value_max"] is None or row.value > summary["value_max"]:
+            summary["value_max"] = row.value
+        if row.type == BehaviorType.RESPONSE_DELAY.value and row.value > SLOW_RESPONSE_SECONDS:
+            summary["slow_count"] += 1
+    return summaries
+
+
+def _merge_summaries(db: Session, summaries: Dict[SummaryKey, dict]):
+    table = db_models.BehaviorSignalDaily
+    values = [
+        {"user_id": user_id, "date": day, "type": signal_type, **summary}
+        for (user_id, day, signal_type), summary in summaries.items()
+    ]
+
+    dialect_insert = upsert_insert(db)
+    if dialect_insert is not None:
+        stmt = dialect_insert(table).values(values)
+        excluded = stmt.excluded
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.user_id, table.date, table.type],
+            set_={
+                "count": table.count + excluded.count,
+                "value_sum": table.value_sum + excluded.value_sum,
+                "value_max": case(
+                    (excluded.value_max > table.value_max, excluded.value_max),
+                    else_=func.coalesce(table.value_max, excluded.value_max),
+                ),
+                "slow_count": table.slow_count + excluded.slow_count,
+            },
+        )
+        db.execute(stmt)
+        return
+
+    # Portable fallback for other dialects
+    for value in values:
+        row = db.scalar(select(table).where(
+            table.user_id == value["user_id"], table.date == value["date"], table.type == value["type"]
+        ))
+        if row is None:
+            db.add(table(**value))
+            continue
+        row.count += value["count"]
+        row.value_sum += value["value_sum"]
+        row.value_max = max(row.value_max, value["value_max"]) if row.value_max is not None else value["value_max"]
+        row.slow_count += value["slow_count"]
+    db.flush()
+
+
+def compact_signals(db: Session, horizon_days: int, chunk_size: int, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Roll up and delete raw signals from before the horizon, oldest first.
+    Returns the number of raw rows compacted and chunks committed.
+    """
+    signals = db_models.BehaviorSignal
+    cutoff = retention_cutoff(horizon_days, now)
+    compacted = chunks = 0
+
+    while True:
+        rows = db.execute(
+            select(signals.id, signals.user_id, signals.type, signals.value, signals.timestamp)
+            .where(signals.timestamp < cutoff)
+            .order_by(signals.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+        _merge_summaries(db, summarize_signals(rows))
+        db.execute(delete(signals).where(signals.id.in_([row.id for row in rows])))
+        db.commit()
+        compacted += len(rows)
+        chunks += 1
+
+    return {"compacted": compacted, "chunks": chunks}
@@ -1,33 +1,37 @@
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 import datetime
-from ..models import Question
+from ..models import Question, QuestionPolarity
 
 # Question Pool (Indirect questions)
+# Questions are positively phrased (5 = healthy) unless marked NEGATIVE (5 = high risk)
 QUESTIONS_POOL = [
     # Sleep
     Question(id="s1", text="How refreshed did you feel after waking up?", category="Sleep"),
-    Question(id="s2", text="Did you find it hard to get out of bed today?", category="Sleep"),
+    Question(id="s2", text="Did you find it hard to get out of bed today?", category="Sleep", polarity=QuestionPolarity.NEGATIVE),
     
     # Focus
     Question(id="f1", text="How easy was it to focus on one task today?", category="Focus"),
-    Question(id="f2", text="Did you find yourself switching tasks often?", category="Focus"),
+    Question(id="f2", text="Did you find yourself switching tasks often?", category="Focus", polarity=QuestionPolarity.NEGATIVE),
     
     # Mood/Stress
-    Question(id="m1", text="Did you feel mentally tired before noon today?", category="Mood"),
+    Question(id="m1", text="Did you feel mentally tired before noon today?", category="Mood", polarity=QuestionPolarity.NEGATIVE),
     Question(id="m2", text="How easy was it to smile at a joke today?", category="Mood"),
     
     # Energy
-    Question(id="e1", text="Did screens feel exhausting today?", category="Energy"),
+    Question(id="e1", text="Did screens feel exhausting today?", category="Energy", polarity=QuestionPolarity.NEGATIVE),
     Question(id="e2", text="Do you feel like doing a hobby this evening?", category="Energy"),
 ]
 
-def get_daily_questions(username: str) -> List[Question]:
+# How many questions get_daily_questions serves per day (a complete check-in)
+QUESTIONS_PER_DAY = 2
+
+def get_daily_questions(username: str, today: Optional[datetime.date] = None) -> List[Question]:
     """
     Selects 2 questions based on the day of the year to ensure rotation.
     In a real app, we might persist rotation state per user.
     Here we use a deterministic hash of (date + username) or just date.
     """
-    today = datetime.date.today()
+    today = today or datetime.date.today()
     # Simple rotation: use day of year % len(pool/2)
     # We want 2 distinct questions.
     
@@ -0,0 +1,188 @@
+"""
+Burnout risk scoring, kept free of database access.
+
+Core Rule: Burnout = Indirect Inputs + Behavior + Trends
+
+A ScoringEngine is compiled once from question metadata (QUESTIONS_POOL, each question
+carrying its polarity) and a ScoringRules set. Polarity becomes a set of negatively
+phrased ids for single answers, and (offset, sign) arrays so the risk of many answers
+is one gather: `offset[q] + sign[q] * answer`. Scoring itself works on pre-aggregated
+7-day window totals (the user_daily_stats COUNTER_COLUMNS summed per user):
+
+- score_one(totals)  plain Python for one user, used by calculate_risk
+- score_many(totals) NumPy over parallel arrays, used by the nightly job and backfills
+
+Both perform the same float operations in the same order, so they agree exactly.
+"""
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..models import Question, QuestionPolarity, RiskLevel
+from .rotation import QUESTIONS_POOL
+
+# Default rules
+LATE_NIGHT_WEIGHT = 1.0      # Significant penalty per late-night session
+SLOW_RESPONSE_WEIGHT = 0.5   # Per response_delay over aggregates.SLOW_RESPONSE_SECONDS
+MAX_BEHAVIOR_PENALTY = 5.0
+PENALTY_POINTS = 10          # Each behavior penalty point adds 10%
+HIGH_RISK_THRESHOLD = 75
+MEDIUM_RISK_THRESHOLD = 40
+LATE_NIGHT_INSIGHT_PENALTY = 2
+
+INSIGHT_HIGH = "High mental fatigue detected."
+INSIGHT_MEDIUM = "Early signs of stress detected."
+INSIGHT_STABLE = "Your mental energy seems stable."
+INSIGHT_LATE_NIGHT = "Late night activity is impacting your score."
+INSIGHT_NO_DATA = "Not enough data yet. Keep using the app!"
+
+# Answers are on a 1-5 scale; risk is normalized so 5 always means highest risk
+ANSWER_SCALE_MAX = 5
+
+# Level codes returned by score_many
+LOW, MEDIUM, HIGH = 0, 1, 2
+
+
+class ScoringRules:
+    """Weights and thresholds for a ScoringEngine. Override any of them to try other rules."""
+
+    def __init__(
+        self,
+        late_night_weight: float = LATE_NIGHT_WEIGHT,
+        slow_response_weight: float = SLOW_RESPONSE_WEIGHT,
+        max_behavior_penalty: float = MAX_BEHAVIOR_PENALTY,
+        penalty_points: float = PENALTY_POINTS,
+        high_risk_threshold: float = HIGH_RISK_THRESHOLD,
+        medium_risk_threshold: float = MEDIUM_RISK_THRESHOLD,
+        late_night_insight_penalty: float = LATE_NIGHT_INSIGHT_PENALTY,
+    ):
+        self.late_night_weight = late_night_weight
+        self.slow_response_weight = slow_response_weight
+        self.max_behavior_penalty = max_behavior_penalty
+        self.penalty_points = penalty_points
+        self.high_risk_threshold = high_risk_threshold
+        self.medium_risk_threshold = medium_risk_threshold
+        self.late_night_insight_penalty = late_night_insight_penalty
+
+
+class ScoringEngine:
+    # Level code -> (risk level, headline insight)
+    LEVELS = (
+        (RiskLevel.LOW.value, INSIGHT_STABLE),
+        (RiskLevel.MEDIUM.value, INSIGHT_MEDIUM),
+        (RiskLevel.HIGH.value, INSIGHT_HIGH),
+    )
+
+    def __init__(self, questions: Sequence[Question] = QUESTIONS_POOL, rules: Optional[ScoringRules] = None):
+        self.rules = rules or ScoringRules()
+        self.question_ids = tuple(q.id for q in questions)
+        self.negative_questions = tuple(q.id for q in questions if q.polarity == QuestionPolarity.NEGATIVE)
+
+        # risk = offset + sign * answer: negative questions keep the answer, positive ones flip it
+        polarity = [
+            (0, 1) if q.polarity == QuestionPolarity.NEGATIVE else (ANSWER_SCALE_MAX + 1, -1)
+            for q in questions
+        ]
+        self._negative = frozenset(self.negative_questions)
+        self._index = {question_id: i for i, question_id in enumerate(self.question_ids)}
+        # The extra last row scores unknown question ids as positively phrased
+        self._offsets = np.array([offset for offset, _ in polarity] + [ANSWER_SCALE_MAX + 1], dtype=np.int64)
+        self._signs = np.array([sign for _, sign in polarity] + [-1], dtype=np.int64)
+
+    # --- Answers ---
+
+    def answer_risk(self, question_id: str, answer_value: int) -> int:
+        """Normalize a 1-5 answer so that 5 always means highest risk."""
+        if question_id in self._negative:
+            return answer_value
+        return ANSWER_SCALE_MAX + 1 - answer_value
+
+    def question_indexes(self, question_ids: Sequence[str]) -> np.ndarray:
+        """Question ids as rows of the compiled tables, for answer_risks."""
+        unknown = len(self.question_ids)
+        return np.fromiter((self._index.get(q, unknown) for q in question_ids), dtype=np.int64, count=len(question_ids))
+
+    def answer_risks(self, question_indexes: np.ndarray, answer_values: np.ndarray) -> np.ndarray:
+        """Vectorized answer_risk over parallel arrays."""
+        return self._offsets[question_indexes] + self._signs[question_indexes] * np.asarray(answer_values, dtype=np.int64)
+
+    # --- Window totals ---
+
+    def describe(self, level: int, late_night: bool) -> Tuple[str, List[str]]:
+        """Risk level name and insights for a level code."""
+        risk_level, insight = self.LEVELS[level]
+        insights = [insight]
+        if late_night:
+            insights.append(INSIGHT_LATE_NIGHT)
+        return risk_level, insights
+
+    def score_one(self, totals: Mapping[str, int]) -> Optional[dict]:
+        """
+        Score one user's window totals. Returns risk_level, risk_score (rounded to 0.1)
+        and insights, or None when the window holds no answers or signals.
+        """
+        rules = self.rules
+        answer_count = totals["answer_count"]
+        if not (answer_count or totals["signal_count"]):
+            return None
+
+        # 1. Inputs: average polarity-normalized answer, 1 (Low) to 5 (High)
+        avg_input_risk = totals["answer_risk_sum"] / answer_count if answer_count > 0 else 0
+
+        # 2. Behavior: late-night sessions and slow responses, capped
+        behavior_score = (
+            totals["late_night_count"] * rules.late_night_weight
+            + totals["slow_response_count"] * rules.slow_response_weight
+        )
+        behavior_penalty = min(behavior_score, rules.max_behavior_penalty)
+
+        # 3. Total: inputs mapped to 0-100, plus the behavior penalty
+        base_score = ((avg_input_risk - 1) / 4) * 100 if avg_input_risk > 0 else 0
+        total_score = min(max(base_score + behavior_penalty * rules.penalty_points, 0), 100)
+
+        if total_score > rules.high_risk_threshold:
+            level = HIGH
+        elif total_score > rules.medium_risk_threshold:
+            level = MEDIUM
+        else:
+            level = LOW
+        risk_level, insights = self.describe(level, behavior_penalty > rules.late_night_insight_penalty)
+        return {"risk_level": risk_level, "risk_score": round(total_score, 1), "insights": insights}
+
+    def score_many(self, totals: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        score_one over parallel arrays of window totals. Returns has_data, the unrounded
+        total_score, level codes and late_night_insight flags; round scores with Python's
+        round (as score_one does) so ties resolve identically.
+        """
+        rules = self.rules
+        answer_count = totals["answer_count"]
+        has_answers = answer_count > 0
+        avg_input_risk = np.divide(
+            totals["answer_risk_sum"], answer_count,
+            out=np.zeros(len(answer_count), dtype=np.float64), where=has_answers
+        )
+
+        behavior_score = (
+            totals["late_night_count"] * rules.late_night_weight
+            + totals["slow_response_count"] * rules.slow_response_weight
+        )
+        behavior_penalty = np.minimum(behavior_score, rules.max_behavior_penalty)
+
+        base_score = np.where(avg_input_risk > 0, ((avg_input_risk - 1) / 4) * 100, 0.0)
+        total_score = np.clip(base_score + behavior_penalty * rules.penalty_points, 0, 100)
+
+        level = np.where(
+            total_score > rules.high_risk_threshold, HIGH,
+            np.where(total_score > rules.medium_risk_threshold, MEDIUM, LOW)
+        )
+        return {
+            "has_data": has_answers | (totals["signal_count"] > 0),
+            "total_score": total_score,
+            "level": level,
+            "late_night_insight": behavior_penalty > rules.late_night_insight_penalty,
+        }
+
+
+# The engine the app, jobs and backfills share
+scoring_engine = ScoringEngine()
@@ -1,7 +1,16 @@
-from fastapi import FastAPI
+import hmac
+
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from .config import settings
-from .routers import auth, daily, signals, dashboard
+from .routers import auth, daily, signals, dashboard, export, imports
+from .database import async_engine, engine, read_async_engine
+from .logic.analysis import dashboard_cache
+from .metrics import MetricsMiddleware, instrument_engine, registry
+from .pubsub import risk_updates
+from .rate_limit import limiters
+from .write_buffer import signal_buffer
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -36,12 +45,83 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# Metrics - outermost, so CORS and error handling are included in request timings
+if settings.METRICS_ENABLED:
+    instrument_engine(engine)
+    instrument_engine(async_engine.sync_engine)
+    instrument_engine(read_async_engine.sync_engine)
+    app.add_middleware(MetricsMiddleware, server_timing=settings.METRICS_SERVER_TIMING)
+
+def _component_stats():
+    """Write buffer, dashboard stream, rate limit and cache figures, read at scrape time."""
+    buffer = signal_buffer.stats()
+    yield "signal_buffer_queue_depth", "gauge", "Signals waiting in the write-behind buffer.", [({}, buffer["queue_depth"])]
+    yield "signal_buffer_flushed_total", "counter", "Signals flushed to the database.", [({}, buffer["flushed_total"])]
+    yield "signal_buffer_rejected_total", "counter", "Signals rejected because the buffer was full.", [({}, buffer["rejected_total"])]
+    yield "signal_buffer_flush_errors_total", "counter", "Failed buffer flushes.", [({}, buffer["flush_errors"])]
+    yield "signal_buffer_dropped_total", "counter", "Buffered signals lost after a failed shutdown flush.", [({}, buffer["dropped_total"])]
+
+    streams = risk_updates.stats()
+    yield "dashboard_streams_open", "gauge", "Open dashboard event streams.", [({}, streams["connections"])]
+    yield "dashboard_stream_updates_total", "counter", "Risk updates delivered to open streams.", [({}, streams["delivered_total"])]
+    yield "dashboard_streams_rejected_total", "counter", "Streams refused by the connection limits.", [({}, streams["rejected_total"])]
+
+    limits = {route: limiter.stats() for route, limiter in limiters.items()}
+    yield "rate_limit_buckets", "gauge", "Per-user token buckets held per rate-limited route.", [
+        ({"route": route}, stats["buckets"]) for route, stats in limits.items()
+    ]
+    yield "rate_limit_bucket_evictions_total", "counter", "Idle token buckets dropped per route.", [
+        ({"route": route}, stats["evictions"]) for route, stats in limits.items()
+    ]
+    yield "rate_limit_overflow_total", "counter", "Requests checked against the shared bucket at MAX_BUCKETS.", [
+        ({"route": route}, stats["overflowed"]) for route, stats in limits.items()
+    ]
+
+    caches = {"dashboard": dashboard_cache.stats(), "principal": auth.principal_cache.stats()}
+    yield "cache_entries", "gauge", "Entries held per cache.", [({"cache": n}, s["size"]) for n, s in caches.items()]
+    for field in ("hits", "misses", "evictions", "invalidations"):
+        yield f"cache_{field}_total", "counter", f"Cache {field} per cache.", [
+            ({"cache": n}, s[field]) for n, s in caches.items()
+        ]
+
+registry.register_collector(_component_stats)
+
 # Include Routers
 app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
 app.include_router(daily.router, prefix="/daily", tags=["Daily Questions"])
 app.include_router(signals.router, prefix="/signals", tags=["Behavioral Signals"])
 app.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
+app.include_router(export.router, prefix="/export", tags=["Export"])
+app.include_router(imports.router, prefix="/import", tags=["Import"])
+
+@app.on_event("startup")
+async def start_signal_buffer():
+    if settings.SIGNAL_WRITE_BEHIND:
+        await signal_buffer.start()
+
+@app.on_event("startup")
+async def start_risk_updates():
+    await risk_updates.start()
+
+@app.on_event("shutdown")
+async def shutdown_database():
+    # Ends open dashboard streams, which would otherwise hold up the shutdown
+    await risk_updates.stop()
+    # Always drain, even if write-behind was switched off while rows were queued
+    await signal_buffer.stop()
+    await async_engine.dispose()
+    if read_async_engine is not async_engine:
+        await read_async_engine.dispose()
 
 @app.get("/")
 def root():
     return {"message": "Burnout Analysis System API is running."}
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(authorization: str = Header("")):
+    # Request figures and internals are not public: off unless enabled with a token
+    if not (settings.METRICS_ENABLED and settings.METRICS_TOKEN):
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {settings.METRICS_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token", headers={"WWW-Authenticate": "Bearer"})
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,158 @@
+"""
+Schema migrations for the backend database (Alembic).
+
+Applies the revisions in backend/migrations/versions to the configured database
+(DATABASE_URL, or the local SQLite fallback). Databases created by the old
+`Base.metadata.create_all` path are detected and stamped at the matching
+revision first, so they upgrade in place without losing data.
+
+Usage (from the repository root):
+    python -m backend.migrate upgrade      # apply all pending migrations
+    python -m backend.migrate current      # show the applied revision
+    python -m backend.migrate explain      # check the hot queries use their indexes
+"""
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+try:
+    from .database import engine as default_engine
+except ImportError:
+    from database import engine as default_engine
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Hot per-user time-window queries and the index each one must use (any of the listed names;
+# SQLite names the index behind a UNIQUE constraint itself)
+HOT_QUERIES = [
+    {
+        "name": "daily_responses window",
+        "indexes": ["ix_daily_responses_user_id_timestamp"],
+        "sql": "SELECT * FROM daily_responses WHERE user_id = :user_id AND timestamp >= :cutoff",
+    },
+    {
+        "name": "behavior_signals window",
+        "indexes": ["ix_behavior_signals_user_id_timestamp"],
+        "sql": "SELECT * FROM behavior_signals WHERE user_id = :user_id AND timestamp >= :cutoff",
+    },
+    {
+        "name": "risk_analyses by day",
+        "indexes": ["uq_risk_analyses_user_date", "sqlite_autoindex_risk_analyses"],
+        "sql": "SELECT * FROM risk_analyses WHERE user_id = :user_id AND date >= :cutoff_day",
+    },
+    {
+        "name": "user_daily_stats window",
+        "indexes": ["uq_user_daily_stats_user_date", "sqlite_autoindex_user_daily_stats"],
+        "sql": "SELECT * FROM user_daily_stats WHERE user_id = :user_id AND date >= :cutoff_day",
+    },
+    {
+        "name": "behavior_signal_daily range",
+        "indexes": ["uq_behavior_signal_daily_user_date_type", "sqlite_autoindex_behavior_signal_daily"],
+        "sql": "SELECT * FROM behavior_signal_daily WHERE user_id = :user_id AND date >= :cutoff_day",
+    },
+]
+
+
+def _config(connection: Connection) -> Config:
+    cfg = Config(os.path.join(BACKEND_DIR, "alembic.ini"))
+    cfg.attributes["connection"] = connection
+    return cfg
+
+
+def _legacy_revision(connection: Connection) -> Optional[str]:
+    """Revision matching a schema built by create_all, or None if already versioned/empty."""
+    tables = set(inspect(connection).get_table_names())
+    if "alembic_version" in tables or "users" not in tables:
+        return None
+    return "0002" if "user_daily_stats" in tables else "0001"
+
+
+def upgrade(engine: Optional[Engine] = None, revision: str = "head"):
+    """Bring the database schema up to `revision` in a single transaction."""
+    engine = engine or default_engine
+    with engine.begin() as connection:
+        cfg = _config(connection)
+        legacy = _legacy_revision(connection)
+        if legacy:
+            command.stamp(cfg, legacy)
+        command.upgrade(cfg, revision)
+
+
+def head_revision() -> str:
+    return ScriptDirectory.from_config(_config(None)).get_current_head()
+
+
+def current_revision(engine: Optional[Engine] = None) -> Optional[str]:
+    engine = engine or default_engine
+    with engine.connect() as connection:
+        return MigrationContext.configure(connection).get_current_revision()
+
+
+def explain_hot_queries(engine: Optional[Engine] = None) -> List[dict]:
+    """
+    Run EXPLAIN on each hot query and report whether the planner picked the expected index.
+    On Postgres, sequential scans are disabled for the check so small tables don't hide a
+    missing index behind a cheaper seq scan.
+    """
+    engine = engine or default_engine
+    params = {
+        "user_id": 1,
+        "cutoff": datetime.utcnow() - timedelta(days=7),
+        "cutoff_day": (datetime.utcnow() - timedelta(days=7)).strftime("%Y-%m-%d"),
+    }
+    results = []
+    with engine.connect() as connection:
+        if connection.dialect.name == "sqlite":
+            prefix = "EXPLAIN QUERY PLAN "
+        else:
+            prefix = "EXPLAIN "
+            if connection.dialect.name == "postgresql":
+                connection.execute(text("SET LOCAL enable_seqscan = off"))
+        for query in HOT_QUERIES:
+            rows = connection.execute(text(prefix + query["sql"]), params).fetchall()
+            plan = "\n".join(" ".join(str(col) for col in row) for row in rows)
+            results.append({
+                "name": query["name"],
+                "index": query["indexes"][0],
+                "uses_index": any(name in plan for name in query["indexes"]),
+                "plan": plan,
+            })
+        connection.rollback()
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Manage the backend database schema.")
+    parser.add_argument("action", choices=["upgrade", "current", "explain"])
+    parser.add_argument("--revision", default="head", help="Target revision for upgrade (default: head)")
+    args = parser.parse_args(argv)
+
+    if args.action == "upgrade":
+        print("🚀 Applying migrations...")
+        upgrade(revision=args.revision)
+        print(f"✅ Database at revision {current_revision()}")
+    elif args.action == "current":
+        current = current_revision()
+        print(f"{current or '(not versioned)'} (head: {head_revision()})")
+    else:
+        failed = 0
+        for result in explain_hot_queries():
+            mark = "✅" if result["uses_index"] else "❌"
+            print(f"{mark} {result['name']}: expects {result['index']}")
+            print("    " + result["plan"].replace("\n", "\n    "))
+            failed += not result["uses_index"]
+        return 1 if failed else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
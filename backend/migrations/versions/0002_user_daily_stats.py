@@ -0,0 +1,40 @@
+"""Per-user daily aggregates (user_daily_stats)
+
+Run `python -m backend.jobs.rebuild_aggregates` after upgrading an existing
+database to fill the table from raw history.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "user_daily_stats",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("date", sa.String(length=10), nullable=False),
+        sa.Column("answer_risk_sum", sa.Integer(), nullable=False),
+        sa.Column("answer_count", sa.Integer(), nullable=False),
+        sa.Column("signal_count", sa.Integer(), nullable=False),
+        sa.Column("late_night_count", sa.Integer(), nullable=False),
+        sa.Column("slow_response_count", sa.Integer(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "date", name="uq_user_daily_stats_user_date"),
+    )
+    op.create_index("ix_user_daily_stats_id", "user_daily_stats", ["id"])
+
+
+def downgrade():
+    op.drop_table("user_daily_stats")
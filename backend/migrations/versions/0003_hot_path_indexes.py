@@ -0,0 +1,36 @@
+"""Composite indexes for the per-user time-window queries
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_daily_responses_user_id_timestamp", "daily_responses", ["user_id", "timestamp"]),
+    ("ix_behavior_signals_user_id_timestamp", "behavior_signals", ["user_id", "timestamp"]),
+    ("ix_risk_analyses_user_id_date", "risk_analyses", ["user_id", "date"]),
+]
+
+
+def _existing(table):
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        # Skip indexes someone already added by hand on a legacy database
+        if name not in _existing(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
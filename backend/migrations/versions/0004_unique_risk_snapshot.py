@@ -0,0 +1,41 @@
+"""One risk_analyses snapshot per user per day
+
+Collapses existing duplicates to the latest row of each (user_id, date), then replaces
+the plain (user_id, date) index with a unique constraint so the dashboard can upsert.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "DELETE FROM risk_analyses WHERE id NOT IN ("
+        "SELECT keep_id FROM (SELECT MAX(id) AS keep_id FROM risk_analyses GROUP BY user_id, date) AS latest"
+        ")"
+    )
+    inspector = sa.inspect(op.get_bind())
+    indexes = {ix["name"] for ix in inspector.get_indexes("risk_analyses")}
+    constraints = {uc["name"] for uc in inspector.get_unique_constraints("risk_analyses")}
+    # migrate._legacy_revision stamps any create_all database at 0002; one built from models
+    # that already declared the unique constraint has it, and never had the plain index
+    with op.batch_alter_table("risk_analyses") as batch_op:
+        if "ix_risk_analyses_user_id_date" in indexes:
+            batch_op.drop_index("ix_risk_analyses_user_id_date")
+        if "uq_risk_analyses_user_date" not in constraints:
+            batch_op.create_unique_constraint("uq_risk_analyses_user_date", ["user_id", "date"])
+
+
+def downgrade():
+    with op.batch_alter_table("risk_analyses") as batch_op:
+        batch_op.drop_constraint("uq_risk_analyses_user_date", type_="unique")
+        batch_op.create_index("ix_risk_analyses_user_id_date", ["user_id", "date"])
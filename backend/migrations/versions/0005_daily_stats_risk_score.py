@@ -0,0 +1,42 @@
+"""Risk score on user_daily_stats for the calendar heatmap
+
+Adds user_daily_stats.risk_score and backfills it from the existing risk_analyses
+snapshots, adding empty stats rows for snapshot days that have none.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("user_daily_stats")}
+    # A create_all database stamped at 0002 already has the column if UserDailyStats declared it
+    if "risk_score" not in columns:
+        with op.batch_alter_table("user_daily_stats") as batch_op:
+            batch_op.add_column(sa.Column("risk_score", sa.Float(), nullable=True))
+
+    op.execute(
+        "INSERT INTO user_daily_stats "
+        "(user_id, date, answer_risk_sum, answer_count, signal_count, late_night_count, slow_response_count) "
+        "SELECT r.user_id, r.date, 0, 0, 0, 0, 0 FROM risk_analyses r "
+        "WHERE NOT EXISTS (SELECT 1 FROM user_daily_stats s WHERE s.user_id = r.user_id AND s.date = r.date)"
+    )
+    op.execute(
+        "UPDATE user_daily_stats SET risk_score = ("
+        "SELECT r.risk_score FROM risk_analyses r "
+        "WHERE r.user_id = user_daily_stats.user_id AND r.date = user_daily_stats.date)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("user_daily_stats") as batch_op:
+        batch_op.drop_column("risk_score")
@@ -0,0 +1,40 @@
+"""Daily per-type rollups of old behavior signals (behavior_signal_daily)
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_all already made the rollup table if the models had BehaviorSignalDaily; such a
+    # database is still stamped at 0002 by migrate._legacy_revision
+    if "behavior_signal_daily" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "behavior_signal_daily",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("date", sa.String(length=10), nullable=False),
+        sa.Column("type", sa.String(length=50), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("value_sum", sa.Float(), nullable=False),
+        sa.Column("value_max", sa.Float(), nullable=True),
+        sa.Column("slow_count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id", "date", "type", name="uq_behavior_signal_daily_user_date_type"),
+    )
+    op.create_index("ix_behavior_signal_daily_id", "behavior_signal_daily", ["id"])
+
+
+def downgrade():
+    op.drop_table("behavior_signal_daily")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import List, Optional, Any
 from datetime import datetime
 from enum import Enum
@@ -15,6 +15,37 @@ class BehaviorType(str, Enum):
     LATE_NIGHT_USAGE = "late_night_usage"   # Usage between 12AM-5AM
     MISSED_CHECKIN = "missed_checkin"       # Explicitly missed a day
 
+class QuestionPolarity(str, Enum):
+    POSITIVE = "positive"   # 5 = healthy ("How refreshed did you feel?")
+    NEGATIVE = "negative"   # 5 = high risk ("Did screens feel exhausting?")
+
+class HistoryResolution(str, Enum):
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+class HistoryAggregate(str, Enum):
+    LAST = "last"
+    MEAN = "mean"
+    MAX = "max"
+
+class HistorySeries(str, Enum):
+    RISK = "risk"       # Overall score from the daily snapshots
+    SLEEP = "sleep"     # Question categories
+    FOCUS = "focus"
+    MOOD = "mood"
+    ENERGY = "energy"
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+class ExportTable(str, Enum):
+    DAILY_RESPONSES = "daily_responses"
+    BEHAVIOR_SIGNALS = "behavior_signals"
+    BEHAVIOR_SIGNAL_DAILY = "behavior_signal_daily"   # Rollups of compacted signals
+    RISK_ANALYSES = "risk_analyses"
+
 # --- Shared Models ---
 
 class Token(BaseModel):
@@ -39,12 +70,18 @@ class User(UserBase):
 class UserInDB(User):
     hashed_password: str
 
+class UserPrincipal(User):
+    """The authenticated user as resolved from a verified access token."""
+    id: int
+
 # --- Data Models ---
 
 class Question(BaseModel):
     id: str
     text: str
     category: str  # Sleep, Focus, Mood, Energy
+    # Scoring metadata (see logic/scoring.py), not sent to clients
+    polarity: QuestionPolarity = Field(QuestionPolarity.POSITIVE, exclude=True)
 
 class DailyResponse(BaseModel):
     username: str
@@ -67,6 +104,22 @@ class BehaviorSignalSubmit(BaseModel):
     type: BehaviorType
     value: float
 
+class BehaviorSignalBatchItem(BehaviorSignalSubmit):
+    timestamp: Optional[datetime] = None # Client-side event time, defaults to receive time
+
+# Bulk import rows (logic/bulk_import.py): historical, so the event time is required
+class DailyResponseImport(DailyResponseSubmit):
+    answer_value: int = Field(ge=1, le=5)
+    timestamp: datetime
+    date: Optional[str] = Field(None, pattern=r"^\d{4}-\d{2}-\d{2}$")  # Check-in day, defaults to the timestamp's
+
+class BehaviorSignalImport(BehaviorSignalSubmit):
+    timestamp: datetime
+
+class BehaviorSignalBatchSubmit(BaseModel):
+    # Items are validated one by one so a single bad event doesn't reject the whole batch
+    signals: List[Any]
+
 class RiskAnalysis(BaseModel):
     username: str
     date: str
@@ -74,3 +127,16 @@ class RiskAnalysis(BaseModel):
     risk_score: float # 0-100
     insights: List[str]
     timestamp: datetime = datetime.now()
+
+class HistoryPoint(BaseModel):
+    date: str # First day of the bucket, YYYY-MM-DD
+    value: float # 0-100
+    samples: int # Days that had data in the bucket
+
+class RiskHistory(BaseModel):
+    series: HistorySeries
+    resolution: HistoryResolution
+    aggregate: HistoryAggregate
+    start: str
+    end: str
+    points: List[HistoryPoint]
@@ -0,0 +1,327 @@
+"""
+Per-user change notifications for the dashboard stream (GET /dashboard/stream).
+
+invalidate_risk publishes the user's id whenever their data changes. Every open stream
+for that user wakes up, recomputes through the dashboard cache (once per change, however
+many tabs are open) and pushes the new analysis.
+
+Subscriptions are local to the worker. Each one is an asyncio.Event, set on delivery,
+so a burst of writes coalesces into a single wakeup and an idle stream costs one parked
+coroutine. The broker carries publishes to the subscribers of every worker:
+
+- MemoryBroker delivers within this process. It is the default and covers one worker.
+- PostgresBroker uses LISTEN/NOTIFY on DATABASE_URL, so a write handled by any worker
+  reaches the streams held by all of them.
+
+Each worker caches analyses of its own, so every delivery first runs the hub's
+`on_change` hook (logic/analysis.py drops the cached analysis there) and a broker resync
+runs `on_resync`; otherwise a woken stream would be handed the stale cached result.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, Optional, Set
+
+from sqlalchemy.engine import make_url
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+Deliver = Callable[[int], None]
+
+
+class StreamLimitExceeded(Exception):
+    """Raised by `subscribe` when the worker or the user has no stream slots left."""
+
+    def __init__(self, detail: str, per_user: bool):
+        super().__init__(detail)
+        self.detail = detail
+        self.per_user = per_user
+
+
+class MemoryBroker:
+    """Publishes straight to this process's subscribers."""
+
+    async def start(self, deliver: Deliver, resync: Callable[[], None]):
+        self._deliver = deliver
+
+    def publish(self, user_id: int):
+        self._deliver(user_id)
+
+    async def stop(self):
+        pass
+
+
+class PostgresBroker:
+    """
+    NOTIFY on publish, LISTEN for everyone's publishes (including our own). Publishes
+    are queued and sent by one task over the dedicated connection, a batch per round trip.
+
+    A lost connection (reported by asyncpg's termination listener, or found by the idle
+    health check) is re-opened with exponential backoff and LISTEN is issued again.
+    Notifications sent meanwhile are gone, so every local stream is woken once reconnected
+    to re-check its user; publishes queued during the outage go out after reconnecting.
+    """
+
+    CHANNEL = "risk_updates"
+    HEALTH_CHECK_SECONDS = 30.0
+    RECONNECT_MIN_SECONDS = 0.5
+    RECONNECT_MAX_SECONDS = 30.0
+
+    def __init__(self, url: str):
+        self.dsn = make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._connection = None
+        self._pending: Set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.reconnects = 0
+
+    async def start(self, deliver: Deliver, resync: Callable[[], None]):
+        self._deliver = deliver
+        self._resync = resync
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        await self._connect()
+        self._task = asyncio.create_task(self._send())
+
+    async def _connect(self):
+        import asyncpg
+
+        connection = await asyncpg.connect(self.dsn)
+        await connection.add_listener(self.CHANNEL, self._listener)
+        connection.add_termination_listener(self._lost)
+        self._connection = connection
+
+    def _listener(self, connection, pid, channel, payload):
+        self._deliver(int(payload))
+
+    def _lost(self, connection):
+        """Termination listener; also called by the health check. Starts reconnecting once."""
+        if self._stopping or connection is not self._connection:
+            return
+        logger.warning("Lost the risk update LISTEN connection, reconnecting")
+        self._connection = None
+        self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self):
+        delay = self.RECONNECT_MIN_SECONDS
+        while not self._stopping:
+            await asyncio.sleep(delay)
+            try:
+                await self._connect()
+            except Exception as exc:
+                logger.warning("Reconnecting for risk updates failed (%s), retrying in %.1fs", exc, delay)
+                delay = min(delay * 2, self.RECONNECT_MAX_SECONDS)
+                continue
+            self.reconnects += 1
+            logger.info("Risk update LISTEN connection restored")
+            self._resync()
+            if self._pending:
+                self._wakeup.set()
+            return
+
+    def publish(self, user_id: int):
+        self._pending.add(user_id)
+        self._wakeup.set()
+
+    async def _send(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.HEALTH_CHECK_SECONDS)
+            except asyncio.TimeoutError:
+                await self._check()
+                continue
+            self._wakeup.clear()
+            connection = self._connection
+            if connection is None:
+                # Reconnecting; the queued ids are sent once the connection is back
+                continue
+            user_ids, self._pending = self._pending, set()
+            try:
+                await connection.execute(
+                    "SELECT pg_notify($1, user_id) FROM unnest($2::text[]) AS user_id",
+                    self.CHANNEL, [str(user_id) for user_id in user_ids],
+                )
+            except Exception:
+                if connection.is_closed():
+                    # Lost mid-send: keep them for after the reconnect
+                    self._pending |= user_ids
+                else:
+                    logger.exception("Failed to publish risk updates for %d users", len(user_ids))
+
+    async def _check(self):
+        """Catch connections that died without the socket being closed (no termination event)."""
+        connection = self._connection
+        if connection is None:
+            return
+        try:
+            await asyncio.wait_for(connection.fetchval("SELECT 1"), timeout=self.HEALTH_CHECK_SECONDS)
+        except Exception:
+            connection.terminate()
+            self._lost(connection)
+
+    async def stop(self):
+        self._stopping = True
+        for task in (self._task, self._reconnect_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._reconnect_task = None
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+BROKERS = ("memory", "postgres")
+
+
+def make_broker(name: str):
+    if name == "memory":
+        return MemoryBroker()
+    if name == "postgres":
+        return PostgresBroker(settings.DATABASE_URL)
+    raise ValueError(f"DASHBOARD_STREAM_BROKER must be one of {', '.join(BROKERS)}")
+
+
+class Subscription:
+    def __init__(self, hub: "UpdateHub", user_id: int):
+        self.hub = hub
+        self.user_id = user_id
+        self.event = asyncio.Event()
+        self.closed = False
+
+    async def wait(self, timeout: float) -> bool:
+        """True once the user's data changed (or the hub is stopping), False on timeout."""
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+
+    def close(self):
+        """Give the slot back. Safe to call more than once."""
+        if not self.closed:
+            self.closed = True
+            self.hub._unsubscribe(self)
+
+
+class UpdateHub:
+    def __init__(self, max_connections: int, max_per_user: int, broker=None):
+        self.max_connections = max_connections
+        self.max_per_user = max_per_user
+        self.broker = broker or MemoryBroker()
+        self._subscriptions: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._started = False
+        self.stopping = False
+        # Run before streams are woken: a delivery may come from another worker, whose
+        # write this worker's caches haven't seen
+        self.on_change: Optional[Deliver] = None
+        self.on_resync: Optional[Callable[[], None]] = None
+
+        # Counters
+        self.connections = 0
+        self.published_total = 0
+        self.delivered_total = 0
+        self.rejected_total = 0
+
+    async def start(self):
+        if self._started:
+            return
+        self._loop = asyncio.get_running_loop()
+        self.stopping = False
+        await self.broker.start(self._deliver, self._resync)
+        self._started = True
+
+    async def stop(self):
+        """Stop the broker and wake every stream so it can finish."""
+        self.stopping = True
+        if self._started:
+            await self.broker.stop()
+            self._started = False
+        self._wake_all()
+
+    def subscribe(self, user_id: int) -> Subscription:
+        if self.connections >= self.max_connections:
+            self.rejected_total += 1
+            raise StreamLimitExceeded("Too many open dashboard streams, retry later", per_user=False)
+        if len(self._subscriptions.get(user_id, ())) >= self.max_per_user:
+            self.rejected_total += 1
+            raise StreamLimitExceeded(
+                f"At most {self.max_per_user} open dashboard streams per user", per_user=True
+            )
+        if not self._started:
+            # Without start() this is the first sight of the loop the streams run on
+            self._loop = _running_loop() or self._loop
+        subscription = Subscription(self, user_id)
+        self._subscriptions[user_id].add(subscription)
+        self.connections += 1
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription):
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is not None and subscription in subscriptions:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.user_id]
+            self.connections -= 1
+
+    def publish(self, user_id: int):
+        """The user's data changed. Cheap when nobody is listening anywhere in this process."""
+        self.published_total += 1
+        # No broker running (e.g. CLI jobs, tests without startup): local streams only
+        target = self.broker.publish if self._started else self._deliver
+        loop = self._loop
+        if loop is not None and not loop.is_closed() and _running_loop() is not loop:
+            # From a threadpool thread: the events and the broker belong to the loop
+            loop.call_soon_threadsafe(target, user_id)
+            return
+        target(user_id)
+
+    def _deliver(self, user_id: int):
+        if self.on_change is not None:
+            self.on_change(user_id)
+        for subscription in self._subscriptions.get(user_id, ()):
+            subscription.event.set()
+            self.delivered_total += 1
+
+    def _resync(self):
+        """Updates may have been missed (the broker reconnected): forget and re-check everything."""
+        if self.on_resync is not None:
+            self.on_resync()
+        self._wake_all()
+
+    def _wake_all(self):
+        for subscriptions in self._subscriptions.values():
+            for subscription in subscriptions:
+                subscription.event.set()
+
+    def stats(self) -> dict:
+        return {
+            "connections": self.connections,
+            "users": len(self._subscriptions),
+            "published_total": self.published_total,
+            "delivered_total": self.delivered_total,
+            "rejected_total": self.rejected_total,
+        }
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+risk_updates = UpdateHub(
+    max_connections=settings.DASHBOARD_STREAM_MAX_CONNECTIONS,
+    max_per_user=settings.DASHBOARD_STREAM_MAX_PER_USER,
+    broker=make_broker(settings.DASHBOARD_STREAM_BROKER),
+)
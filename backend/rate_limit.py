@@ -0,0 +1,128 @@
+"""
+Per-user token-bucket rate limiting for the write endpoints.
+
+Each route has a limiter, and within it each user has a bucket that holds up to `burst`
+tokens and refills at `rate` tokens per second. A request takes one token. When the
+bucket is empty the request gets 429 with Retry-After set to when the next token arrives,
+before the handler touches the database.
+
+Buckets sit in an OrderedDict kept in last-use order, so a check is one lookup and a
+little arithmetic under a lock. Buckets idle long enough to have refilled are dropped
+from the old end as requests come in. Forgetting a full bucket changes nothing, so
+IDLE_SECONDS is raised to the refill time when it is shorter. Only such buckets are
+dropped: forgetting one that is still refilling would hand its user a full burst again.
+MAX_BUCKETS caps memory, so when every bucket is still refilling, users without a
+bucket share one overflow bucket until room frees up.
+
+Limits are per worker process: with N workers a client gets at most N times the rate.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+from fastapi import Depends, HTTPException, status
+
+from .config import settings
+from .metrics import registry
+from .models import UserPrincipal
+from .routers.auth import get_current_user
+
+throttled_requests = registry.counter(
+    "rate_limited_requests_total", "Requests answered 429 by the per-user rate limits.", ["route"]
+)
+
+
+class TokenBucketLimiter:
+    def __init__(self, rate: float, burst: int, idle_seconds: float, max_buckets: int):
+        self.rate = rate
+        self.burst = burst
+        self.idle_seconds = max(idle_seconds, burst / rate) if rate > 0 else idle_seconds
+        self.max_buckets = max_buckets
+        # key -> [tokens, last update (monotonic)], least recently used first
+        self._buckets: "OrderedDict[Hashable, list]" = OrderedDict()
+        # Shared by keys that arrive while max_buckets are all still refilling
+        self._overflow = [float(burst), 0.0]
+        self._lock = threading.Lock()
+
+        self.allowed = 0
+        self.throttled = 0
+        self.evictions = 0
+        self.overflowed = 0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def acquire(self, key: Hashable, now: Optional[float] = None) -> float:
+        """Take a token: 0.0 if one was available, otherwise the seconds until the next one."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._evict(now)
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                self._buckets.move_to_end(key)
+            elif len(self._buckets) < self.max_buckets:
+                bucket = self._buckets[key] = [float(self.burst), now]
+            else:
+                bucket = self._overflow
+                self.overflowed += 1
+            bucket[0] = min(float(self.burst), bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                self.allowed += 1
+                return 0.0
+            self.throttled += 1
+            return (1 - bucket[0]) / self.rate
+
+    def _evict(self, now: float):
+        """Drop buckets idle long enough to be full again, oldest first."""
+        buckets = self._buckets
+        while buckets:
+            _, updated = next(iter(buckets.values()))
+            if now - updated < self.idle_seconds:
+                break
+            buckets.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "buckets": len(self._buckets),
+            "allowed": self.allowed,
+            "throttled": self.throttled,
+            "evictions": self.evictions,
+            "overflowed": self.overflowed,
+        }
+
+
+# route name -> limiter, for the metrics collector and tests
+limiters: Dict[str, TokenBucketLimiter] = {}
+
+
+def rate_limit(route: str, rate: float, burst: int) -> Callable:
+    """
+    A dependency limiting each user to `rate` requests per second on `route`, with bursts of
+    up to `burst`. Use it in the route's `dependencies`. A rate of 0 turns the limit off.
+    """
+    limiter = limiters[route] = TokenBucketLimiter(
+        rate=rate,
+        burst=burst,
+        idle_seconds=settings.RATE_LIMIT_IDLE_SECONDS,
+        max_buckets=settings.RATE_LIMIT_MAX_BUCKETS,
+    )
+
+    async def check_rate_limit(current_user: UserPrincipal = Depends(get_current_user)):
+        if not settings.RATE_LIMIT_ENABLED or limiter.rate <= 0:
+            return
+        wait = limiter.acquire(current_user.id)
+        if wait:
+            throttled_requests.inc(route)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, slow down",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+
+    return check_rate_limit
@@ -1,28 +1,54 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta, datetime
 from typing import Optional
+import asyncio
 import jwt
 from jwt.exceptions import InvalidTokenError
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..cache import LRUCache
 from ..config import settings
-from ..models import Token, UserCreate, User
+from ..metrics import timed
+from ..models import Token, UserCreate, User, UserPrincipal
 from ..database import get_db
 from .. import db_models
 
 router = APIRouter()
 
-# Use pbkdf2_sha256 to avoid external bcrypt dependency during testing/dev
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Use pbkdf2_sha256 to avoid external bcrypt dependency during testing/dev.
+# Pinning min/max rounds to the configured cost makes verify_and_update flag older hashes.
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=settings.PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=settings.PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__max_rounds=settings.PASSWORD_HASH_ROUNDS,
+)
+# pbkdf2 runs in OpenSSL with the GIL released, so a small thread pool hashes in
+# parallel without blocking the event loop.
+hash_pool = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Verified principals keyed by user id (or username for tokens issued without a "uid" claim)
+principal_cache = LRUCache(
+    max_size=settings.PRINCIPAL_CACHE_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def run_in_hash_pool(func, *args):
+    """Run a blocking hashing call on the bounded hash pool."""
+    with timed("password_hash"):
+        return await asyncio.get_running_loop().run_in_executor(hash_pool, func, *args)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -36,56 +62,64 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
 # --- Endpoints ---
 
 @router.post("/register", response_model=Token)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     # Check if username already exists
-    existing_user = db.query(db_models.User).filter(db_models.User.username == user.username).first()
+    existing_user = await db.scalar(select(db_models.User).where(db_models.User.username == user.username))
     if existing_user:
         raise HTTPException(status_code=400, detail="Username already registered")
     
     # Check if email already exists (if provided)
     if user.email:
-        existing_email = db.query(db_models.User).filter(db_models.User.email == user.email).first()
+        existing_email = await db.scalar(select(db_models.User).where(db_models.User.email == user.email))
         if existing_email:
             raise HTTPException(status_code=400, detail="Email already registered")
     
     # Create new user
-    hashed_pw = get_password_hash(user.password)
+    hashed_pw = await run_in_hash_pool(get_password_hash, user.password)
     db_user = db_models.User(
         username=user.username,
         email=user.email,
         hashed_password=hashed_pw
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()  # The id comes back from the INSERT; sessions don't expire on commit
     
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": db_user.username, "uid": db_user.id}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/token", response_model=Token)
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     # Find user by username
-    user = db.query(db_models.User).filter(db_models.User.username == form_data.username).first()
+    user = await db.scalar(select(db_models.User).where(db_models.User.username == form_data.username))
+    
+    valid, new_hash = False, None
+    if user:
+        valid, new_hash = await run_in_hash_pool(pwd_context.verify_and_update, form_data.password, user.hashed_password)
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Transparently upgrade hashes made with a different work factor
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": form_data.username}, expires_delta=access_token_expires
+        data={"sub": user.username, "uid": user.id}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> UserPrincipal:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -94,20 +128,30 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username: str = payload.get("sub")
+        user_id: Optional[int] = payload.get("uid")
         if username is None:
             raise credentials_exception
-    except JWTError:
+    except InvalidTokenError:
         raise credentials_exception
     
+    cache_key = user_id if user_id is not None else username
+    principal = principal_cache.get(cache_key)
+    if principal is not None and principal.username == username:
+        return principal
+    
     # Query user from database
-    user = db.query(db_models.User).filter(db_models.User.username == username).first()
-    if user is None:
+    if user_id is not None:
+        user = await db.get(db_models.User, user_id)
+    else:
+        user = await db.scalar(select(db_models.User).where(db_models.User.username == username))
+    if user is None or user.username != username:
         raise credentials_exception
     
-    # Return as Pydantic model
-    return User(username=user.username, email=user.email)
+    principal = UserPrincipal(id=user.id, username=user.username, email=user.email)
+    principal_cache.set(cache_key, principal)
+    return principal
 
 @router.get("/me", response_model=User)
-async def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: UserPrincipal = Depends(get_current_user)):
     """Get current authenticated user"""
     return current_user
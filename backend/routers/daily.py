@@ -1,49 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
-from sqlalchemy.orm import Session
-from ..models import Question, DailyResponseSubmit, User
+from fastapi import APIRouter, Depends, Request
+from typing import Dict, List
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import Question, DailyResponseSubmit, UserPrincipal
 from ..logic.rotation import get_daily_questions
+from ..logic.aggregates import record_responses
+from ..logic.analysis import invalidate_risk
 from ..routers.auth import get_current_user
 from ..database import get_db
+from ..http_cache import Representation, not_modified, request_etag_matches
+from ..config import settings
+from ..rate_limit import rate_limit
 from .. import db_models
 import datetime
 
 router = APIRouter()
 
+# The rotation depends only on the date, so each day's questions are rendered once
+# (with their ETag) for everyone. Only today's entry is kept.
+_questions_by_day: Dict[datetime.date, Representation] = {}
+
+def _todays_questions(today: datetime.date) -> Representation:
+    representation = _questions_by_day.get(today)
+    if representation is None:
+        representation = Representation(get_daily_questions("", today))
+        _questions_by_day.clear()
+        _questions_by_day[today] = representation
+    return representation
+
 @router.get("/questions", response_model=List[Question])
-async def get_questions(current_user: User = Depends(get_current_user)):
+async def get_questions(request: Request, current_user: UserPrincipal = Depends(get_current_user)):
     """
     Get the 2 rotating questions for today.
+    Cacheable until the next rotation (local midnight); If-None-Match gives 304.
     """
-    questions = get_daily_questions(current_user.username)
-    return questions
+    now = datetime.datetime.now()
+    until_rotation = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time()) - now
+    cache_control = f"private, max-age={max(1, int(until_rotation.total_seconds()))}"
+
+    representation = _todays_questions(now.date())
+    if request_etag_matches(request, representation.etag):
+        return not_modified(representation.etag, cache_control)
+    return representation.response(cache_control)
 
-@router.post("/response")
+@router.post("/response", dependencies=[Depends(rate_limit(
+    "daily_response", settings.RATE_LIMIT_DAILY_RESPONSE_PER_SECOND, settings.RATE_LIMIT_DAILY_RESPONSE_BURST
+))])
 async def submit_response(
     response_data: DailyResponseSubmit, 
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Submit an answer to a daily question.
     """
-    # Get user from database
-    db_user = db.query(db_models.User).filter(db_models.User.username == current_user.username).first()
-    
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     # Create Response Object
     new_response = db_models.DailyResponse(
-        user_id=db_user.id,
+        user_id=current_user.id,
         date=datetime.date.today().strftime("%Y-%m-%d"),
         question_id=response_data.question_id,
-        answer_value=response_data.answer_value
+        answer_value=response_data.answer_value,
+        timestamp=datetime.datetime.utcnow()
     )
     
-    # Save to PostgreSQL
+    # Save to PostgreSQL, updating the daily aggregate in the same transaction
     db.add(new_response)
-    db.commit()
-    db.refresh(new_response)
+    await record_responses(db, [{
+        "user_id": new_response.user_id,
+        "question_id": new_response.question_id,
+        "answer_value": new_response.answer_value,
+        "timestamp": new_response.timestamp,
+    }])
+    await db.commit()
+    invalidate_risk(current_user.id)
     
     return {"status": "recorded", "message": "Response saved successfully", "id": new_response.id}
@@ -1,21 +1,149 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ..models import User
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from typing import AsyncIterator, Optional
+from datetime import date, datetime
+import time
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..config import settings
+from ..models import HistoryAggregate, HistoryResolution, HistorySeries, RiskHistory, UserPrincipal
 from ..routers.auth import get_current_user
-from ..database import get_db
-from .. import db_models
-from ..logic.analysis import calculate_risk
+from ..database import AsyncSessionLocal, get_db, get_read_db
+from ..http_cache import not_modified, request_etag_matches
+from ..logic.analysis import get_risk_representation, next_midnight, revalidate_risk
+from ..pubsub import StreamLimitExceeded, Subscription, risk_updates
+from ..logic.history import get_history, history_range
+from ..logic.aggregates import load_calendar
+from ..logic.rotation import QUESTIONS_PER_DAY
 
 router = APIRouter()
 
+# Any write can change the status, so clients revalidate on every poll (cheap with ETags)
+STATUS_CACHE_CONTROL = "private, no-cache"
+
 @router.get("/status")
 async def get_status(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Get the current burnout risk analysis for the user.
+    Send the last ETag in If-None-Match to get 304 Not Modified while it still holds.
+    Stays on the primary: it saves the daily snapshot, and a lagging replica
+    could put a stale score into the dashboard cache.
+    """
+    # Calculate risk analysis, served from the cache until the user writes new data.
+    # The ETag comes from the stored daily totals, so a 304 never costs a calculate_risk
+    # (or its snapshot write), even when this worker has nothing cached.
+    etag, representation = await revalidate_risk(
+        current_user, db, lambda etag: request_etag_matches(request, etag)
+    )
+    if representation is None:
+        return not_modified(etag, STATUS_CACHE_CONTROL)
+    return representation.response(STATUS_CACHE_CONTROL)
+
+async def _risk_events(subscription: Subscription, user: UserPrincipal, last_event_id: Optional[str]) -> AsyncIterator[bytes]:
+    """
+    An SSE `risk` event with the analysis whenever it changes, ids being its ETag, and a
+    comment line as heartbeat when nothing happened for a while. Idle streams hold no
+    DB connection: a session is only opened to recompute, and cache hits don't use it.
+    """
+    try:
+        etag = last_event_id
+        refresh_at = next_midnight()
+        changed = True
+        while not risk_updates.stopping:
+            if changed:
+                async with AsyncSessionLocal() as db:
+                    representation = await get_risk_representation(user, db)
+                if representation.etag != etag:
+                    etag = representation.etag
+                    yield b"event: risk\nid: " + etag.encode() + b"\ndata: " + representation.body + b"\n\n"
+            changed = await subscription.wait(settings.DASHBOARD_STREAM_HEARTBEAT_SECONDS)
+            if not changed:
+                # The 7-day window rolls over at midnight without any write
+                if time.time() >= refresh_at:
+                    changed = True
+                    refresh_at = next_midnight()
+                else:
+                    yield b": heartbeat\n\n"
+    finally:
+        subscription.close()
+
+@router.get("/stream")
+async def stream_status(
+    request: Request,
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """
+    Server-sent events with the user's risk analysis (the /status body): one right away,
+    then a new one each time their answers or signals change it.
+    Reconnecting with Last-Event-ID skips the first event if nothing changed meanwhile.
+    """
+    try:
+        subscription = risk_updates.subscribe(current_user.id)
+    except StreamLimitExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS if e.per_user else status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=e.detail,
+            headers={"Retry-After": str(max(1, round(settings.DASHBOARD_STREAM_HEARTBEAT_SECONDS)))}
+        )
+
+    return StreamingResponse(
+        _risk_events(subscription, current_user, request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+        # Frees the slot even if the client leaves before the stream starts
+        background=BackgroundTask(subscription.close)
+    )
+
+@router.get("/history", response_model=RiskHistory)
+async def get_risk_history(
+    start: Optional[date] = Query(None, alias="from", description="First day, defaults to 30 days before `to`"),
+    end: Optional[date] = Query(None, alias="to", description="Last day (inclusive), defaults to today"),
+    resolution: HistoryResolution = HistoryResolution.DAY,
+    aggregate: HistoryAggregate = HistoryAggregate.MEAN,
+    series: HistorySeries = HistorySeries.RISK,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get the user's risk history between two days, downsampled per day, week or month.
+    `series` selects the overall score or one question category.
+    """
+    try:
+        start, end = history_range(start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    points = await get_history(db, current_user.id, start, end, resolution, aggregate, series)
+    return {
+        "series": series,
+        "resolution": resolution,
+        "aggregate": aggregate,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "points": points,
+    }
+
+@router.get("/calendar")
+async def get_calendar(
+    year: Optional[int] = Query(None, ge=2000, le=9999, description="Defaults to the current year"),
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get one heatmap cell per active day of `year`: questions answered (out of
+    `questions_per_day`), late-night events and that day's risk score (null if none).
+    Days without any activity are omitted.
     """
-    # Calculate risk analysis (this function will need to be updated to use db)
-    analysis = calculate_risk(current_user.username, db)
-    return analysis
+    # UTC, like the user_daily_stats days it reads
+    year = year or datetime.utcnow().year
+    rows = await load_calendar(db, current_user.id, year)
+    return {
+        "year": year,
+        "questions_per_day": QUESTIONS_PER_DAY,
+        "fields": ["date", "answered", "late_night", "risk_score"],
+        "days": [list(row) for row in rows],
+    }
@@ -0,0 +1,62 @@
+import re
+from urllib.parse import quote
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from ..config import settings
+from ..models import ExportFormat, ExportTable, UserPrincipal
+from ..routers.auth import get_current_user
+from ..database import AsyncReadSessionLocal
+from ..logic.export import EXPORT_TABLES, csv_chunks, export_batches, gzip_chunks, ndjson_chunks
+
+router = APIRouter()
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv; charset=utf-8",
+}
+
+def _content_disposition(filename: str) -> str:
+    """
+    Headers are latin-1, so the name is sent twice: sanitized to ASCII for old clients,
+    and exactly, percent-encoded per RFC 5987, for everyone else.
+    """
+    fallback = re.sub(r"[^A-Za-z0-9._-]", "_", filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+async def _stream(user_id: int, format: ExportFormat, tables: List[ExportTable]):
+    # The session lives as long as the stream: dependency sessions are closed before
+    # a StreamingResponse starts sending
+    async with AsyncReadSessionLocal() as db:
+        batches = export_batches(db, user_id, tables, settings.EXPORT_BATCH_SIZE)
+        chunks = csv_chunks(batches) if format == ExportFormat.CSV else ndjson_chunks(batches)
+        async for chunk in chunks:
+            yield chunk
+
+@router.get("")
+async def export_history(
+    format: ExportFormat = ExportFormat.NDJSON,
+    tables: Optional[List[ExportTable]] = Query(None, description="Tables to include, defaults to all"),
+    gzip: bool = False,
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """
+    Download the user's complete history: answers, signals, signal rollups and risk snapshots.
+    Rows stream straight from the database in batches, so memory use stays flat
+    however long the history is. `gzip=true` compresses the stream (a .gz download).
+    """
+    tables = list(dict.fromkeys(tables)) if tables else list(EXPORT_TABLES)
+    filename = f"{current_user.username}-history.{format.value}"
+    body = _stream(current_user.id, format, tables)
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        body = gzip_chunks(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": _content_disposition(filename), "Cache-Control": "no-store"}
+    )
@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from typing import AsyncIterator, Optional
+from ..config import settings
+from ..models import ExportFormat, UserPrincipal
+from ..routers.auth import get_current_user
+from ..database import engine
+from ..logic.analysis import invalidate_risk
+from ..logic.bulk_import import BulkImporter
+
+router = APIRouter()
+
+class BodyTooLarge(Exception):
+    pass
+
+async def _lines(request: Request, max_bytes: int) -> AsyncIterator[str]:
+    """
+    The request body split into lines as it arrives. Bytes that aren't UTF-8 are kept
+    as surrogates, and the parser rejects those lines (see bulk_import.valid_utf8).
+    Raises BodyTooLarge once more than `max_bytes` arrived, whatever Content-Length said.
+    """
+    pending = b""
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            raise BodyTooLarge
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8", "surrogateescape") + "\n"
+    if pending:
+        yield pending.decode("utf-8", "surrogateescape")
+
+@router.post("")
+async def import_history(
+    request: Request,
+    format: ExportFormat = ExportFormat.NDJSON,
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """
+    Bulk-import the user's historical answers and signals.
+    The request body is NDJSON or CSV in the /export format; it is read, validated and
+    written in chunks together with its aggregates, then daily snapshots are backfilled
+    for the imported days. Returns counts plus the first rejected rows with their line
+    numbers. Bodies over IMPORT_MAX_BYTES get 413.
+    """
+    def resolve_user(username: Optional[str]) -> int:
+        if username not in (None, current_user.username):
+            raise ValueError("username: can only import your own history")
+        return current_user.id
+
+    too_large = f"Import too large: at most {settings.IMPORT_MAX_BYTES} bytes per request"
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > settings.IMPORT_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=too_large)
+
+    # Database work is sync (COPY needs the driver connection) and runs in the threadpool
+    importer = BulkImporter(engine, format, resolve_user)
+    lines = []
+    truncated = False
+    try:
+        async for line in _lines(request, settings.IMPORT_MAX_BYTES):
+            lines.append(line)
+            if len(lines) >= settings.IMPORT_CHUNK_SIZE:
+                await run_in_threadpool(importer.feed_lines, lines)
+                lines = []
+    except BodyTooLarge:
+        # A body without (or with a wrong) Content-Length: chunks already written stay
+        truncated = True
+    if lines and not truncated:
+        await run_in_threadpool(importer.feed_lines, lines)
+
+    report = await run_in_threadpool(importer.finish)
+    invalidate_risk(current_user.id)
+    if truncated:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{too_large}; stopped there after importing {dict(report.imported)}"
+        )
+    return report.as_dict()
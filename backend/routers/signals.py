@@ -1,37 +1,167 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ..models import BehaviorSignalSubmit, User
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import date, datetime, timezone
+from ..config import settings
+from ..models import BehaviorSignalSubmit, BehaviorSignalBatchItem, BehaviorSignalBatchSubmit, BehaviorType, UserPrincipal
 from ..routers.auth import get_current_user
-from ..database import get_db
+from ..database import get_db, get_read_db, insert_returning_ids
 from .. import db_models
+from ..logic.aggregates import record_signals
+from ..logic.analysis import invalidate_risk
+from ..logic.history import history_range, load_signal_days
+from ..rate_limit import rate_limit
+from ..write_buffer import signal_buffer
 
 router = APIRouter()
 
-@router.post("/track")
+def _enqueue_or_reject(rows: list):
+    """Hand rows to the write-behind buffer, answering 503 when it is full."""
+    if not signal_buffer.offer(rows):
+        raise HTTPException(
+            status_code=503,
+            detail="Signal buffer is full, retry later",
+            headers={"Retry-After": str(max(1, round(signal_buffer.flush_interval)))}
+        )
+
+def _to_utc_naive(ts: datetime) -> datetime:
+    """Timestamps are stored as naive UTC, matching the column default."""
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+@router.post("/track", dependencies=[Depends(rate_limit(
+    "signals_track", settings.RATE_LIMIT_SIGNAL_TRACK_PER_SECOND, settings.RATE_LIMIT_SIGNAL_TRACK_BURST
+))])
 async def track_signal(
     signal_data: BehaviorSignalSubmit, 
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Track a passive behavioral signal (e.g., late night usage).
     """
-    # Get user from database
-    db_user = db.query(db_models.User).filter(db_models.User.username == current_user.username).first()
-    
-    if not db_user:
-        raise HTTPException(status_code=404, detail="User not found")
+    if settings.SIGNAL_WRITE_BEHIND:
+        _enqueue_or_reject([{
+            "user_id": current_user.id,
+            "type": signal_data.type.value,
+            "value": signal_data.value,
+            "timestamp": datetime.utcnow(),
+        }])
+        response.status_code = 202
+        return {"status": "accepted"}
     
     # Create signal object
     new_signal = db_models.BehaviorSignal(
-        user_id=db_user.id,
+        user_id=current_user.id,
         type=signal_data.type.value,  # Convert enum to string
-        value=signal_data.value
+        value=signal_data.value,
+        timestamp=datetime.utcnow()
     )
     
-    # Save to PostgreSQL
+    # Save to PostgreSQL, updating the daily aggregate in the same transaction
     db.add(new_signal)
-    db.commit()
-    db.refresh(new_signal)
+    await record_signals(db, [{
+        "user_id": new_signal.user_id,
+        "type": new_signal.type,
+        "value": new_signal.value,
+        "timestamp": new_signal.timestamp,
+    }])
+    await db.commit()
+    invalidate_risk(current_user.id)
     
     return {"status": "recorded", "id": new_signal.id}
+
+@router.post("/track/batch", dependencies=[Depends(rate_limit(
+    "signals_track_batch", settings.RATE_LIMIT_SIGNAL_BATCH_PER_SECOND, settings.RATE_LIMIT_SIGNAL_BATCH_BURST
+))])
+async def track_signal_batch(
+    batch: BehaviorSignalBatchSubmit,
+    response: Response,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Track many behavioral signals in one request.
+    Valid items are written with a single bulk insert; invalid ones are reported per index.
+    """
+    if len(batch.signals) > settings.SIGNAL_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: at most {settings.SIGNAL_BATCH_MAX_SIZE} signals per request"
+        )
+
+    received_at = datetime.utcnow()
+    results = []
+    rows = []
+
+    for index, raw in enumerate(batch.signals):
+        try:
+            item = BehaviorSignalBatchItem.model_validate(raw)
+        except ValidationError as e:
+            error = e.errors()[0]
+            field = ".".join(str(part) for part in error["loc"])
+            results.append({"index": index, "status": "rejected", "error": f"{field}: {error['msg']}" if field else error["msg"]})
+            continue
+
+        rows.append({
+            "user_id": current_user.id,
+            "type": item.type.value,
+            "value": item.value,
+            "timestamp": _to_utc_naive(item.timestamp) if item.timestamp else received_at,
+        })
+        results.append({"index": index, "status": "recorded"})
+
+    if rows and settings.SIGNAL_WRITE_BEHIND:
+        _enqueue_or_reject(rows)
+        for result in results:
+            if result["status"] == "recorded":
+                result["status"] = "accepted"
+        response.status_code = 202
+        return {
+            "status": "accepted",
+            "accepted": len(rows),
+            "rejected": len(results) - len(rows),
+            "results": results
+        }
+
+    if rows:
+        # One multi-row INSERT ... RETURNING, committed as a single transaction
+        ids = await insert_returning_ids(db, db_models.BehaviorSignal, rows)
+        await record_signals(db, rows)
+        await db.commit()
+        invalidate_risk(current_user.id)
+
+        recorded = iter(ids)
+        for result in results:
+            if result["status"] == "recorded":
+                result["id"] = next(recorded)
+
+    return {
+        "status": "recorded",
+        "recorded": len(rows),
+        "rejected": len(results) - len(rows),
+        "results": results
+    }
+
+@router.get("/history")
+async def get_signal_history(
+    start: Optional[date] = Query(None, alias="from", description="First day, defaults to 30 days before `to`"),
+    end: Optional[date] = Query(None, alias="to", description="Last day (inclusive), defaults to today"),
+    type: Optional[BehaviorType] = None,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get per-day signal counts, sums and maxima by type (UTC days).
+    Days past the retention horizon are served from their daily rollups.
+    """
+    try:
+        start, end = history_range(start, end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    days = await load_signal_days(db, current_user.id, start, end, type.value if type else None)
+    return {"start": start.isoformat(), "end": end.isoformat(), "days": days}
@@ -0,0 +1,205 @@
+"""
+Tests for risk analysis and the daily aggregates it reads.
+"""
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from backend.database import SessionLocal
+from backend import db_models
+from backend.jobs.nightly_risk import score_all_users
+from backend.logic.aggregates import rebuild
+from backend.logic.analysis import dashboard_cache
+
+
+def _user_id(client, headers):
+    username = client.get("/auth/me", headers=headers).json()["username"]
+    db = SessionLocal()
+    try:
+        return db.query(db_models.User).filter(db_models.User.username == username).first().id
+    finally:
+        db.close()
+
+
+def _stats(user_id):
+    db = SessionLocal()
+    try:
+        rows = db.query(db_models.UserDailyStats).filter(db_models.UserDailyStats.user_id == user_id).all()
+        return {
+            r.date: (r.answer_risk_sum, r.answer_count, r.signal_count, r.late_night_count, r.slow_response_count)
+            for r in rows
+        }
+    finally:
+        db.close()
+
+
+def test_status_without_data(client, auth_headers):
+    data = client.get("/dashboard/status", headers=auth_headers).json()
+    assert data["risk_score"] == 0.0
+    assert data["insights"] == ["Not enough data yet. Keep using the app!"]
+
+
+def test_status_scores_from_aggregates(client, auth_headers):
+    # m1 is negatively phrased (5 = high risk), s1 positively (1 = high risk)
+    client.post("/daily/response", json={"question_id": "m1", "answer_value": 5}, headers=auth_headers)
+    client.post("/daily/response", json={"question_id": "s1", "answer_value": 1}, headers=auth_headers)
+    client.post("/signals/track", json={"type": "late_night_usage", "value": 1.0}, headers=auth_headers)
+    client.post("/signals/track/batch", json={"signals": [
+        {"type": "response_delay", "value": 15.0},
+        {"type": "response_delay", "value": 3.0},
+        {"type": "app_open", "value": 1.0},
+    ]}, headers=auth_headers)
+
+    user_id = _user_id(client, auth_headers)
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+    assert _stats(user_id) == {today: (10, 2, 4, 1, 1)}
+
+    data = client.get("/dashboard/status", headers=auth_headers).json()
+    # avg input risk 5 -> 100, capped at 100 after the 1.5 behavior penalty
+    assert data["risk_score"] == 100.0
+    assert data["risk_level"] == "High"
+
+    # The snapshot and its calendar copy are keyed by the same UTC day as the counters
+    assert data["date"] == today
+    db = SessionLocal()
+    try:
+        snapshot = db.query(db_models.RiskAnalysis).filter(db_models.RiskAnalysis.user_id == user_id).one()
+        assert snapshot.date == today
+        row = db.query(db_models.UserDailyStats).filter(db_models.UserDailyStats.user_id == user_id).one()
+        assert row.date == today and row.risk_score == 100.0
+    finally:
+        db.close()
+
+
+def test_status_ignores_days_outside_window(client, auth_headers):
+    user_id = _user_id(client, auth_headers)
+    old_day = (datetime.utcnow() - timedelta(days=10)).strftime("%Y-%m-%d")
+    db = SessionLocal()
+    try:
+        db.add(db_models.UserDailyStats(
+            user_id=user_id, date=old_day, answer_risk_sum=5, answer_count=1,
+            signal_count=0, late_night_count=0, slow_response_count=0
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+    data = client.get("/dashboard/status", headers=auth_headers).json()
+    assert data["insights"] == ["Not enough data yet. Keep using the app!"]
+
+
+def test_rebuild_matches_incremental_aggregates(client, auth_headers):
+    client.post("/daily/response", json={"question_id": "e2", "answer_value": 2}, headers=auth_headers)
+    client.post("/daily/response", json={"question_id": "f2", "answer_value": 4}, headers=auth_headers)
+    client.post("/signals/track/batch", json={"signals": [
+        {"type": "late_night_usage", "value": 1.0, "timestamp": "2024-03-01T02:00:00"},
+        {"type": "response_delay", "value": 11.0, "timestamp": "2024-03-01T02:05:00"},
+        {"type": "response_delay", "value": 30.0},
+    ]}, headers=auth_headers)
+
+    user_id = _user_id(client, auth_headers)
+    incremental = _stats(user_id)
+    assert incremental["2024-03-01"] == (0, 0, 2, 1, 1)
+
+    db = SessionLocal()
+    try:
+        assert rebuild(db, user_id=user_id) == 2
+    finally:
+        db.close()
+    assert _stats(user_id) == incremental
+
+
+def _snapshots(user_id):
+    db = SessionLocal()
+    try:
+        return [
+            (r.id, r.date, r.risk_score, r.timestamp)
+            for r in db.query(db_models.RiskAnalysis).filter(db_models.RiskAnalysis.user_id == user_id)
+        ]
+    finally:
+        db.close()
+
+
+def test_status_keeps_one_snapshot_per_day(client, auth_headers):
+    client.post("/daily/response", json={"question_id": "s2", "answer_value": 3}, headers=auth_headers)
+    user_id = _user_id(client, auth_headers)
+
+    client.get("/dashboard/status", headers=auth_headers)
+    first = _snapshots(user_id)
+    assert len(first) == 1
+    assert first[0][2] == 50.0
+
+    # Polling without new data leaves the row untouched
+    client.get("/dashboard/status", headers=auth_headers)
+    client.get("/dashboard/status", headers=auth_headers)
+    assert _snapshots(user_id) == first
+
+    # A changed score updates the same row in place
+    client.post("/daily/response", json={"question_id": "s2", "answer_value": 5}, headers=auth_headers)
+    client.get("/dashboard/status", headers=auth_headers)
+    updated = _snapshots(user_id)
+    assert len(updated) == 1
+    assert updated[0][0] == first[0][0]
+    assert updated[0][2] == 75.0
+
+
+def test_status_is_cached_until_new_data(client, auth_headers):
+    client.post("/daily/response", json={"question_id": "m2", "answer_value": 4}, headers=auth_headers)
+    first = client.get("/dashboard/status", headers=auth_headers).json()
+
+    hits = dashboard_cache.hits
+    assert client.get("/dashboard/status", headers=auth_headers).json() == first
+    assert dashboard_cache.hits == hits + 1
+
+    # Writing a signal invalidates the user's entry
+    client.post("/signals/track", json={"type": "late_night_usage", "value": 1.0}, headers=auth_headers)
+    second = client.get("/dashboard/status", headers=auth_headers).json()
+    assert dashboard_cache.hits == hits + 1
+    assert second["risk_score"] == first["risk_score"] + 10
+
+
+def test_nightly_job_matches_calculate_risk(client):
+    # Low, Medium and High users, one with the late-night insight, one with no data
+    scenarios = [
+        ([("s1", 5), ("m1", 2)], []),
+        ([("s2", 3), ("f1", 3)], [("late_night_usage", 1.0), ("response_delay", 12.0)]),
+        ([("e1", 5)], [("late_night_usage", 1.0)] * 3),
+        ([], [("response_delay", 11.0), ("app_open", 1.0)]),
+        ([], []),
+    ]
+    users = []
+    for answers, signals in scenarios:
+        username = f"user_{uuid.uuid4().hex[:12]}"
+        token = client.post("/auth/register", json={"username": username, "password": "testpass123"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        for question_id, value in answers:
+            client.post("/daily/response", json={"question_id": question_id, "answer_value": value}, headers=headers)
+        if signals:
+            client.post("/signals/track/batch", json={"signals": [
+                {"type": signal_type, "value": value} for signal_type, value in signals
+            ]}, headers=headers)
+        users.append((_user_id(client, headers), client.get("/dashboard/status", headers=headers).json()))
+
+    # Drop the snapshots the dashboard wrote so the job has to produce them itself
+    db = SessionLocal()
+    try:
+        db.query(db_models.RiskAnalysis).filter(
+            db_models.RiskAnalysis.user_id.in_([user_id for user_id, _ in users])
+        ).delete(synchronize_session=False)
+        db.commit()
+        assert score_all_users(db) >= len(users) - 1
+        snapshots = {
+            r.user_id: r for r in db.query(db_models.RiskAnalysis).filter(
+                db_models.RiskAnalysis.user_id.in_([user_id for user_id, _ in users])
+            )
+        }
+    finally:
+        db.close()
+
+    for user_id, status in users[:-1]:
+        snapshot = snapshots[user_id]
+        assert (snapshot.date, snapshot.risk_level, snapshot.risk_score, json.loads(snapshot.insights)) == (
+            status["date"], status["risk_level"], status["risk_score"], status["insights"]
+        )
+    assert users[-1][0] not in snapshots
+    assert {status["risk_level"] for _, status in users[:-1]} == {"Low", "Medium", "High"}
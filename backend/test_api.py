@@ -4,8 +4,14 @@ This file uses pytest-style assertions and a fixture to provide an access token.
 """
 from fastapi.testclient import TestClient
 import pytest
+import jwt
+from passlib.context import CryptContext
 
 from backend.main import app
+from backend.config import settings
+from backend.database import SessionLocal
+from backend import db_models
+from backend.routers.auth import create_access_token, principal_cache
 
 client = TestClient(app)
 
@@ -71,5 +77,58 @@ def test_get_current_user(token):
     assert data.get("username") == "testuser" or "email" in data
 
 
+
+def test_token_carries_user_id(token):
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    assert payload["sub"] == "testuser"
+    assert isinstance(payload["uid"], int)
+
+
+def test_principal_is_cached_between_requests(token):
+    headers = {"Authorization": f"Bearer {token}"}
+    client.get("/auth/me", headers=headers)
+    hits = principal_cache.hits
+    response = client.get("/auth/me", headers=headers)
+    assert response.status_code == 200
+    assert principal_cache.hits == hits + 1
+
+
+def test_token_without_user_id_still_accepted(token):
+    legacy = create_access_token({"sub": "testuser"})
+    response = client.get("/auth/me", headers={"Authorization": f"Bearer {legacy}"})
+    assert response.status_code == 200
+    assert response.json()["username"] == "testuser"
+
+
+def test_invalid_token_rejected():
+    response = client.get("/auth/me", headers={"Authorization": "Bearer not-a-jwt"})
+    assert response.status_code == 401
+
+
+
+def test_login_rehashes_outdated_password_hash():
+    outdated = CryptContext(schemes=["pbkdf2_sha256"], pbkdf2_sha256__default_rounds=1000).hash("oldpass123")
+    db = SessionLocal()
+    try:
+        db.add(db_models.User(username="legacyhash", hashed_password=outdated))
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.post("/auth/token", data={"username": "legacyhash", "password": "oldpass123"})
+    assert response.status_code == 200
+
+    db = SessionLocal()
+    try:
+        stored = db.query(db_models.User).filter(db_models.User.username == "legacyhash").one().hashed_password
+    finally:
+        db.close()
+    assert stored != outdated
+    assert stored.split("$")[2] == str(settings.PASSWORD_HASH_ROUNDS)
+    # The upgraded hash still verifies
+    assert client.post("/auth/token", data={"username": "legacyhash", "password": "oldpass123"}).status_code == 200
+    assert client.post("/auth/token", data={"username": "legacyhash", "password": "wrong"}).status_code == 401
+
+
 if __name__ == "__main__":
     print("Run using pytest: `python -m pytest backend/test_api.py -q`")
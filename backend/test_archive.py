@@ -0,0 +1,127 @@
+"""
+Tests for the analytics archive (logic/archive.py and jobs/archive_history.py).
+"""
+import os
+import uuid
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pytest
+
+from backend.database import SessionLocal
+from backend.jobs import archive_history
+from backend.logic.archive import HistoryArchive, archive_table, read_state
+from backend import db_models
+
+
+def _user(db):
+    user = db_models.User(username=f"user_{uuid.uuid4().hex[:12]}", hashed_password="x")
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+def _add_signals(db, user_id, days, per_day=3, end=datetime(2024, 3, 10, 12)):
+    for offset in range(days):
+        for i in range(per_day):
+            db.add(db_models.BehaviorSignal(
+                user_id=user_id, type="response_delay", value=float(offset * 10 + i),
+                timestamp=end - timedelta(days=offset, minutes=i),
+            ))
+    db.commit()
+
+
+def test_archive_appends_new_rows_by_day(tmp_path):
+    root = str(tmp_path)
+    db = SessionLocal()
+    try:
+        user_id = _user(db)
+        _add_signals(db, user_id, days=3)
+        first = archive_table(db, root, "behavior_signals", chunk_size=4)
+        assert first["archived"] >= 9
+        assert read_state(root)["behavior_signals"] == first["high_water_mark"]
+
+        # Nothing new, nothing written
+        assert archive_table(db, root, "behavior_signals", chunk_size=4)["archived"] == 0
+
+        # Another day, plus a late row for a day that's already archived
+        _add_signals(db, user_id, days=1, end=datetime(2024, 3, 11, 12))
+        _add_signals(db, user_id, days=1, per_day=1, end=datetime(2024, 3, 8, 23))
+        second = archive_table(db, root, "behavior_signals", chunk_size=4)
+        assert second["archived"] == 4
+    finally:
+        db.close()
+
+    archive = HistoryArchive(root)
+    assert {date(2024, 3, d) for d in (8, 9, 10, 11)} <= set(archive.days("behavior_signals"))
+
+    signals = archive.load("behavior_signals", date(2024, 3, 8), date(2024, 3, 11))
+    mine = signals["user_id"] == user_id
+    assert mine.sum() == 13
+    assert len(set(signals["id"][mine])) == 13
+    assert signals["timestamp"].dtype == np.dtype("datetime64[us]")
+    assert sorted(signals["value"][mine & (signals["timestamp"] < np.datetime64("2024-03-09"))]) == [0.0, 20.0, 21.0, 22.0]
+
+    # A single part comes back memory-mapped; just the columns asked for
+    one_day = archive.load("behavior_signals", date(2024, 3, 11), date(2024, 3, 11), ["value"])
+    assert list(one_day) == ["value"]
+    assert isinstance(one_day["value"], np.memmap)
+
+    empty = archive.load("behavior_signals", date(2000, 1, 1), date(2000, 1, 2))
+    assert all(len(values) == 0 for values in empty.values())
+    with pytest.raises(ValueError):
+        archive.load("behavior_signals", date(2024, 3, 8), date(2024, 3, 11), ["nope"])
+    with pytest.raises(ValueError):
+        archive.days("risk_analyses")
+
+
+def test_crashed_run_leaves_no_duplicates(tmp_path):
+    root = str(tmp_path)
+    db = SessionLocal()
+    try:
+        user_id = _user(db)
+        _add_signals(db, user_id, days=2, end=datetime(2024, 4, 2, 12))
+        archive_table(db, root, "behavior_signals", chunk_size=100000)
+        mark = read_state(root)["behavior_signals"]
+
+        # Parts written past the mark by a run that died before saving it
+        orphan = os.path.join(root, "behavior_signals", "2024-04-02", f"{mark + 1:012d}")
+        os.makedirs(orphan)
+        np.save(os.path.join(orphan, "id.npy"), np.array([mark + 1]))
+        os.makedirs(os.path.join(root, "behavior_signals", "2024-04-02", f"{mark + 5:012d}.tmp"))
+
+        _add_signals(db, user_id, days=1, per_day=2, end=datetime(2024, 4, 2, 18))
+        archive_table(db, root, "behavior_signals", chunk_size=100000)
+    finally:
+        db.close()
+
+    parts = os.listdir(os.path.join(root, "behavior_signals", "2024-04-02"))
+    assert all(part.isdigit() for part in parts)
+    # The first run's part and the rerun's; the orphan's stray column is gone
+    assert len(parts) == 2
+    signals = HistoryArchive(root).load("behavior_signals", date(2024, 4, 2), date(2024, 4, 2))
+    mine = signals["user_id"] == user_id
+    assert mine.sum() == 5
+    assert len(set(signals["id"])) == len(signals["id"])
+
+
+def test_archive_cli(tmp_path, capsys):
+    db = SessionLocal()
+    try:
+        user_id = _user(db)
+        db.add(db_models.DailyResponse(
+            user_id=user_id, date="2024-05-01", question_id="m1", answer_value=4, timestamp=datetime(2024, 5, 1, 9),
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+    assert archive_history.main(["--dir", str(tmp_path), "--tables", "daily_responses"]) == 0
+    assert "daily_responses: archived" in capsys.readouterr().out
+    assert not os.path.exists(tmp_path / "behavior_signals")
+
+    responses = HistoryArchive(str(tmp_path)).load("daily_responses", date(2024, 5, 1), date(2024, 5, 1))
+    mine = responses["user_id"] == user_id
+    assert responses["question_id"][mine].tolist() == ["m1"]
+    assert responses["answer_value"][mine].tolist() == [4]
+    assert responses["date"][mine].tolist() == ["2024-05-01"]
@@ -0,0 +1,30 @@
+"""
+Tests for the benchmark result helpers.
+"""
+from backend.benchmarks.stats import compare, summarize
+
+
+def _run(p95_ms, requests_per_second):
+    return {"endpoints": {"dashboard_status": {
+        "p50_ms": 2.0, "p95_ms": p95_ms, "p99_ms": 10.0, "requests_per_second": requests_per_second,
+    }}}
+
+
+def test_summarize_reports_percentiles():
+    result = summarize([i / 1000 for i in range(1, 101)], elapsed=2.0, errors=1)
+    assert result["requests"] == 100
+    assert result["requests_per_second"] == 50.0
+    assert result["p50_ms"] == 51.0
+    assert result["p99_ms"] == 99.0
+    assert result["max_ms"] == 100.0
+    assert result["errors"] == 1
+
+
+def test_compare_flags_regressions_beyond_threshold():
+    rows = compare(_run(5.0, 100.0), _run(6.0, 95.0), threshold=0.10)
+    flagged = {row["metric"] for row in rows if row["regression"]}
+    # p95 got 20% slower; throughput dropped only 5%
+    assert flagged == {"p95_ms"}
+
+    rows = compare(_run(5.0, 100.0), _run(4.0, 150.0), threshold=0.10)
+    assert not any(row["regression"] for row in rows)
@@ -0,0 +1,64 @@
+"""
+Tests for the in-process LRU + TTL cache.
+"""
+import time
+
+from backend.cache import LRUCache
+
+
+def test_lru_eviction():
+    cache = LRUCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_and_explicit_expiry():
+    cache = LRUCache(max_size=10, ttl_seconds=0.05)
+    cache.set("a", 1)
+    cache.set("b", 2, expires_at=time.time() - 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    time.sleep(0.06)
+    assert cache.get("a") is None
+
+
+def test_invalidation_rejects_stale_results():
+    cache = LRUCache(max_size=10, ttl_seconds=60)
+    version = cache.version("user")
+    cache.invalidate("user")  # A write landed while the result was being computed
+    assert cache.set("user", "stale", version=version) is False
+    assert cache.get("user") is None
+
+    assert cache.set("user", "fresh", version=cache.version("user")) is True
+    assert cache.get("user") == "fresh"
+
+
+def test_evicted_tombstone_keeps_rejecting_stale_results():
+    cache = LRUCache(max_size=1, ttl_seconds=60)
+    version = cache.version("user")
+    cache.invalidate("user")
+    cache.set("other", 1)  # Evicts the tombstone
+    assert len(cache) == 1
+    assert cache.set("user", "stale", version=version) is False
+
+    version = cache.version("user")
+    cache.invalidate("user")
+    cache.clear()
+    assert cache.set("user", "stale", version=version) is False
+    assert cache.set("user", "fresh", version=cache.version("user")) is True
+
+
+def test_hit_miss_counters():
+    cache = LRUCache(max_size=10, ttl_seconds=60)
+    cache.get("a")
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("a")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["hit_ratio"] == 0.6667
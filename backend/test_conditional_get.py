@@ -0,0 +1,72 @@
+"""
+ETag / If-None-Match handling for /daily/questions and /dashboard/status.
+"""
+import uuid
+
+from backend.metrics import section_duration
+
+
+def test_questions_etag_is_shared_and_revalidates(client, auth_headers, query_budget):
+    first = client.get("/daily/questions", headers=auth_headers)
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"].startswith("private, max-age=")
+
+    other_user = client.post("/auth/register", json={"username": f"user_{uuid.uuid4().hex[:12]}", "password": "testpass123"})
+    other_headers = {"Authorization": f"Bearer {other_user.json()['access_token']}"}
+    assert client.get("/daily/questions", headers=other_headers).headers["etag"] == etag
+
+    with query_budget(0):
+        cached = client.get("/daily/questions", headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    stale = client.get("/daily/questions", headers={**auth_headers, "If-None-Match": '"stale"'})
+    assert stale.status_code == 200
+    assert stale.json() == first.json()
+
+
+def test_status_304_skips_calculate_risk(client, auth_headers):
+    client.post("/daily/response", json={"question_id": "m2", "answer_value": 4}, headers=auth_headers)
+    first = client.get("/dashboard/status", headers=auth_headers)
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    runs = section_duration.count("calculate_risk")
+    # Weak validators and lists of candidates match too
+    for header in (etag, f"W/{etag}", f'"other", {etag}'):
+        cached = client.get("/dashboard/status", headers={**auth_headers, "If-None-Match": header})
+        assert cached.status_code == 304
+    assert section_duration.count("calculate_risk") == runs
+
+    # New data invalidates the cached result and with it the ETag
+    client.post("/signals/track", json={"type": "late_night_usage", "value": 1.0}, headers=auth_headers)
+    updated = client.get("/dashboard/status", headers={**auth_headers, "If-None-Match": etag})
+    assert updated.status_code == 200
+    assert updated.headers["etag"] != etag
+    assert updated.json()["risk_score"] == first.json()["risk_score"] + 10
+
+
+def test_status_304_without_cached_result(client, auth_headers, query_budget):
+    from backend.logic.analysis import dashboard_cache
+
+    client.post("/daily/response", json={"question_id": "m3", "answer_value": 4}, headers=auth_headers)
+    first = client.get("/dashboard/status", headers=auth_headers)
+    etag = first.headers["etag"]
+
+    # As after the cache TTL, or on a worker that never served this user
+    dashboard_cache.clear()
+    runs = section_duration.count("calculate_risk")
+    # Window read only: no scoring, no snapshot read or write
+    with query_budget(1):
+        cached = client.get("/dashboard/status", headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == etag
+    assert section_duration.count("calculate_risk") == runs
+
+    # The ETag is derived from the stored data, so recomputing gives the same one
+    dashboard_cache.clear()
+    recomputed = client.get("/dashboard/status", headers=auth_headers)
+    assert recomputed.headers["etag"] == etag
+    assert recomputed.json() == first.json()
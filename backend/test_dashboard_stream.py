@@ -0,0 +1,365 @@
+"""
+Tests for the dashboard event stream (GET /dashboard/stream) and its update hub.
+"""
+import asyncio
+import json
+import threading
+import uuid
+
+import httpx
+import pytest
+
+from backend.config import settings
+from backend.main import app
+from backend.pubsub import StreamLimitExceeded, UpdateHub, make_broker, risk_updates
+
+
+class EventStream:
+    """Drives the app at the ASGI level; clients that buffer whole responses can't read an endless stream."""
+
+    def __init__(self, headers: dict, last_event_id: str = None):
+        raw_headers = [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+        if last_event_id is not None:
+            raw_headers.append((b"last-event-id", last_event_id.encode()))
+        self.scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": "/dashboard/stream", "raw_path": b"/dashboard/stream",
+            "root_path": "", "query_string": b"", "headers": raw_headers,
+            "client": ("testclient", 50000), "server": ("testserver", 80),
+        }
+        self.status = None
+        self.headers = {}
+        self._chunks: asyncio.Queue = asyncio.Queue()
+        self._disconnected = asyncio.Event()
+        self._buffer = b""
+
+    async def _receive(self):
+        if not hasattr(self, "_sent_request"):
+            self._sent_request = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self._disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message):
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+            self.headers = {k.decode(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body":
+            await self._chunks.put(message.get("body", b""))
+            if not message.get("more_body", False):
+                await self._chunks.put(None)
+
+    async def open(self):
+        self.task = asyncio.create_task(app(self.scope, self._receive, self._send))
+        while self.status is None:
+            await asyncio.sleep(0.005)
+        return self
+
+    async def next_message(self, timeout: float = 2.0) -> str:
+        """The next SSE message (event or comment), without its blank-line terminator."""
+        while b"\n\n" not in self._buffer:
+            chunk = await asyncio.wait_for(self._chunks.get(), timeout)
+            if chunk is None:
+                raise EOFError
+            self._buffer += chunk
+        message, self._buffer = self._buffer.split(b"\n\n", 1)
+        return message.decode()
+
+    async def close(self):
+        self._disconnected.set()
+        await asyncio.wait_for(self.task, 2.0)
+
+
+def _fields(message: str) -> dict:
+    return dict(line.split(": ", 1) for line in message.split("\n"))
+
+
+def _register():
+    async def register():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+            response = await client.post("/auth/register", json={
+                "username": f"user_{uuid.uuid4().hex[:12]}", "password": "testpass123",
+            })
+            return {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return asyncio.run(register())
+
+
+@pytest.fixture
+def headers():
+    return _register()
+
+
+def test_stream_pushes_analysis_on_changes(headers, monkeypatch):
+    monkeypatch.setattr(settings, "DASHBOARD_STREAM_HEARTBEAT_SECONDS", 0.1)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://testserver") as client:
+            stream = await EventStream(headers).open()
+            assert stream.status == 200
+            assert stream.headers["content-type"].startswith("text/event-stream")
+
+            first = _fields(await stream.next_message())
+            status = await client.get("/dashboard/status", headers=headers)
+            assert first["event"] == "risk"
+            assert first["id"] == status.headers["etag"]
+            assert first["data"] == status.text
+
+            # Idle: heartbeats only
+            assert await stream.next_message() == ": heartbeat"
+
+            response = await client.post("/daily/response", json={"question_id": "m1", "answer_value": 5}, headers=headers)
+            assert response.status_code == 200
+            message = await stream.next_message()
+            while message == ": heartbeat":
+                message = await stream.next_message()
+            second = _fields(message)
+            assert second["id"] != first["id"]
+            assert second["data"] == (await client.get("/dashboard/status", headers=headers)).text
+
+            assert risk_updates.connections == 1
+            await stream.close()
+            assert risk_updates.connections == 0
+
+    asyncio.run(scenario())
+
+
+def test_last_event_id_skips_unchanged_analysis(headers, monkeypatch):
+    monkeypatch.setattr(settings, "DASHBOARD_STREAM_HEARTBEAT_SECONDS", 0.05)
+
+    async def scenario():
+        stream = await EventStream(headers).open()
+        etag = _fields(await stream.next_message())["id"]
+        await stream.close()
+
+        stream = await EventStream(headers, last_event_id=etag).open()
+        assert await stream.next_message() == ": heartbeat"
+        await stream.close()
+
+    asyncio.run(scenario())
+
+
+def test_stream_limits(headers, monkeypatch):
+    monkeypatch.setattr(risk_updates, "max_per_user", 1)
+
+    async def scenario():
+        first = await EventStream(headers).open()
+        second = await EventStream(headers).open()
+        assert second.status == 429
+        assert "retry-after" in second.headers
+        await second.task
+        await first.close()
+
+        # The slot is free again
+        third = await EventStream(headers).open()
+        assert third.status == 200
+        await third.close()
+
+    asyncio.run(scenario())
+
+    hub = UpdateHub(max_connections=1, max_per_user=5)
+    hub.subscribe(1)
+    with pytest.raises(StreamLimitExceeded) as excinfo:
+        hub.subscribe(2)
+    assert not excinfo.value.per_user
+    assert hub.stats()["rejected_total"] == 1
+
+
+def test_hub_delivers_publishes_from_other_threads():
+    hub = UpdateHub(max_connections=10, max_per_user=5)
+
+    async def scenario():
+        await hub.start()
+        mine, other = hub.subscribe(1), hub.subscribe(2)
+        thread = threading.Thread(target=hub.publish, args=(1,))
+        thread.start()
+        thread.join()
+        assert await mine.wait(1.0)
+        assert not await other.wait(0.05)
+
+        # Stopping wakes every stream
+        await hub.stop()
+        assert hub.stopping
+        assert await other.wait(1.0)
+        mine.close()
+        mine.close()
+        assert hub.connections == 1
+
+    asyncio.run(scenario())
+    assert hub.stats()["delivered_total"] == 1
+
+
+def test_unstarted_hub_delivers_thread_publishes_on_the_loop():
+    hub = UpdateHub(max_connections=10, max_per_user=5)
+
+    async def scenario():
+        subscription = hub.subscribe(1)
+        loop = asyncio.get_running_loop()
+        set_on = []
+        real_set = subscription.event.set
+        subscription.event.set = lambda: (set_on.append(asyncio.get_running_loop()), real_set())
+        await asyncio.to_thread(hub.publish, 1)
+        assert await subscription.wait(1.0)
+        assert set_on == [loop]
+
+    asyncio.run(scenario())
+
+
+class FakeConnection:
+    """Just enough of an asyncpg connection: NOTIFY loops back to this connection's listeners."""
+
+    def __init__(self):
+        self.listeners = []
+        self.termination_listeners = []
+        self.sent = []
+        self.closed = False
+
+    async def add_listener(self, channel, callback):
+        self.listeners.append(callback)
+
+    def add_termination_listener(self, callback):
+        self.termination_listeners.append(callback)
+
+    async def execute(self, query, channel, payloads):
+        if self.closed:
+            raise ConnectionError("connection is closed")
+        self.sent.extend(payloads)
+        for payload in payloads:
+            for callback in self.listeners:
+                callback(self, 1, channel, payload)
+
+    def is_closed(self):
+        return self.closed
+
+    def drop(self):
+        """The server went away."""
+        self.closed = True
+        for callback in self.termination_listeners:
+            callback(self)
+
+    async def close(self):
+        self.drop()
+
+
+def test_postgres_broker_reconnects_and_listens_again(monkeypatch):
+    import asyncpg
+
+    connections, attempts = [], []
+
+    async def connect(dsn):
+        attempts.append(dsn)
+        if len(attempts) == 2:
+            raise OSError("connection refused")
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(asyncpg, "connect", connect)
+    broker = make_broker("postgres")
+    broker.RECONNECT_MIN_SECONDS = 0.01
+    hub = UpdateHub(max_connections=10, max_per_user=5, broker=broker)
+
+    async def scenario():
+        await hub.start()
+        mine, other = hub.subscribe(1), hub.subscribe(2)
+        hub.publish(1)
+        assert await mine.wait(1.0)
+
+        connections[0].drop()
+        hub.publish(1)  # Queued while reconnecting
+        # Every stream is woken once the connection is back, in case it missed updates
+        assert await other.wait(1.0)
+        assert broker.reconnects == 1 and len(attempts) == 3
+        await asyncio.sleep(0.05)
+        assert connections[1].sent == ["1"] and connections[1].listeners
+
+        await hub.stop()
+        assert len(attempts) == 3
+
+    asyncio.run(scenario())
+
+
+def test_notify_from_another_worker_pushes_fresh_analysis(headers, monkeypatch):
+    """Two hubs on one LISTEN connection stand in for two workers."""
+    import asyncpg
+    from datetime import datetime
+
+    from backend import db_models
+    from backend.database import SessionLocal
+
+    monkeypatch.setattr(settings, "DASHBOARD_STREAM_HEARTBEAT_SECONDS", 0.05)
+    connection = FakeConnection()
+
+    async def connect(dsn):
+        return connection
+
+    monkeypatch.setattr(asyncpg, "connect", connect)
+    monkeypatch.setattr(risk_updates, "broker", make_broker("postgres"))
+    other_worker = UpdateHub(max_connections=10, max_per_user=5, broker=make_broker("postgres"))
+
+    async def scenario():
+        await risk_updates.start()
+        await other_worker.start()
+        try:
+            stream = await EventStream(headers).open()
+            first = _fields(await stream.next_message())
+
+            # The other worker writes and publishes; this worker's cache never saw the write
+            db = SessionLocal()
+            try:
+                user = db.query(db_models.User).filter(db_models.User.username == json.loads(first["data"])["username"]).one()
+                db.add(db_models.UserDailyStats(
+                    user_id=user.id, date=datetime.utcnow().strftime("%Y-%m-%d"), answer_risk_sum=5,
+                    answer_count=1, signal_count=0, late_night_count=0, slow_response_count=0,
+                ))
+                db.commit()
+                user_id = user.id
+            finally:
+                db.close()
+            other_worker.publish(user_id)
+
+            # A stale cache answers with the old ETag, which sends nothing but heartbeats
+            for _ in range(20):
+                message = await stream.next_message()
+                if message != ": heartbeat":
+                    break
+            second = _fields(message)
+            assert second["id"] != first["id"]
+            assert json.loads(second["data"])["risk_score"] > 0
+            await stream.close()
+        finally:
+            await other_worker.stop()
+            await risk_updates.stop()
+
+    asyncio.run(scenario())
+
+
+def test_make_broker_rejects_unknown_names():
+    with pytest.raises(ValueError):
+        make_broker("redis")
+
+
+def test_concurrent_misses_share_one_calculation(monkeypatch):
+    from backend.logic import analysis
+    from backend.models import UserPrincipal
+
+    calls = []
+
+    async def window_totals(db, user_id):
+        return "2024-01-01", {column: 0 for column in analysis.COUNTER_COLUMNS}
+
+    async def calculate_risk(user_id, username, db, window=None):
+        calls.append(user_id)
+        await asyncio.sleep(0.05)
+        return {"risk_level": "Low", "risk_score": 1.0}
+
+    monkeypatch.setattr(analysis, "window_totals", window_totals)
+    monkeypatch.setattr(analysis, "calculate_risk", calculate_risk)
+    user = UserPrincipal(id=987654321, username="someone")
+    analysis.invalidate_risk(user.id)
+
+    async def scenario():
+        return await asyncio.gather(*(analysis.get_risk_representation(user, None) for _ in range(5)))
+
+    representations = asyncio.run(scenario())
+    assert calls == [user.id]
+    assert len({r.etag for r in representations}) == 1
+    assert analysis._calculating == {}
@@ -0,0 +1,62 @@
+"""
+Tests for engine/session setup in backend.database.
+"""
+import asyncio
+
+from sqlalchemy import text
+
+from backend.config import settings
+from backend.database import AsyncSessionLocal, async_url, engine, engine_options, get_db, get_read_db
+from backend.main import app
+
+
+def test_async_url_swaps_drivers():
+    assert async_url("sqlite:///./test_db.sqlite3") == "sqlite+aiosqlite:///./test_db.sqlite3"
+    assert async_url("postgresql://u:p@db:5432/app") == "postgresql+asyncpg://u:p@db:5432/app"
+    assert async_url("postgresql+psycopg2://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+
+
+def test_pool_settings_apply_to_server_databases():
+    options = engine_options("postgresql://u:p@db/app")
+    assert options == {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    }
+    assert engine_options("sqlite:///./test_db.sqlite3") == {}
+
+
+def test_sqlite_connections_get_pragmas():
+    async def async_pragmas():
+        async with AsyncSessionLocal() as db:
+            return [(await db.execute(text(f"PRAGMA {name}"))).scalar() for name in ("journal_mode", "synchronous", "busy_timeout")]
+
+    with engine.connect() as conn:
+        sync_pragmas = [conn.scalar(text(f"PRAGMA {name}")) for name in ("journal_mode", "synchronous", "busy_timeout")]
+
+    # synchronous=NORMAL reads back as 1
+    expected = ["wal", 1, settings.SQLITE_BUSY_TIMEOUT_MS]
+    assert sync_pragmas == expected
+    assert asyncio.run(async_pragmas()) == expected
+
+
+def test_read_only_endpoints_use_read_sessions(client, auth_headers):
+    used = []
+
+    async def tracking_read_db():
+        used.append("read")
+        async for db in get_db():
+            yield db
+
+    app.dependency_overrides[get_read_db] = tracking_read_db
+    try:
+        for path in ("/dashboard/history", "/dashboard/calendar", "/signals/history"):
+            assert client.get(path, headers=auth_headers).status_code == 200
+        # Writes, and the status endpoint that saves snapshots, stay on the primary
+        assert client.get("/dashboard/status", headers=auth_headers).status_code == 200
+        assert client.post("/signals/track", headers=auth_headers, json={"type": "app_open", "value": 1.0}).status_code == 200
+    finally:
+        app.dependency_overrides.pop(get_read_db)
+
+    assert used == ["read"] * 3
@@ -0,0 +1,112 @@
+"""
+Tests for the streaming history export (GET /export).
+"""
+import csv
+import gzip
+import io
+import json
+import random
+import uuid
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from backend.config import settings
+from backend.database import SessionLocal
+from backend.jobs.seed_data import generate_user_history
+from backend.logic.export import CSV_COLUMNS
+from backend import db_models
+
+
+def _seed(client, auth_headers, days=30):
+    """A month of generated history for the authenticated user. Returns (responses, signals)."""
+    username = client.get("/auth/me", headers=auth_headers).json()["username"]
+    db = SessionLocal()
+    try:
+        user = db.query(db_models.User).filter(db_models.User.username == username).one()
+        responses, signals = generate_user_history(random.Random(3), user.id, days, datetime.utcnow().date())
+        db.execute(insert(db_models.DailyResponse), responses)
+        db.execute(insert(db_models.BehaviorSignal), signals)
+        db.commit()
+    finally:
+        db.close()
+    return responses, signals
+
+
+def test_ndjson_export_streams_every_row(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 50)
+    responses, signals = _seed(client, auth_headers)
+    # Goes through the aggregates, so the status call has data to snapshot
+    client.post("/daily/response", json={"question_id": "m2", "answer_value": 4}, headers=auth_headers)
+    client.get("/dashboard/status", headers=auth_headers)
+
+    response = client.get("/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert "attachment" in response.headers["content-disposition"]
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    by_table = {}
+    for record in records:
+        by_table.setdefault(record["table"], []).append(record)
+    assert len(by_table["daily_responses"]) == len(responses) + 1
+    assert len(by_table["behavior_signals"]) == len(signals)
+    assert by_table["risk_analyses"][0]["insights"]
+    # Oldest first within a table
+    timestamps = [record["timestamp"] for record in by_table["behavior_signals"]]
+    assert timestamps == sorted(timestamps)
+
+
+def test_csv_export_with_gzip_and_table_filter(client, auth_headers):
+    _, signals = _seed(client, auth_headers, days=10)
+
+    response = client.get(
+        "/export", params={"format": "csv", "tables": "behavior_signals", "gzip": "true"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"].endswith('.csv.gz')
+
+    rows = list(csv.reader(io.StringIO(gzip.decompress(response.content).decode())))
+    assert rows[0] == CSV_COLUMNS
+    assert len(rows) - 1 == len(signals)
+    assert {row[0] for row in rows[1:]} == {"behavior_signals"}
+    assert {row[CSV_COLUMNS.index("question_id")] for row in rows[1:]} == {""}
+
+
+def test_export_is_per_user(client, auth_headers):
+    _seed(client, auth_headers, days=3)
+    other = client.post("/auth/register", json={"username": f"user_{uuid.uuid4().hex[:12]}", "password": "testpass123"})
+    other_headers = {"Authorization": f"Bearer {other.json()['access_token']}"}
+    assert client.get("/export", headers=other_headers).text == ""
+
+
+def test_ndjson_export_reads_legacy_insights(client, auth_headers):
+    username = client.get("/auth/me", headers=auth_headers).json()["username"]
+    db = SessionLocal()
+    try:
+        user = db.query(db_models.User).filter(db_models.User.username == username).one()
+        # Written by the original str(insights), and one that is neither JSON nor a literal
+        for day, insights in (("2023-01-01", "['Late night activity', \"It's stable\"]"), ("2023-01-02", "oops [")):
+            db.add(db_models.RiskAnalysis(
+                user_id=user.id, date=day, risk_level="Low", risk_score=1.0, insights=insights, timestamp=datetime(2023, 1, 1),
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+    response = client.get("/export", params={"tables": "risk_analyses"}, headers=auth_headers)
+    assert response.status_code == 200
+    insights = [json.loads(line)["insights"] for line in response.text.splitlines()]
+    assert insights == [["Late night activity", "It's stable"], "oops ["]
+
+
+def test_export_filename_for_non_ascii_username(client):
+    username = f'用户"{uuid.uuid4().hex[:8]}'
+    token = client.post("/auth/register", json={"username": username, "password": "testpass123"}).json()["access_token"]
+
+    response = client.get("/export", params={"tables": "risk_analyses"}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    disposition = response.headers["content-disposition"]
+    assert f'filename="___{username[3:]}-history.ndjson"' in disposition
+    assert "filename*=UTF-8''%E7%94%A8%E6%88%B7%22" in disposition
@@ -0,0 +1,115 @@
+"""
+Tests for the risk history endpoint and its downsampling.
+"""
+from datetime import date, datetime, timedelta
+
+from backend.database import SessionLocal
+from backend import db_models
+from backend.logic.aggregates import rebuild
+from backend.logic.history import downsample
+from backend.models import HistoryAggregate, HistoryResolution
+from backend.test_analysis import _user_id
+
+
+def _add_snapshots(user_id, scores):
+    db = SessionLocal()
+    try:
+        for day, score in scores.items():
+            db.add(db_models.RiskAnalysis(
+                user_id=user_id, date=day.isoformat(), risk_level="Low", risk_score=score, insights="[]"
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def test_downsample_buckets():
+    # 2024-01-01 is a Monday
+    points = [(date(2024, 1, 1), 10.0), (date(2024, 1, 3), 40.0), (date(2024, 1, 8), 20.0), (date(2024, 2, 1), 5.0)]
+
+    assert downsample(points, HistoryResolution.WEEK, HistoryAggregate.MEAN) == [
+        {"date": "2024-01-01", "value": 25.0, "samples": 2},
+        {"date": "2024-01-08", "value": 20.0, "samples": 1},
+        {"date": "2024-01-29", "value": 5.0, "samples": 1},
+    ]
+    assert [p["value"] for p in downsample(points, HistoryResolution.MONTH, HistoryAggregate.LAST)] == [20.0, 5.0]
+    assert [p["value"] for p in downsample(points, HistoryResolution.MONTH, HistoryAggregate.MAX)] == [40.0, 5.0]
+    assert len(downsample(points, HistoryResolution.DAY, HistoryAggregate.MEAN)) == 4
+
+
+def test_history_year_view_is_downsampled(client, auth_headers):
+    user_id = _user_id(client, auth_headers)
+    end = date(2024, 12, 29)
+    _add_snapshots(user_id, {end - timedelta(days=i): float(i % 100) for i in range(364)})
+
+    params = {"from": "2024-01-01", "to": end.isoformat(), "resolution": "week", "aggregate": "max"}
+    response = client.get("/dashboard/history", params=params, headers=auth_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["series"] == "risk"
+    assert len(data["points"]) == 52
+    assert data["points"][0]["date"] == "2024-01-01"
+    assert all(point["samples"] == 7 for point in data["points"])
+
+    daily = client.get("/dashboard/history", params={**params, "resolution": "day"}, headers=auth_headers).json()
+    assert len(daily["points"]) == 364
+
+
+def test_history_category_series(client, auth_headers):
+    user_id = _user_id(client, auth_headers)
+    db = SessionLocal()
+    try:
+        # s1 is positively phrased (1 = high risk), s2 negatively; f1 is another category
+        for question_id, value, day in [("s1", 1, 3), ("s2", 3, 3), ("f1", 5, 3), ("s2", 1, 4)]:
+            db.add(db_models.DailyResponse(
+                user_id=user_id, date=f"2024-03-0{day}", question_id=question_id, answer_value=value,
+                timestamp=datetime(2024, 3, day, 12, 0)
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+    params = {"from": "2024-03-01", "to": "2024-03-31", "series": "sleep"}
+    data = client.get("/dashboard/history", params=params, headers=auth_headers).json()
+    assert data["points"] == [
+        {"date": "2024-03-03", "value": 75.0, "samples": 1},
+        {"date": "2024-03-04", "value": 0.0, "samples": 1},
+    ]
+
+    focus = client.get("/dashboard/history", params={**params, "series": "focus"}, headers=auth_headers).json()
+    assert focus["points"] == [{"date": "2024-03-03", "value": 0.0, "samples": 1}]
+
+
+def test_history_rejects_bad_ranges(client, auth_headers):
+    params = {"from": "2024-02-01", "to": "2024-01-01"}
+    assert client.get("/dashboard/history", params=params, headers=auth_headers).status_code == 400
+
+    params = {"from": "2015-01-01", "to": "2024-01-01"}
+    assert client.get("/dashboard/history", params=params, headers=auth_headers).status_code == 400
+
+    params = {"resolution": "hour"}
+    assert client.get("/dashboard/history", params=params, headers=auth_headers).status_code == 422
+
+
+def test_calendar_follows_writes_and_snapshots(client, auth_headers):
+    user_id = _user_id(client, auth_headers)
+    client.post("/daily/response", json={"question_id": "m1", "answer_value": 4}, headers=auth_headers)
+    client.post("/signals/track", json={"type": "late_night_usage", "value": 1.0}, headers=auth_headers)
+    status = client.get("/dashboard/status", headers=auth_headers).json()
+    _add_snapshots(user_id, {date(2023, 6, 1): 12.5})
+    today = datetime.utcnow().strftime("%Y-%m-%d")
+
+    data = client.get("/dashboard/calendar", headers=auth_headers).json()
+    assert data["year"] == date.today().year
+    assert data["fields"] == ["date", "answered", "late_night", "risk_score"]
+    assert data["days"] == [[today, 1, 1, status["risk_score"]]]
+
+    # Stored snapshots from before the column existed are picked up by rebuild
+    db = SessionLocal()
+    try:
+        rebuild(db, user_id)
+    finally:
+        db.close()
+    old = client.get("/dashboard/calendar", params={"year": 2023}, headers=auth_headers).json()
+    assert old["days"] == [["2023-06-01", 0, 0, 12.5]]
+    assert client.get("/dashboard/calendar", headers=auth_headers).json()["days"] == data["days"]
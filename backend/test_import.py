@@ -0,0 +1,189 @@
+"""
+Tests for the bulk history import (POST /import and jobs/import_history.py).
+"""
+import gzip
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from backend.database import SessionLocal
+from backend.jobs import import_history
+from backend import db_models
+
+
+def _register(client):
+    username = f"user_{uuid.uuid4().hex[:12]}"
+    response = client.post("/auth/register", json={"username": username, "password": "testpass123"})
+    return username, {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _history(days=10):
+    """Two answers and three signals a day, ending today."""
+    today = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    records = []
+    for offset in range(days):
+        ts = today - timedelta(days=offset)
+        records.append({"table": "daily_responses", "question_id": "m1", "answer_value": 5, "timestamp": ts.isoformat()})
+        records.append({"table": "daily_responses", "question_id": "s1", "answer_value": 1, "timestamp": ts.isoformat()})
+        records.append({"table": "behavior_signals", "type": "app_open", "value": 1.0, "timestamp": ts.isoformat()})
+        records.append({"table": "behavior_signals", "type": "late_night_usage", "value": 1.0, "timestamp": ts.isoformat()})
+        records.append({"table": "behavior_signals", "type": "response_delay", "value": 4.0, "timestamp": ts.isoformat()})
+    return records
+
+
+def test_ndjson_import_backfills_aggregates_and_snapshots(client, monkeypatch):
+    from backend.config import settings
+    monkeypatch.setattr(settings, "IMPORT_CHUNK_SIZE", 7)
+    username, headers = _register(client)
+    records = _history(days=10) + [
+        {"table": "risk_analyses", "date": "2020-01-01", "risk_level": "Low", "risk_score": 1.0},
+        {"table": "daily_responses", "question_id": "m1", "answer_value": 9, "timestamp": "2024-01-01T00:00:00"},
+        {"table": "daily_responses", "question_id": "zz", "answer_value": 3, "timestamp": "2024-01-01T00:00:00"},
+        {"table": "behavior_signals", "type": "app_open", "value": 1.0, "username": "someone_else", "timestamp": "2024-01-01T00:00:00"},
+    ]
+    body = "\n".join(json.dumps(record) for record in records) + "\nnot json\n"
+
+    response = client.post("/import", content=body, headers=headers)
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert report["imported"] == {"daily_responses": 20, "behavior_signals": 30}
+    assert report["skipped"] == 1
+    assert [r["line"] for r in report["rejections"]] == [52, 53, 54, 55]
+    assert report["rejections"][0]["error"].startswith("answer_value")
+    assert report["chunks"] == 8
+
+    # Ten days of stats and a snapshot for each of them
+    calendar = client.get("/dashboard/calendar", headers=headers).json()
+    assert len(calendar["days"]) == 10
+    assert all(day[3] is not None for day in calendar["days"])
+    # Every answer is max risk and the late nights max out the penalty
+    status = client.get("/dashboard/status", headers=headers).json()
+    assert status["risk_score"] == 100.0
+
+
+def test_csv_export_round_trips_through_import(client, auth_headers):
+    for record in _history(days=3):
+        if record["table"] == "behavior_signals":
+            client.post("/signals/track/batch", json={"signals": [record]}, headers=auth_headers)
+    exported = client.get("/export", params={"format": "csv"}, headers=auth_headers).text
+
+    _, headers = _register(client)
+    report = client.post("/import", params={"format": "csv"}, content=exported, headers=headers).json()
+    assert report["imported"] == {"behavior_signals": 9}
+    assert report["rejected"] == 0
+    reimported = client.get("/export", params={"format": "csv"}, headers=headers).text
+    assert reimported.splitlines()[:10] == exported.splitlines()[:10]
+
+
+def test_cli_imports_gzipped_file_for_named_users(client, tmp_path, capsys):
+    alice, _ = _register(client)
+    bob, _ = _register(client)
+    path = tmp_path / "team.ndjson.gz"
+    with gzip.open(path, "wt") as f:
+        for record in _history(days=2):
+            f.write(json.dumps({**record, "username": alice}) + "\n")
+        f.write(json.dumps({**_history(days=1)[0], "username": bob}) + "\n")
+        f.write(json.dumps({**_history(days=1)[0], "username": "nobody_" + uuid.uuid4().hex}) + "\n")
+
+    assert import_history.main([str(path)]) == 1  # one unknown user
+    output = capsys.readouterr().out
+    assert "unknown user" in output
+
+    db = SessionLocal()
+    try:
+        counts = {
+            name: db.query(db_models.DailyResponse).join(db_models.User).filter(db_models.User.username == name).count()
+            for name in (alice, bob)
+        }
+    finally:
+        db.close()
+    assert counts == {alice: 4, bob: 1}
+
+
+def test_csv_quoted_newlines_across_chunks(client, monkeypatch):
+    from backend.config import settings
+    monkeypatch.setattr(settings, "IMPORT_CHUNK_SIZE", 2)
+    _, headers = _register(client)
+    body = (
+        "table,type,value,timestamp,insights\n"
+        'risk_analyses,,,,"[""first insight\n'  # chunk boundary inside the quoted field
+        'second insight""]"\n'
+        "behavior_signals,app_open,1.0,2024-01-01T10:00:00,\n"
+        'risk_analyses,,,,"never closed\n'
+    )
+    report = client.post("/import", params={"format": "csv"}, content=body, headers=headers).json()
+    assert report["imported"] == {"behavior_signals": 1}
+    assert report["skipped"] == 1
+    assert report["rejections"] == [{"line": 5, "error": "unterminated quoted field"}]
+
+
+def test_invalid_utf8_lines_are_rejected(client):
+    _, headers = _register(client)
+    record = {"table": "behavior_signals", "type": "app_open", "value": 1.0, "timestamp": "2024-01-01T10:00:00"}
+    line = json.dumps(record).encode()
+    body = line + b"\n" + line.replace(b"app_open", b"app_\xffopen") + b"\n" + line + b"\n"
+
+    response = client.post("/import", content=body, headers=headers)
+    assert response.status_code == 200
+    report = response.json()
+    assert report["imported"] == {"behavior_signals": 2}
+    assert report["rejections"] == [{"line": 2, "error": "invalid UTF-8"}]
+
+
+def test_non_string_table_and_username_are_rejected(client):
+    _, headers = _register(client)
+    record = {"table": "behavior_signals", "type": "app_open", "value": 1.0, "timestamp": "2024-01-01T10:00:00"}
+    records = [record, {**record, "table": []}, {**record, "table": {"a": 1}}, {**record, "username": ["x"]}, record]
+    body = "\n".join(json.dumps(r) for r in records) + "\n"
+
+    response = client.post("/import", content=body, headers=headers)
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert report["imported"] == {"behavior_signals": 2}
+    assert [r["line"] for r in report["rejections"]] == [2, 3, 4]
+    assert report["rejections"][0]["error"].startswith("table must be one of")
+    assert report["rejections"][2]["error"] == "username: must be a string"
+
+
+def test_import_adds_onto_existing_daily_stats(client):
+    """Rows written concurrently for the same days must survive the import."""
+    _, headers = _register(client)
+    username = client.get("/auth/me", headers=headers).json()["username"]
+    db = SessionLocal()
+    try:
+        user = db.query(db_models.User).filter(db_models.User.username == username).one()
+        # Counts no raw row backs (another request's increment), which a rebuild would erase
+        db.add(db_models.UserDailyStats(
+            user_id=user.id, date="2024-01-01", answer_risk_sum=0, answer_count=0,
+            signal_count=7, late_night_count=2, slow_response_count=0,
+        ))
+        db.commit()
+        record = {"table": "behavior_signals", "type": "late_night_usage", "value": 1.0, "timestamp": "2024-01-01T23:00:00"}
+        response = client.post("/import", content=json.dumps(record) + "\n", headers=headers)
+        assert response.json()["imported"] == {"behavior_signals": 1}
+
+        db.expire_all()
+        row = db.query(db_models.UserDailyStats).filter_by(user_id=user.id, date="2024-01-01").one()
+        assert (row.signal_count, row.late_night_count) == (8, 3)
+        assert row.risk_score is not None
+    finally:
+        db.close()
+
+
+def test_import_body_size_is_capped(client, monkeypatch):
+    from backend.config import settings
+    monkeypatch.setattr(settings, "IMPORT_MAX_BYTES", 100)
+    _, headers = _register(client)
+    record = {"table": "behavior_signals", "type": "app_open", "value": 1.0, "timestamp": "2024-01-01T10:00:00"}
+    body = (json.dumps(record) + "\n") * 3
+
+    response = client.post("/import", content=body, headers=headers)
+    assert response.status_code == 413
+
+    # Without a Content-Length the limit is enforced while reading
+    def chunks():
+        yield body.encode()
+
+    response = client.post("/import", content=chunks(), headers=headers)
+    assert response.status_code == 413
+    assert "at most 100 bytes" in response.json()["detail"]
@@ -0,0 +1,70 @@
+"""
+Tests for request metrics and the /metrics endpoint.
+"""
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from backend.config import settings
+from backend.database import engine
+from backend.metrics import Histogram, MetricsMiddleware, http_duration, http_requests, instrument_engine, timed
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("demo_seconds", "Demo.", ["route"], buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, "/x")
+
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/x",le="1"} 3' in lines
+    assert 'demo_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'demo_seconds_count{route="/x"} 4' in lines
+
+
+def test_metrics_endpoint_reports_route_templates(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    before = http_requests.value("GET", "/dashboard/history", "200")
+    client.get("/dashboard/history", params={"from": "2024-01-01", "to": "2024-01-31"}, headers=auth_headers)
+    client.get("/no/such/route")
+
+    assert http_requests.value("GET", "/dashboard/history", "200") == before + 1
+    body = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).text
+    assert 'http_request_duration_seconds_count{method="GET",route="/dashboard/history"}' in body
+    assert 'route="<unmatched>",status="404"' in body
+    assert "signal_buffer_queue_depth" in body
+    assert 'cache_hits_total{cache="dashboard"}' in body
+    assert http_duration.count("GET", "/no/such/route") == 0
+
+
+def test_metrics_endpoint_requires_token(client, monkeypatch):
+    # Enabled without a token: not served at all
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    response = client.get("/metrics")
+    assert response.status_code == 401
+    assert response.headers["www-authenticate"] == "Bearer"
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+    assert client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"}).status_code == 404
+
+
+def test_server_timing_header_counts_queries_and_sections():
+    app = FastAPI()
+    instrument_engine(engine)
+
+    @app.get("/work")
+    def work():
+        with timed("work"):
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+                connection.execute(text("SELECT 2"))
+        return {}
+
+    response = TestClient(MetricsMiddleware(app, server_timing=True)).get("/work")
+    header = response.headers["server-timing"]
+    assert 'desc="2 queries"' in header
+    assert "work;dur=" in header
+    assert "app;dur=" in header
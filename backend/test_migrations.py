@@ -0,0 +1,86 @@
+"""
+Tests for the Alembic migration path and the hot-query indexes.
+"""
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import create_engine, inspect, text
+
+from backend.db_models import Base
+from backend.migrate import HOT_QUERIES, current_revision, explain_hot_queries, head_revision, upgrade
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.sqlite3'}")
+    yield engine
+    engine.dispose()
+
+
+def test_migrations_match_models(engine):
+    upgrade(engine)
+    with engine.connect() as connection:
+        diff = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+    assert diff == []
+
+
+def test_legacy_create_all_database_is_stamped_and_upgraded(engine):
+    # Reproduce a database built by the old create_all path, before the composite indexes
+    upgrade(engine, revision="0002")
+    with engine.begin() as connection:
+        connection.execute(text("DROP TABLE alembic_version"))
+        connection.execute(text("INSERT INTO users (username, hashed_password) VALUES ('legacy', 'x')"))
+
+    upgrade(engine)
+
+    assert current_revision(engine) == head_revision()
+    indexes = {ix["name"] for ix in inspect(engine).get_indexes("behavior_signals")}
+    assert "ix_behavior_signals_user_id_timestamp" in indexes
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT username FROM users")).scalar() == "legacy"
+
+
+def test_duplicate_risk_snapshots_are_collapsed(engine):
+    upgrade(engine, revision="0003")
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, username, hashed_password) VALUES (1, 'dup', 'x')"))
+        for score in (10.0, 20.0, 30.0):
+            connection.execute(text(
+                "INSERT INTO risk_analyses (user_id, date, risk_level, risk_score) VALUES (1, '2024-01-01', 'Low', :score)"
+            ), {"score": score})
+
+    upgrade(engine, revision="0004")
+
+    with engine.connect() as connection:
+        rows = connection.execute(text("SELECT risk_score FROM risk_analyses")).fetchall()
+    assert rows == [(30.0,)]
+
+
+def test_hot_queries_use_indexes(engine):
+    upgrade(engine)
+    results = explain_hot_queries(engine)
+    assert len(results) == len(HOT_QUERIES)
+    for result in results:
+        assert result["uses_index"], f"{result['name']} does not use {result['index']}:\n{result['plan']}"
+
+
+def test_calendar_risk_scores_are_backfilled(engine):
+    upgrade(engine, revision="0004")
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO users (id, username, hashed_password) VALUES (1, 'cal', 'x')"))
+        connection.execute(text(
+            "INSERT INTO user_daily_stats (user_id, date, answer_risk_sum, answer_count, signal_count, "
+            "late_night_count, slow_response_count) VALUES (1, '2024-01-01', 6, 2, 1, 1, 0)"
+        ))
+        for day, score in (("2024-01-01", 55.0), ("2024-01-02", 20.0)):
+            connection.execute(text(
+                "INSERT INTO risk_analyses (user_id, date, risk_level, risk_score) VALUES (1, :day, 'Low', :score)"
+            ), {"day": day, "score": score})
+
+    upgrade(engine, revision="0005")
+
+    with engine.connect() as connection:
+        rows = connection.execute(text(
+            "SELECT date, answer_count, risk_score FROM user_daily_stats ORDER BY date"
+        )).fetchall()
+    assert rows == [("2024-01-01", 2, 55.0), ("2024-01-02", 0, 20.0)]
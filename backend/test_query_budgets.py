@@ -0,0 +1,113 @@
+"""
+Query-count budgets per endpoint. A failure here means an endpoint started issuing
+more SQL than before (an N+1, a repeated lookup, a lost cache); raise a budget only
+when the extra query is intended.
+"""
+import json
+import uuid
+
+import pytest
+from fastapi.routing import APIRoute
+
+from backend.config import settings
+from backend.main import app
+from backend.routers.auth import principal_cache
+
+SIGNALS = [{"type": "app_open", "value": 1.0}, {"type": "response_delay", "value": 12.0}]
+IMPORT_BODY = "".join(
+    json.dumps({"table": table, "timestamp": f"2023-03-{day:02d}T10:00:00", **fields}) + "\n"
+    for day in range(1, 21)
+    for table, fields in (
+        ("daily_responses", {"question_id": "m1", "answer_value": 4}),
+        ("behavior_signals", {"type": "app_open", "value": 1.0}),
+    )
+)
+
+# (method, path, request kwargs, max queries) with the caller's principal already cached
+BUDGETS = [
+    ("GET", "/", {}, 0),
+    ("GET", "/auth/me", {}, 0),
+    ("GET", "/daily/questions", {}, 0),
+    ("POST", "/daily/response", {"json": {"question_id": "s1", "answer_value": 3}}, 2),
+    ("POST", "/signals/track", {"json": {"type": "app_open", "value": 1.0}}, 2),
+    # Constant, whatever the batch size: one bulk INSERT plus one aggregate upsert
+    ("POST", "/signals/track/batch", {"json": {"signals": SIGNALS * 25}}, 2),
+    ("GET", "/dashboard/history", {}, 1),
+    ("GET", "/dashboard/history", {"params": {"series": "focus", "resolution": "week"}}, 1),
+    ("GET", "/dashboard/calendar", {}, 1),
+    # Raw signals plus their rollups
+    ("GET", "/signals/history", {"params": {"type": "app_open"}}, 2),
+    # One streamed SELECT per exported table
+    ("GET", "/export", {}, 4),
+    # Constant for one chunk, whatever the row and day counts: the inserts, the aggregate
+    # delta upsert, and the snapshot backfill's read and two upserts
+    ("POST", "/import", {"content": IMPORT_BODY}, 6),
+]
+
+# Budgeted by the dedicated tests below
+BUDGETED_ELSEWHERE = {
+    ("POST", "/auth/register"),
+    ("POST", "/auth/token"),
+    ("GET", "/dashboard/status"),
+    ("GET", "/metrics"),
+}
+
+# Endpoints without a budget, and why
+EXEMPT = {
+    ("GET", "/dashboard/stream"): "endless; each event it sends is a /dashboard/status computation",
+}
+
+
+def test_every_route_has_a_budget():
+    routes = {
+        (method, route.path)
+        for route in app.routes if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+    covered = {(method, path) for method, path, _, _ in BUDGETS} | BUDGETED_ELSEWHERE | set(EXEMPT)
+    assert routes - covered == set(), "add a query budget (or an exemption) for these routes"
+    assert covered - routes == set(), "budgets for routes that no longer exist"
+
+
+@pytest.mark.parametrize("method,path,kwargs,budget", BUDGETS, ids=[f"{m} {p} {k}" for m, p, k, _ in BUDGETS])
+def test_endpoint_query_budget(client, auth_headers, query_budget, method, path, kwargs, budget):
+    client.get("/auth/me", headers=auth_headers)
+    with query_budget(budget):
+        response = client.request(method, path, headers=auth_headers, **kwargs)
+    assert response.status_code < 400, response.text
+
+
+def test_auth_query_budgets(client, query_budget):
+    credentials = {"username": f"user_{uuid.uuid4().hex[:12]}", "password": "testpass123"}
+    # Username check + INSERT
+    with query_budget(2):
+        token = client.post("/auth/register", json=credentials).json()["access_token"]
+    with query_budget(1):
+        assert client.post("/auth/token", data=credentials).status_code == 200
+
+    # First authenticated request loads the principal by primary key, then it is cached
+    principal_cache.clear()
+    headers = {"Authorization": f"Bearer {token}"}
+    with query_budget(1):
+        client.get("/auth/me", headers=headers)
+    with query_budget(0):
+        client.get("/auth/me", headers=headers)
+
+
+def test_dashboard_status_query_budget(client, auth_headers, query_budget):
+    client.post("/daily/response", json={"question_id": "m1", "answer_value": 4}, headers=auth_headers)
+    client.get("/auth/me", headers=auth_headers)
+    # Window read, snapshot read, snapshot upsert, calendar score upsert
+    with query_budget(4):
+        client.get("/dashboard/status", headers=auth_headers)
+    # Cached until the next write
+    with query_budget(0):
+        client.get("/dashboard/status", headers=auth_headers)
+
+
+def test_metrics_query_budget(client, query_budget, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-secret")
+    # Scrapes read in-process counters only
+    with query_budget(0):
+        response = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert response.status_code == 200
@@ -0,0 +1,87 @@
+"""
+Tests for the per-user token-bucket rate limits.
+"""
+from backend.config import settings
+from backend.database import SessionLocal
+from backend.metrics import registry
+from backend.rate_limit import TokenBucketLimiter, limiters, throttled_requests
+from backend import db_models
+
+
+def test_bucket_allows_bursts_then_refills():
+    limiter = TokenBucketLimiter(rate=2.0, burst=3, idle_seconds=60, max_buckets=100)
+    assert [limiter.acquire("a", now=0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire("a", now=0.0) == 0.5
+    # Other keys have buckets of their own
+    assert limiter.acquire("b", now=0.0) == 0.0
+
+    assert limiter.acquire("a", now=0.25) == 0.25
+    assert limiter.acquire("a", now=0.5) == 0.0
+    # Refills stop at the burst size
+    assert [limiter.acquire("a", now=100.0) for _ in range(4)][-1] == 0.5
+    assert limiter.stats()["throttled"] == 3
+
+
+def test_idle_buckets_are_evicted():
+    limiter = TokenBucketLimiter(rate=1.0, burst=10, idle_seconds=5, max_buckets=100)
+    # Forgetting a bucket must never hand out extra tokens, so idle means refilled
+    assert limiter.idle_seconds == 10
+
+    for key in range(3):
+        limiter.acquire(key, now=0.0)
+    limiter.acquire(3, now=1.0)
+    limiter.acquire(4, now=10.5)
+    assert len(limiter) == 2  # 0, 1 and 2 sat idle for 10s or more, 3 not quite
+    assert limiter.stats()["evictions"] == 3
+
+
+def test_keys_past_max_buckets_share_an_overflow_bucket():
+    limiter = TokenBucketLimiter(rate=1.0, burst=2, idle_seconds=1, max_buckets=2)
+    for key in ("a", "b"):
+        assert [limiter.acquire(key, now=0.0) for _ in range(3)] == [0.0, 0.0, 1.0]
+
+    # Both buckets are still refilling, so neither is dropped for newcomers
+    assert [limiter.acquire(key, now=0.5) for key in ("c", "d", "c")] == [0.0, 0.0, 1.0]
+    assert limiter.acquire("a", now=0.5) == 0.5  # "a" did not come back full
+    assert len(limiter) == 2
+    assert limiter.stats()["evictions"] == 0
+
+    # Once refilled they are dropped and "c" gets a bucket of its own
+    assert limiter.acquire("c", now=2.5) == 0.0
+    assert len(limiter) == 1
+    assert limiter.stats()["evictions"] == 2
+    assert limiter.stats()["overflowed"] == 3
+
+
+def _signal_count(value):
+    db = SessionLocal()
+    try:
+        return db.query(db_models.BehaviorSignal).filter(db_models.BehaviorSignal.value == value).count()
+    finally:
+        db.close()
+
+
+def test_track_answers_429_once_the_bucket_is_empty(client, auth_headers, monkeypatch):
+    limiter = limiters["signals_track"]
+    monkeypatch.setattr(limiter, "rate", 0.5)
+    monkeypatch.setattr(limiter, "burst", 2)
+    throttled_before = throttled_requests.value("signals_track")
+
+    statuses = [
+        client.post("/signals/track", json={"type": "app_open", "value": 7373.0}, headers=auth_headers)
+        for _ in range(3)
+    ]
+    assert [r.status_code for r in statuses] == [200, 200, 429]
+    assert statuses[2].headers["Retry-After"] == "2"
+    # Rejected before the handler wrote anything
+    assert _signal_count(7373.0) == 2
+    assert throttled_requests.value("signals_track") == throttled_before + 1
+    assert 'rate_limited_requests_total{route="signals_track"}' in registry.render()
+
+    # Other routes keep their own buckets
+    response = client.post("/daily/response", json={"question_id": "m1", "answer_value": 3}, headers=auth_headers)
+    assert response.status_code == 200
+
+    monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", False)
+    response = client.post("/signals/track", json={"type": "app_open", "value": 7373.0}, headers=auth_headers)
+    assert response.status_code == 200
@@ -0,0 +1,93 @@
+"""
+Tests for rolling up old behavior signals.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from backend.database import SessionLocal
+from backend import db_models
+from backend.logic.aggregates import rebuild
+from backend.logic.retention import compact_signals, retention_cutoff
+from backend.test_analysis import _stats, _user_id
+
+
+def test_compaction_rolls_up_old_signals_without_changing_history(client, auth_headers):
+    user_id = _user_id(client, auth_headers)
+    now = datetime.utcnow()
+    old = now - timedelta(days=40)
+    rows = [
+        {"user_id": user_id, "type": "response_delay", "value": value, "timestamp": old + timedelta(minutes=i)}
+        for i, value in enumerate([4.0, 12.0, 30.0, 2.0])
+    ] + [
+        {"user_id": user_id, "type": "late_night_usage", "value": 1.0, "timestamp": old - timedelta(days=1)},
+        {"user_id": user_id, "type": "app_open", "value": 1.0, "timestamp": old - timedelta(days=1)},
+        {"user_id": user_id, "type": "app_open", "value": 1.0, "timestamp": now},
+    ]
+    db = SessionLocal()
+    try:
+        db.execute(insert(db_models.BehaviorSignal), rows)
+        db.commit()
+        rebuild(db, user_id)
+    finally:
+        db.close()
+
+    params = {"from": (old - timedelta(days=5)).strftime("%Y-%m-%d"), "to": now.strftime("%Y-%m-%d")}
+    before_history = client.get("/signals/history", params=params, headers=auth_headers).json()
+    before_stats = _stats(user_id)
+
+    db = SessionLocal()
+    try:
+        # Small chunks so one day is split across transactions
+        result = compact_signals(db, horizon_days=30, chunk_size=2)
+        assert result["compacted"] >= 6
+        assert result["chunks"] >= 3
+
+        remaining = db.query(db_models.BehaviorSignal).filter(db_models.BehaviorSignal.user_id == user_id).all()
+        assert [r.timestamp for r in remaining] == [now]
+        delays = db.query(db_models.BehaviorSignalDaily).filter(
+            db_models.BehaviorSignalDaily.user_id == user_id,
+            db_models.BehaviorSignalDaily.type == "response_delay",
+        ).one()
+        assert (delays.count, delays.value_sum, delays.value_max, delays.slow_count) == (4, 48.0, 30.0, 2)
+
+        # Rollups feed a rebuild exactly like the raw rows did
+        rebuild(db, user_id)
+    finally:
+        db.close()
+
+    assert client.get("/signals/history", params=params, headers=auth_headers).json() == before_history
+    assert _stats(user_id) == before_stats
+    assert {day["type"] for day in before_history["days"]} == {"response_delay", "late_night_usage", "app_open"}
+
+    only_delays = client.get("/signals/history", params={**params, "type": "response_delay"}, headers=auth_headers).json()
+    assert only_delays["days"] == [{"date": old.strftime("%Y-%m-%d"), "type": "response_delay", "count": 4, "sum": 48.0, "max": 30.0}]
+
+
+def test_retention_horizon_covers_risk_window():
+    with pytest.raises(ValueError):
+        retention_cutoff(3)
+    assert retention_cutoff(7, now=datetime(2024, 1, 10, 15, 30)) == datetime(2024, 1, 3)
+
+
+def test_history_merges_rollup_without_value_max(client, auth_headers):
+    user_id = _user_id(client, auth_headers)
+    day = datetime.utcnow() - timedelta(days=40)
+    db = SessionLocal()
+    try:
+        db.execute(insert(db_models.BehaviorSignalDaily), [{
+            "user_id": user_id, "date": day.strftime("%Y-%m-%d"), "type": "app_open",
+            "count": 2, "value_sum": 2.0, "value_max": None, "slow_count": 0,
+        }])
+        db.execute(insert(db_models.BehaviorSignal), [
+            {"user_id": user_id, "type": "app_open", "value": 1.0, "timestamp": day},
+        ])
+        db.commit()
+    finally:
+        db.close()
+
+    params = {"from": day.strftime("%Y-%m-%d"), "to": day.strftime("%Y-%m-%d")}
+    history = client.get("/signals/history", params=params, headers=auth_headers)
+    assert history.status_code == 200
+    assert history.json()["days"] == [{"date": day.strftime("%Y-%m-%d"), "type": "app_open", "count": 3, "sum": 3.0, "max": 1.0}]
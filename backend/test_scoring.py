@@ -0,0 +1,80 @@
+"""
+Tests for the scoring engine (logic/scoring.py).
+"""
+import random
+
+import numpy as np
+
+from backend.logic.aggregates import COUNTER_COLUMNS
+from backend.logic.rotation import QUESTIONS_POOL
+from backend.logic.scoring import ScoringEngine, ScoringRules, scoring_engine
+from backend.models import Question, QuestionPolarity
+
+
+def _random_totals(rng, users):
+    totals = []
+    for _ in range(users):
+        answer_count = rng.randint(0, 14)
+        totals.append({
+            "answer_count": answer_count,
+            "answer_risk_sum": sum(rng.randint(1, 5) for _ in range(answer_count)),
+            "signal_count": rng.randint(0, 40),
+            "late_night_count": rng.randint(0, 6),
+            "slow_response_count": rng.randint(0, 8),
+        })
+    return totals
+
+
+def test_answer_risk_follows_question_polarity():
+    assert scoring_engine.negative_questions == ("s2", "f2", "m1", "e1")
+    assert scoring_engine.answer_risk("e1", 5) == 5   # "Did screens feel exhausting?"
+    assert scoring_engine.answer_risk("s1", 5) == 1   # "How refreshed did you feel?"
+    # Unknown ids score as positively phrased
+    assert scoring_engine.answer_risk("zz", 2) == 4
+
+    ids = [q.id for q in QUESTIONS_POOL] * 5 + ["zz"]
+    values = [random.randint(1, 5) for _ in ids]
+    vectorized = scoring_engine.answer_risks(scoring_engine.question_indexes(ids), np.array(values))
+    assert vectorized.tolist() == [scoring_engine.answer_risk(q, v) for q, v in zip(ids, values)]
+
+
+def test_score_many_matches_score_one():
+    totals = _random_totals(random.Random(7), 2000)
+    scores = scoring_engine.score_many({
+        column: np.array([t[column] for t in totals], dtype=np.int64) for column in COUNTER_COLUMNS
+    })
+
+    for index, user_totals in enumerate(totals):
+        expected = scoring_engine.score_one(user_totals)
+        assert bool(scores["has_data"][index]) == (expected is not None)
+        if expected is None:
+            continue
+        level, insights = scoring_engine.describe(scores["level"][index], scores["late_night_insight"][index])
+        assert (level, round(float(scores["total_score"][index]), 1), insights) == (
+            expected["risk_level"], expected["risk_score"], expected["insights"]
+        )
+
+
+def test_score_one_without_data():
+    assert scoring_engine.score_one({column: 0 for column in COUNTER_COLUMNS}) is None
+
+
+def test_rules_and_questions_are_pluggable():
+    totals = {"answer_risk_sum": 6, "answer_count": 2, "signal_count": 3, "late_night_count": 3, "slow_response_count": 0}
+    # avg answer risk 3 -> base 50, plus 3 late nights * 10
+    assert scoring_engine.score_one(totals) == {
+        "risk_level": "High", "risk_score": 80.0,
+        "insights": ["High mental fatigue detected.", "Late night activity is impacting your score."],
+    }
+
+    lenient = ScoringEngine(rules=ScoringRules(late_night_weight=0.0))
+    assert lenient.score_one(totals) == {"risk_level": "Medium", "risk_score": 50.0, "insights": ["Early signs of stress detected."]}
+
+    flipped = ScoringEngine(questions=[Question(id="q", text="?", category="Mood", polarity=QuestionPolarity.NEGATIVE)])
+    assert flipped.negative_questions == ("q",)
+    assert flipped.answer_risk("q", 5) == 5
+
+
+def test_polarity_is_not_sent_to_clients(client, auth_headers):
+    questions = client.get("/daily/questions", headers=auth_headers).json()
+    assert questions and all("polarity" not in question for question in questions)
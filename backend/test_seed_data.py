@@ -0,0 +1,42 @@
+"""
+Tests for the synthetic data generator.
+"""
+import random
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+from backend import db_models
+from backend.jobs.seed_data import generate_user_history, seed
+from backend.migrate import upgrade
+from backend.models import BehaviorType
+
+
+def test_generated_history_is_reproducible_and_valid():
+    first = generate_user_history(random.Random(7), 1, 60, date(2024, 3, 31))
+    second = generate_user_history(random.Random(7), 1, 60, date(2024, 3, 31))
+    assert first == second
+
+    responses, signals = first
+    assert responses and signals
+    assert all(1 <= r["answer_value"] <= 5 for r in responses)
+    assert all(date(2024, 2, 1) <= r["timestamp"].date() <= date(2024, 3, 31) for r in responses + signals)
+    assert {s["type"] for s in signals} <= {t.value for t in BehaviorType}
+
+
+def test_seed_bulk_loads_users_history_and_aggregates(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'seed.sqlite3'}")
+    upgrade(engine)
+    counts = seed(users=5, days=10, seed=3, engine=engine)
+
+    with engine.connect() as connection:
+        assert connection.scalar(select(func.count()).select_from(db_models.User)) == 5
+        assert connection.scalar(select(func.count()).select_from(db_models.DailyResponse)) == counts["daily_responses"]
+        assert connection.scalar(select(func.count()).select_from(db_models.BehaviorSignal)) == counts["behavior_signals"]
+        answers = connection.scalar(select(func.sum(db_models.UserDailyStats.answer_count)))
+    assert answers == counts["daily_responses"]
+
+    with pytest.raises(ValueError):
+        seed(users=1, days=1, engine=engine)
+    engine.dispose()
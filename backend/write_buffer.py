@@ -0,0 +1,176 @@
+"""
+Write-behind buffer for behavioral signals.
+
+When SIGNAL_WRITE_BEHIND is enabled, /signals/track only validates the signal and
+queues the row here. A background task flushes queued rows to the database in bulk
+once FLUSH_SIZE rows are waiting or FLUSH_INTERVAL seconds have passed, so request
+latency no longer depends on commit latency.
+
+A batch whose write fails is held aside and retried before anything else. While it
+is pending, offer() refuses new rows, so rows that were already acknowledged are
+never pushed out to make room.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List
+
+from sqlalchemy import insert
+
+from .config import settings
+from .database import AsyncSessionLocal
+from . import db_models
+from .logic.aggregates import record_signals
+from .logic.analysis import invalidate_risk
+
+logger = logging.getLogger(__name__)
+
+
+class SignalWriteBuffer:
+    def __init__(
+        self,
+        max_size: int,
+        flush_size: int,
+        flush_interval: float,
+        session_factory: Callable = AsyncSessionLocal,
+    ):
+        self.max_size = max_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.session_factory = session_factory
+
+        self._queue: Deque[Dict] = deque()
+        # Batch from a failed flush, written before anything else in the queue
+        self._retry: List[Dict] = []
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = None
+
+        # Counters
+        self.enqueued_total = 0
+        self.rejected_total = 0
+        self.flushed_total = 0
+        self.flush_count = 0
+        self.flush_errors = 0
+        self.dropped_total = 0
+        self.flush_seconds_total = 0.0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+    @property
+    def depth(self) -> int:
+        return len(self._retry) + len(self._queue)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def offer(self, rows: List[Dict]) -> bool:
+        """
+        Queue rows for writing. All-or-nothing: returns False without queueing
+        anything if the rows don't fit or a failed batch is still waiting to be
+        retried, so callers can answer with backpressure.
+        """
+        if self._retry or len(self._queue) + len(rows) > self.max_size:
+            self.rejected_total += len(rows)
+            return False
+        self._queue.extend(rows)
+        self.enqueued_total += len(rows)
+        if len(self._queue) >= self.flush_size:
+            self._wakeup.set()
+        return True
+
+    async def start(self):
+        if self.running:
+            return
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task and flush everything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self.depth:
+            if not await self.flush():
+                logger.error("Dropping %d buffered signals after failed shutdown flush", self.depth)
+                self.dropped_total += self.depth
+                self._retry = []
+                self._queue.clear()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> bool:
+        """Write up to flush_size queued rows in one transaction. Returns False on failure."""
+        async with self._flush_lock:
+            if self._retry:
+                batch, self._retry = self._retry, []
+            elif self._queue:
+                batch = [self._queue.popleft() for _ in range(min(self.flush_size, len(self._queue)))]
+            else:
+                return True
+
+            started = time.perf_counter()
+            try:
+                await self._write(batch)
+            except Exception:
+                logger.exception("Failed to flush %d buffered signals", len(batch))
+                self.flush_errors += 1
+                # Keep the batch for the next attempt; offer() refuses new rows meanwhile
+                self._retry = batch
+                return False
+            elapsed = time.perf_counter() - started
+
+            self.flush_count += 1
+            self.flushed_total += len(batch)
+            self.flush_seconds_total += elapsed
+            self.last_flush_seconds = elapsed
+            self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+
+            # Another full batch is already waiting
+            if len(self._queue) >= self.flush_size:
+                self._wakeup.set()
+            return True
+
+    async def _write(self, rows: List[Dict]):
+        async with self.session_factory() as db:
+            await db.execute(insert(db_models.BehaviorSignal), rows)
+            await record_signals(db, rows)
+            await db.commit()
+        for user_id in {row["user_id"] for row in rows}:
+            invalidate_risk(user_id)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.depth,
+            "queue_capacity": self.max_size,
+            "enqueued_total": self.enqueued_total,
+            "rejected_total": self.rejected_total,
+            "flushed_total": self.flushed_total,
+            "flush_count": self.flush_count,
+            "flush_errors": self.flush_errors,
+            "dropped_total": self.dropped_total,
+            "flush_seconds_total": round(self.flush_seconds_total, 6),
+            "last_flush_seconds": round(self.last_flush_seconds, 6),
+            "max_flush_seconds": round(self.max_flush_seconds, 6),
+        }
+
+
+signal_buffer = SignalWriteBuffer(
+    max_size=settings.SIGNAL_BUFFER_MAX_SIZE,
+    flush_size=settings.SIGNAL_BUFFER_FLUSH_SIZE,
+    flush_interval=settings.SIGNAL_BUFFER_FLUSH_INTERVAL_SECONDS,
+)
@@ -21,17 +21,17 @@ export function Dashboard({ onStartCheckIn }: DashboardProps) {
   const [loading, setLoading] = useState(true);
 
   useEffect(() => {
-    const fetchDashboard = async () => {
-      try {
-        const data = await burnoutService.getDashboardStatus();
+    // The stream sends the current analysis right away, then each update as it happens
+    return burnoutService.subscribeDashboard(
+      (data) => {
         setAnalysis(data);
-      } catch (error) {
-        console.error("Failed to fetch dashboard:", error);
-      } finally {
+        setLoading(false);
+      },
+      (error) => {
+        console.error("Dashboard stream interrupted:", error);
         setLoading(false);
       }
-    };
-    fetchDashboard();
+    );
   }, []);
 
   const riskLevel = analysis?.risk_level?.toLowerCase() as "low" | "medium" | "high" || "low";
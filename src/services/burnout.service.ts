@@ -1,4 +1,4 @@
-import { api } from './api';
+import { api, API_BASE_URL } from './api';
 import type {
     Question,
     DailyResponseSubmit,
@@ -24,4 +24,73 @@ export const burnoutService = {
         const response = await api.get<RiskAnalysis>('/dashboard/status');
         return response.data;
     },
+
+    /**
+     * Follow /dashboard/stream: `onAnalysis` gets the current analysis, then every update.
+     * Reconnects with Last-Event-ID after a dropped connection; `onError` is told about
+     * every failed attempt. Returns a function that closes the stream.
+     */
+    subscribeDashboard(onAnalysis: (analysis: RiskAnalysis) => void, onError?: (error: unknown) => void): () => void {
+        const controller = new AbortController();
+        let lastEventId: string | undefined;
+        let retryMs = 1000;
+
+        const follow = async () => {
+            while (!controller.signal.aborted) {
+                try {
+                    const token = localStorage.getItem('access_token');
+                    const response = await fetch(`${API_BASE_URL}/dashboard/stream`, {
+                        headers: {
+                            Accept: 'text/event-stream',
+                            ...(token ? { Authorization: `Bearer ${token}` } : {}),
+                            ...(lastEventId ? { 'Last-Event-ID': lastEventId } : {}),
+                        },
+                        signal: controller.signal,
+                    });
+                    if (response.status === 401) {
+                        localStorage.removeItem('access_token');
+                        localStorage.removeItem('username');
+                        window.location.href = '/login';
+                        return;
+                    }
+                    if (!response.ok || !response.body) {
+                        const retryAfter = Number(response.headers.get('Retry-After'));
+                        if (retryAfter) retryMs = retryAfter * 1000;
+                        throw new Error(`Dashboard stream failed with status ${response.status}`);
+                    }
+                    retryMs = 1000;
+
+                    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+                    let buffer = '';
+                    for (;;) {
+                        const { value, done } = await reader.read();
+                        if (done) break;
+                        buffer += value;
+                        let end;
+                        while ((end = buffer.indexOf('\n\n')) !== -1) {
+                            const message = buffer.slice(0, end);
+                            buffer = buffer.slice(end + 2);
+                            let id: string | undefined;
+                            let data = '';
+                            for (const line of message.split('\n')) {
+                                if (line.startsWith('id: ')) id = line.slice(4);
+                                else if (line.startsWith('data: ')) data += line.slice(6);
+                            }
+                            if (!data) continue; // heartbeat
+                            lastEventId = id;
+                            onAnalysis(JSON.parse(data));
+                        }
+                    }
+                } catch (error) {
+                    if (controller.signal.aborted) return;
+                    onError?.(error);
+                }
+                await new Promise((resolve) => setTimeout(resolve, retryMs));
+                retryMs = Math.min(retryMs * 2, 30000);
+            }
+        };
+
+        follow();
+        return () => controller.abort();
+    },
 };